@@ -22,7 +22,9 @@
 __all__ = [
     'JsonCacheHandler', 'TypeFetchError',
     'EffectMode', 'Restriction', 'State',
+    'CalculationSampler',
     'JsonDataHandler', 'SQLiteDataHandler',
+    'TransactionClosedError',
     'Fit',
     'Fleet',
     'Booster', 'Character', 'Charge', 'Drone', 'EffectBeacon', 'FighterSquad',
@@ -30,6 +32,7 @@ __all__ = [
     'Stance', 'Subsystem',
     'NoSuchAbilityError', 'NoSuchSideEffectError',
     'SlotTakenError',
+    'MsgProfiler',
     'ValidationError',
     'SolarSystem',
     'SourceManager',
@@ -40,11 +43,13 @@ __version__ = '0.0.0.dev10'
 
 from eos.cache_handler import JsonCacheHandler
 from eos.cache_handler import TypeFetchError
+from eos.calculator.sampler import CalculationSampler
 from eos.const.eos import EffectMode
 from eos.const.eos import Restriction
 from eos.const.eos import State
 from eos.data_handler import JsonDataHandler
 from eos.data_handler import SQLiteDataHandler
+from eos.exception import TransactionClosedError
 from eos.fit import Fit
 from eos.fleet import Fleet
 from eos.item import Booster
@@ -65,6 +70,7 @@ from eos.item import Subsystem
 from eos.item.exception import NoSuchAbilityError
 from eos.item.exception import NoSuchSideEffectError
 from eos.item_container import SlotTakenError
+from eos.pubsub.profiler import MsgProfiler
 from eos.restriction import ValidationError
 from eos.solar_system import SolarSystem
 from eos.source import SourceManager
@@ -20,6 +20,7 @@
 
 
 from logging import getLogger
+from operator import attrgetter
 
 from eos.const.eos import EosTypeId
 from eos.const.eos import ModAffecteeFilter
@@ -27,6 +28,7 @@ from eos.const.eos import ModDomain
 from eos.item import Character
 from eos.item import Ship
 from eos.util.keyed_storage import KeyedStorage
+from eos.util.keyed_storage import NestedKeyedStorage
 from .exception import UnexpectedDomainError
 from .exception import UnknownAffecteeFilterError
 
@@ -34,6 +36,11 @@ from .exception import UnknownAffecteeFilterError
 logger = getLogger(__name__)
 
 
+# Affector spec storages are indexed by affectee attribute ID, so that
+# calculation of an attribute has to visit only specs which can modify it
+get_affectee_attr_id = attrgetter('modifier.affectee_attr_id')
+
+
 class AffectionRegister:
     """Keeps track of connections between affector specs and affectee items.
 
@@ -79,31 +86,35 @@ class AffectionRegister:
 
         # All active affector specs which affect one specific item (via ship,
         # character, other reference or self) are kept here
-        # Format: {affectee item: {affector specs}}
-        self.__affectors_item_active = KeyedStorage()
+        # Format: {affectee item: {affectee attr ID: {affector specs}}}
+        self.__affectors_item_active = NestedKeyedStorage(get_affectee_attr_id)
 
         # Affector specs influencing all items belonging to certain fit and
         # domain
-        # Format: {(affectee fit, affectee domain): {affector specs}}
-        self.__affectors_domain = KeyedStorage()
+        # Format: {(affectee fit, affectee domain): {affectee attr ID:
+        # {affector specs}}}
+        self.__affectors_domain = NestedKeyedStorage(get_affectee_attr_id)
 
         # Affector specs influencing items belonging to certain fit, domain and
         # group
-        # Format: {(affectee fit, affectee domain, affectee group ID): {affector
-        # specs}}
-        self.__affectors_domain_group = KeyedStorage()
+        # Format: {(affectee fit, affectee domain, affectee group ID):
+        # {affectee attr ID: {affector specs}}}
+        self.__affectors_domain_group = NestedKeyedStorage(
+            get_affectee_attr_id)
 
         # Affector specs influencing items belonging to certain fit and domain,
         # and having certain skill requirement
         # Format: {(affectee fit, affectee domain, affectee skill requirement
-        # type ID): {affector specs}}
-        self.__affectors_domain_skillrq = KeyedStorage()
+        # type ID): {affectee attr ID: {affector specs}}}
+        self.__affectors_domain_skillrq = NestedKeyedStorage(
+            get_affectee_attr_id)
 
         # Affector specs influencing owner-modifiable items belonging to certain
         # fit and having certain skill requirement
-        # Format: {(affectee fit, affectee skill requirement type ID): {affector
-        # specs}}
-        self.__affectors_owner_skillrq = KeyedStorage()
+        # Format: {(affectee fit, affectee skill requirement type ID):
+        # {affectee attr ID: {affector specs}}}
+        self.__affectors_owner_skillrq = NestedKeyedStorage(
+            get_affectee_attr_id)
 
     # Query methods
     def get_local_affectee_items(self, affector_spec):
@@ -149,37 +160,68 @@ class AffectionRegister:
             affectee_fits = {i._fit for i in tgt_items if isinstance(i, Ship)}
             return getter(self, affector_spec, ModDomain.ship, affectee_fits)
 
-    def get_affector_specs(self, affectee_item):
-        """Get all affector specs, which influence passed item."""
+    def get_affector_specs(self, affectee_item, affectee_attr_id):
+        """Get affector specs which influence attribute on passed item.
+
+        Args:
+            affectee_item: Item, for which we're getting affector specs.
+            affectee_attr_id: Affectee attribute ID; only affector specs which
+                influence attribute with this ID will be returned.
+
+        Returns:
+            Set with affector specs.
+        """
         affectee_fit = affectee_item._fit
         affector_specs = set()
         # Item
         affector_storage = self.__affectors_item_active
         key = affectee_item
-        affector_specs.update(affector_storage.get(key, ()))
+        affector_specs.update(affector_storage.get_data_set(
+            key, affectee_attr_id))
         affectee_domain = affectee_item._modifier_domain
         if affectee_domain is not None:
             # Domain
             affector_storage = self.__affectors_domain
             key = (affectee_fit, affectee_domain)
-            affector_specs.update(affector_storage.get(key, ()))
+            affector_specs.update(affector_storage.get_data_set(
+                key, affectee_attr_id))
             # Domain and group
             affector_storage = self.__affectors_domain_group
             key = (affectee_fit, affectee_domain, affectee_item._type.group_id)
-            affector_specs.update(affector_storage.get(key, ()))
+            affector_specs.update(affector_storage.get_data_set(
+                key, affectee_attr_id))
             # Domain and skill requirement
             affector_storage = self.__affectors_domain_skillrq
             for affectee_srq_type_id in affectee_item._type.required_skills:
                 key = (affectee_fit, affectee_domain, affectee_srq_type_id)
-                affector_specs.update(affector_storage.get(key, ()))
+                affector_specs.update(affector_storage.get_data_set(
+                    key, affectee_attr_id))
         # Owner-modifiable and skill requirement
         if affectee_item._owner_modifiable:
             affector_storage = self.__affectors_owner_skillrq
             for affectee_srq_type_id in affectee_item._type.required_skills:
                 key = (affectee_fit, affectee_srq_type_id)
-                affector_specs.update(affector_storage.get(key, ()))
+                affector_specs.update(affector_storage.get_data_set(
+                    key, affectee_attr_id))
         return affector_specs
 
+    def get_item_affector_specs(self, affectee_item, affectee_attr_id):
+        """Get affector specs which target attribute on passed item directly.
+
+        Only affector specs which target item itself are returned, affector
+        specs which target item's domain are not.
+
+        Args:
+            affectee_item: Item, for which we're getting affector specs.
+            affectee_attr_id: Affectee attribute ID; only affector specs which
+                influence attribute with this ID will be returned.
+
+        Returns:
+            Iterable with affector specs.
+        """
+        return self.__affectors_item_active.get_data_set(
+            affectee_item, affectee_attr_id)
+
     # Maintenance methods
     def register_affectee_item(self, affectee_item):
         """Add passed affectee item to the register.
@@ -409,12 +451,15 @@ class AffectionRegister:
                 affectee_fit, awaiting_to_activate)
             self.__affectors_item_active.add_data_set(
                 affectee_item, awaiting_to_activate)
-        # Other
+        # Other. Relation between 'other' items is mutual (container and its
+        # children), thus affector items which can affect passed item are
+        # its own 'other' items, and storage keyed by affector item serves as
+        # index here
         other_to_activate = set()
-        for affector_item, affector_specs in (
-            self.__affectors_item_other.items()
-        ):
-            if affectee_item in affector_item._others:
+        affectors_item_other = self.__affectors_item_other
+        for affector_item in affectee_item._others:
+            affector_specs = affectors_item_other.get(affector_item)
+            if affector_specs:
                 other_to_activate.update(affector_specs)
         # Just add affector specs to active storage, 'other' affector specs
         # should never be removed from 'other'-specific storage
@@ -427,13 +472,14 @@ class AffectionRegister:
         if affectee_item not in self.__affectors_item_active:
             return
         awaitable_to_deactivate = set()
-        for affector_spec in (
-            self.__affectors_item_active.get(affectee_item, ())
+        for affector_specs in (
+            self.__affectors_item_active.get_data_sets(affectee_item)
         ):
-            if affector_spec.modifier.affectee_domain in (
-                ModDomain.ship, ModDomain.character, ModDomain.self
-            ):
-                awaitable_to_deactivate.add(affector_spec)
+            for affector_spec in affector_specs:
+                if affector_spec.modifier.affectee_domain in (
+                    ModDomain.ship, ModDomain.character, ModDomain.self
+                ):
+                    awaitable_to_deactivate.add(affector_spec)
         # Remove all affector specs influencing this item directly, including
         # 'other' affectors
         del self.__affectors_item_active[affectee_item]
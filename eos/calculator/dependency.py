@@ -0,0 +1,100 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.util.keyed_storage import KeyedStorage
+
+
+class DependencyRegister:
+    """Keeps track of which attributes depend on which attributes.
+
+    Nodes of dependency graph are (item, attribute ID) pairs. Outgoing edges of
+    a node are not stored as affectee nodes directly, as set of items affected
+    by an affector spec changes as items are added and removed; instead, they
+    are stored as affector specs and projectors, which are then resolved into
+    affectee nodes using affection and projection registers. Dependencies
+    defined by attribute caps are stored on attribute maps of items.
+    """
+
+    def __init__(self):
+        # Local affector specs with dogma modifiers, keyed by item and ID of
+        # attribute they use to calculate modification value
+        # Format: {(affector item, affector attr ID): {affector specs}}
+        self.__local_affector_specs = KeyedStorage()
+
+        # Projected affector specs with dogma modifiers, keyed by item and ID
+        # of attribute they use to calculate modification value
+        # Format: {(affector item, affector attr ID): {affector specs}}
+        self.__projected_affector_specs = KeyedStorage()
+
+        # Projectors whose influence on target item is reduced by resistance
+        # attribute of target item
+        # Format: {(target item, resist attr ID): {projectors}}
+        self.__resist_projectors = KeyedStorage()
+
+    # Query methods
+    def get_local_affector_specs(self, item, attr_id):
+        """Get local affector specs which rely on passed attribute."""
+        return self.__local_affector_specs.get((item, attr_id), ())
+
+    def get_projected_affector_specs(self, item, attr_id):
+        """Get projected affector specs which rely on passed attribute."""
+        return self.__projected_affector_specs.get((item, attr_id), ())
+
+    def get_resist_projectors(self, tgt_item, attr_id):
+        """Get projectors resisted by passed attribute of target item."""
+        return self.__resist_projectors.get((tgt_item, attr_id), ())
+
+    # Maintenance methods
+    def register_local_affector_spec(self, affector_spec):
+        self.__local_affector_specs.add_data_entry(
+            self.__get_affector_key(affector_spec), affector_spec)
+
+    def unregister_local_affector_spec(self, affector_spec):
+        self.__local_affector_specs.rm_data_entry(
+            self.__get_affector_key(affector_spec), affector_spec)
+
+    def register_projected_affector_spec(self, affector_spec):
+        self.__projected_affector_specs.add_data_entry(
+            self.__get_affector_key(affector_spec), affector_spec)
+
+    def unregister_projected_affector_spec(self, affector_spec):
+        self.__projected_affector_specs.rm_data_entry(
+            self.__get_affector_key(affector_spec), affector_spec)
+
+    def apply_projector(self, projector, tgt_items):
+        resist_attr_id = projector.effect.resist_attr_id
+        if not resist_attr_id:
+            return
+        for tgt_item in tgt_items:
+            self.__resist_projectors.add_data_entry(
+                (tgt_item, resist_attr_id), projector)
+
+    def unapply_projector(self, projector, tgt_items):
+        resist_attr_id = projector.effect.resist_attr_id
+        if not resist_attr_id:
+            return
+        for tgt_item in tgt_items:
+            self.__resist_projectors.rm_data_entry(
+                (tgt_item, resist_attr_id), projector)
+
+    # Auxiliary methods
+    def __get_affector_key(self, affector_spec):
+        return affector_spec.item, affector_spec.modifier.affector_attr_id
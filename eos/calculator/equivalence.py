@@ -0,0 +1,109 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.util.keyed_storage import KeyedStorage
+
+
+class EquivalenceRegister:
+    """Keeps track of items which are equivalent for attribute calculation.
+
+    Items are equivalent when they belong to the same fit, are of the same
+    class and type, have the same set of effects registered in calculator, and
+    their 'other' items (charges, containers, autocharges) are pairwise
+    equivalent in the same sense. Such items are affected by the same fit-wide
+    affector specs and by equivalent own affector specs, thus attribute values
+    calculated for one of them are valid for all of them. Whatever targets
+    items individually (overrides, projections) is not reflected by
+    equivalence keys, and has to be checked separately.
+    """
+
+    def __init__(self):
+        # Effects which have been registered in calculator for items
+        # Format: {item: {effect IDs}}
+        self.__item_effect_ids = KeyedStorage()
+
+        # Equivalence keys and 'other' items of items, filled lazily
+        # Format: {item: (equivalence key, other items)}
+        self.__item_keys = {}
+
+        # Items grouped by their equivalence keys
+        # Format: {equivalence key: {items}}
+        self.__key_items = KeyedStorage()
+
+        # Items whose keys were built using data of 'other' item
+        # Format: {other item: {items}}
+        self.__other_items = KeyedStorage()
+
+    # Query methods
+    def get_equivalent_items(self, item):
+        """Get items equivalent to passed item, including item itself."""
+        return self.__key_items.get(self.__get_key_data(item)[0], ())
+
+    def get_others(self, item):
+        """Get 'other' items which were used to build item's key."""
+        return self.__get_key_data(item)[1]
+
+    # Maintenance methods
+    def register_effects(self, item, effect_ids):
+        self.__item_effect_ids.add_data_set(item, effect_ids)
+        self.forget_item(item)
+
+    def unregister_effects(self, item, effect_ids):
+        self.__item_effect_ids.rm_data_set(item, effect_ids)
+        self.forget_item(item)
+
+    def forget_item(self, item):
+        """Drop key of passed item and keys which depend on it.
+
+        Keys of 'other' items are built using data of passed item, thus they
+        are dropped as well.
+        """
+        key_items = {item}
+        key_items.update(item._others)
+        key_items.update(self.__other_items.get(item, ()))
+        for key_item in key_items:
+            key_data = self.__item_keys.pop(key_item, None)
+            if key_data is None:
+                continue
+            key, others = key_data
+            self.__key_items.rm_data_entry(key, key_item)
+            for other in others:
+                self.__other_items.rm_data_entry(other, key_item)
+
+    # Auxiliary methods
+    def __get_key_data(self, item):
+        try:
+            return self.__item_keys[item]
+        except KeyError:
+            pass
+        others = tuple(item._others)
+        get_effect_ids = self.__item_effect_ids.get
+        key = (
+            item._fit, type(item), item._type_id,
+            frozenset(get_effect_ids(item, ())),
+            tuple(sorted(
+                (o._type_id, tuple(sorted(get_effect_ids(o, ()))))
+                for o in others)))
+        key_data = self.__item_keys[item] = (key, others)
+        self.__key_items.add_data_entry(key, item)
+        for other in others:
+            self.__other_items.add_data_entry(other, item)
+        return key_data
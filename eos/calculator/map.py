@@ -20,22 +20,34 @@
 
 
 import math
+from array import array
+from bisect import bisect_left
+from bisect import insort
 from collections import namedtuple
-from itertools import chain
+from collections.abc import KeysView
 from logging import getLogger
 
 from eos.cache_handler import AttrFetchError
 from eos.const.eos import ModAggregateMode
 from eos.const.eos import ModOperator
 from eos.const.eve import AttrId
-from eos.const.eve import TypeCategoryId
+from eos.eve_obj.modifier import DogmaModifier
+from eos.eve_obj.modifier import ModificationCalculationError
 from eos.pubsub.message import AttrsValueChanged
 from eos.util.keyed_storage import KeyedStorage
 from .exception import AttrMetadataError
 from .exception import BaseValueError
+from .materializer import materialize_attrs
 
 
 OverrideData = namedtuple('OverrideData', ('value', 'persistent'))
+AttrExplanation = namedtuple('AttrExplanation', (
+    'attr_id', 'base_value', 'modifications', 'uncapped_value',
+    'cap_attr_id', 'cap_value', 'rounded', 'value'))
+ModificationExplanation = namedtuple('ModificationExplanation', (
+    'affector_item', 'effect', 'modifier', 'operator', 'raw_value',
+    'resist_value', 'normalized_value', 'aggregate_mode', 'aggregate_key',
+    'penalty_position', 'applied'))
 
 
 logger = getLogger(__name__)
@@ -44,14 +56,10 @@ logger = getLogger(__name__)
 # Stacking penalty base constant, used in attribute calculations
 PENALTY_BASE = 1 / math.exp((1 / 2.67) ** 2)
 
-# Items belonging to these categories never have their effects stacking
-# penalized
-PENALTY_IMMUNE_CATEGORY_IDS = (
-    TypeCategoryId.ship,
-    TypeCategoryId.charge,
-    TypeCategoryId.skill,
-    TypeCategoryId.implant,
-    TypeCategoryId.subsystem)
+# Stacking penalty multipliers for modifications, by their position in
+# penalization chain; modifications past the end of the table are ignored as
+# non-significant
+PENALTY_MULTIPLIERS = tuple(PENALTY_BASE ** (pos ** 2) for pos in range(11))
 
 # Tuple with penalizable operators
 PENALIZABLE_OPERATORS = (
@@ -101,22 +109,425 @@ LIMITED_PRECISION_ATTR_IDS = (
 CALCULATE_RAISABLE_EXCEPTIONS = (AttrMetadataError, BaseValueError)
 
 
+def is_penalized(stackable, affector_spec, mod_operator):
+    """Decide if modification should be stacking penalized or not."""
+    return (
+        not stackable and
+        not affector_spec.item._type.penalty_immune and
+        mod_operator in PENALIZABLE_OPERATORS)
+
+
+def aggregate_min_key(mod_data):
+    """Key to pick minimum modification, preferring penalized ones."""
+    return mod_data
+
+
+def aggregate_max_key(mod_data):
+    """Key to pick maximum modification, preferring non-penalized ones."""
+    return mod_data[0], not mod_data[1]
+
+
+def fold_penalty_chains(chain_positive, chain_negative):
+    """Calculate reduced multiplier of sorted penalization chains.
+
+    Both chains have to be sorted with strongest modifications first.
+    """
+    # Base final multiplier on 1
+    value = 1
+    for penalization_chain in (chain_positive, chain_negative):
+        # Same for intermediate per-chain value
+        chain_value = 1
+        # Apply stacking penalty based on modification position
+        for mod_value, penalty_multiplier in zip(
+            penalization_chain, PENALTY_MULTIPLIERS
+        ):
+            chain_value *= 1 + mod_value * penalty_multiplier
+        value *= chain_value
+    return value - 1
+
+
+def apply_mod_values(value, mod_operator, mod_values, high_is_good):
+    """Apply normalized modification values of single operator to value."""
+    # Pick best modification for assignments, based on high_is_good value
+    if mod_operator in ASSIGNMENT_OPERATORS:
+        if high_is_good:
+            return max(mod_values)
+        return min(mod_values)
+    if mod_operator in ADDITION_OPERATORS:
+        for mod_value in mod_values:
+            value += mod_value
+    elif mod_operator in MULTIPLICATION_OPERATORS:
+        for mod_value in mod_values:
+            value *= 1 + mod_value
+    return value
+
+
+def penalize_values(mod_values, explain=False):
+    """Calculate aggregated reduced multiplier.
+
+    Assuming all multipliers received should be stacking penalized, and that
+    they are normalized to reduced multiplier form, calculate final reduced
+    multiplier.
+
+    Args:
+        mod_values: Iterable with reduced multipliers.
+        explain (optional): When True, multipliers have to be explained
+            values, and their positions in penalty chains are recorded.
+
+    Returns:
+        Final aggregated reduced multiplier.
+    """
+    # Gather positive multipliers into one chain, negative into another
+    chain_positive = []
+    chain_negative = []
+    for mod_value in mod_values:
+        if mod_value >= 0:
+            chain_positive.append(mod_value)
+        else:
+            chain_negative.append(mod_value)
+    # Strongest modifications always go first
+    chain_positive.sort(reverse=True)
+    chain_negative.sort()
+    if explain:
+        for penalization_chain in (chain_positive, chain_negative):
+            for position, mod_value in enumerate(penalization_chain):
+                mod_data = mod_value.mod_data
+                mod_data['penalty_position'] = position
+                if position >= len(PENALTY_MULTIPLIERS):
+                    mod_data['applied'] = False
+    return fold_penalty_chains(chain_positive, chain_negative)
+
+
+def pick_aggregate_value(aggregate_values, aggregate_func, sort_func,
+                         explain=False):
+    """Pick the only applied modification out of aggregated ones.
+
+    Args:
+        aggregate_values: Iterable with (value, penalize) tuples.
+        aggregate_func: Function which picks modification, min or max.
+        sort_func: Key function which is passed to aggregate function.
+        explain (optional): When True, values have to be explained values,
+            and values which are not picked are marked as not applied.
+
+    Returns:
+        Picked (value, penalize) tuple.
+    """
+    picked = aggregate_func(aggregate_values, key=sort_func)
+    if explain:
+        for mod_value, _ in aggregate_values:
+            if mod_value is not picked[0]:
+                mod_value.mod_data['applied'] = False
+    return picked
+
+
+def fold_operator_values(
+        value, mod_operator, mod_values, penalized_values, high_is_good,
+        explain=False):
+    """Apply normalized modification values of single operator to value.
+
+    Penalized values are reduced to single multiplier, which is applied along
+    with the rest of values. List of non-penalized values is extended with
+    it.
+    """
+    if penalized_values:
+        mod_values.append(penalize_values(penalized_values, explain))
+    if mod_values:
+        value = apply_mod_values(value, mod_operator, mod_values, high_is_good)
+    return value
+
+
+class ExplainedValue(float):
+    """Normalized modification value which carries its explanation data.
+
+    Modification folding handles it as regular value, and updates the data
+    when modification is dropped or penalized.
+    """
+
+    __slots__ = ('mod_data',)
+
+
+class RunningAggregate:
+    """Normalized values of stacked modifications of single operator bucket.
+
+    Values are kept between recalculations. Penalized values are kept in
+    sorted chains, so that changing one of them does not need the whole chain
+    to be sorted again.
+    """
+
+    __slots__ = (
+        'stack_values', 'penalized_values', 'chain_positive', 'chain_negative')
+
+    def __init__(self):
+        # Format: {affector spec: value}
+        self.stack_values = {}
+        # Format: {affector spec: value}
+        self.penalized_values = {}
+        # Penalized values, sorted in ascending order
+        # Format: [values]
+        self.chain_positive = []
+        # Format: [values]
+        self.chain_negative = []
+
+    def add(self, affector_spec, mod_value, penalize):
+        if not penalize:
+            self.stack_values[affector_spec] = mod_value
+            return
+        self.penalized_values[affector_spec] = mod_value
+        if mod_value >= 0:
+            insort(self.chain_positive, mod_value)
+        else:
+            insort(self.chain_negative, mod_value)
+
+    def discard(self, affector_spec):
+        if self.stack_values.pop(affector_spec, None) is not None:
+            return
+        mod_value = self.penalized_values.pop(affector_spec, None)
+        if mod_value is None:
+            return
+        if mod_value >= 0:
+            chain = self.chain_positive
+        else:
+            chain = self.chain_negative
+        del chain[bisect_left(chain, mod_value)]
+
+    def get_penalized_value(self):
+        """Calculate reduced multiplier of all penalized values."""
+        return fold_penalty_chains(
+            reversed(self.chain_positive), self.chain_negative)
+
+
+class OperatorBucket:
+    """Affector specs of modification plan which share the same operator."""
+
+    __slots__ = (
+        'operator', 'normalization_func', 'stack', 'stack_penalized',
+        'aggregate_min', 'aggregate_max', 'running')
+
+    def __init__(self, operator, normalization_func, incremental):
+        self.operator = operator
+        self.normalization_func = normalization_func
+        # Format: {affector specs}
+        self.stack = set()
+        # Format: {affector specs}
+        self.stack_penalized = set()
+        # Format: {aggregate key: {affector spec: penalize}}
+        self.aggregate_min = {}
+        # Format: {aggregate key: {affector spec: penalize}}
+        self.aggregate_max = {}
+        # Values of stacked modifications, kept only for attributes which are
+        # recalculated incrementally
+        self.running = RunningAggregate() if incremental else None
+
+    def __bool__(self):
+        return bool(
+            self.stack or self.stack_penalized or
+            self.aggregate_min or self.aggregate_max)
+
+
+class ModificationPlan:
+    """Affector specs which influence single attribute on single item.
+
+    Specs are sorted into buckets by operator, stacking penalty and aggregation
+    mode in advance, so that recalculation of attribute value only needs to
+    fetch modification values and fold them.
+
+    Incremental plans also keep values of stacked modifications, and fetch
+    only values of specs which have been marked as changed.
+
+    Args:
+        stackable: Stackability of attribute the plan is made for.
+        incremental: Keep modification values between recalculations or not.
+    """
+
+    __slots__ = (
+        '__stackable', '__incremental', '__buckets', '__ordered_buckets',
+        'dynamic', 'dirty')
+
+    def __init__(self, stackable, incremental=False):
+        self.__stackable = stackable
+        self.__incremental = incremental
+        # Format: {operator: operator bucket}
+        self.__buckets = {}
+        # Buckets with valid operators, sorted in order of application. None
+        # means that it has to be composed again
+        self.__ordered_buckets = None
+        # Affector specs whose modification parameters are not known in advance
+        # (e.g. specs with python modifiers), or are malformed
+        # Format: {affector specs}
+        self.dynamic = set()
+        # Stacked affector specs whose values have to be fetched on the next
+        # recalculation, None for regular plans
+        # Format: {affector specs}
+        self.dirty = set() if incremental else None
+
+    @property
+    def buckets(self):
+        """Get operator buckets, in order their operators are applied."""
+        ordered_buckets = self.__ordered_buckets
+        if ordered_buckets is None:
+            ordered_buckets = self.__ordered_buckets = tuple(
+                self.__buckets[o] for o in sorted(self.__buckets))
+        return ordered_buckets
+
+    def add_affector_spec(self, affector_spec):
+        modifier = affector_spec.modifier
+        # Only dogma modifiers with valid operators have all modification
+        # parameters besides value static
+        if (
+            not isinstance(modifier, DogmaModifier) or
+            modifier.operator not in NORMALIZATION_MAP
+        ):
+            self.dynamic.add(affector_spec)
+            return
+        mod_operator = modifier.operator
+        try:
+            bucket = self.__buckets[mod_operator]
+        except KeyError:
+            bucket = self.__buckets[mod_operator] = OperatorBucket(
+                mod_operator, NORMALIZATION_MAP[mod_operator],
+                self.__incremental)
+            self.__ordered_buckets = None
+        penalize = is_penalized(self.__stackable, affector_spec, mod_operator)
+        mod_aggregate_mode = modifier.aggregate_mode
+        if mod_aggregate_mode == ModAggregateMode.stack:
+            if penalize:
+                bucket.stack_penalized.add(affector_spec)
+            else:
+                bucket.stack.add(affector_spec)
+            if self.dirty is not None:
+                self.dirty.add(affector_spec)
+        elif mod_aggregate_mode == ModAggregateMode.minimum:
+            bucket.aggregate_min.setdefault(
+                modifier.aggregate_key, {})[affector_spec] = penalize
+        elif mod_aggregate_mode == ModAggregateMode.maximum:
+            bucket.aggregate_max.setdefault(
+                modifier.aggregate_key, {})[affector_spec] = penalize
+
+    def remove_affector_spec(self, affector_spec):
+        if affector_spec in self.dynamic:
+            self.dynamic.remove(affector_spec)
+            return
+        modifier = affector_spec.modifier
+        mod_operator = modifier.operator
+        try:
+            bucket = self.__buckets[mod_operator]
+        except KeyError:
+            return
+        bucket.stack.discard(affector_spec)
+        bucket.stack_penalized.discard(affector_spec)
+        if bucket.running is not None:
+            bucket.running.discard(affector_spec)
+            self.dirty.discard(affector_spec)
+        for container in (bucket.aggregate_min, bucket.aggregate_max):
+            aggregate_specs = container.get(modifier.aggregate_key)
+            if aggregate_specs is None:
+                continue
+            aggregate_specs.pop(affector_spec, None)
+            if not aggregate_specs:
+                del container[modifier.aggregate_key]
+        if not bucket:
+            del self.__buckets[mod_operator]
+            self.__ordered_buckets = None
+
+    def mark_changed(self, affector_spec):
+        """Make sure value of spec will be fetched on the next recalculation."""
+        if self.dirty is not None and affector_spec not in self.dynamic:
+            self.dirty.add(affector_spec)
+
+    def refresh(self, item, get_modification):
+        """Fetch values of stacked specs which have been marked as changed."""
+        buckets = self.__buckets
+        # Errors are not remembered, values of failed specs will be requested
+        # again on the next recalculation
+        failed = set()
+        for affector_spec in self.dirty:
+            bucket = buckets.get(affector_spec.modifier.operator)
+            if bucket is None:
+                continue
+            running = bucket.running
+            running.discard(affector_spec)
+            if affector_spec in bucket.stack:
+                penalize = False
+            elif affector_spec in bucket.stack_penalized:
+                penalize = True
+            else:
+                continue
+            try:
+                _, mod_value, resist_value, _, _ = get_modification(
+                    item, affector_spec)
+            except ModificationCalculationError:
+                failed.add(affector_spec)
+                continue
+            running.add(
+                affector_spec,
+                bucket.normalization_func(mod_value) * resist_value,
+                penalize)
+        self.dirty = failed
+
+    def __bool__(self):
+        return bool(self.__buckets or self.dynamic)
+
+
+# States of attribute value slots in attribute map
+SLOT_INVALID = 0
+SLOT_BASE = 1
+SLOT_MODIFIED = 2
+
+
+# Shared plan for attributes which nothing modifies, to save memory. It is
+# never modified, and is replaced by regular plan when needed
+EMPTY_PLAN = ModificationPlan(True)
+
+
 class MutableAttrMap:
     """Map which contains modified attribute values.
 
     It provides some of facilities which help to calculate, store and provide
     access to modified attribute values.
+
+    Values of attributes defined on item type are stored compactly: each item
+    type assigns slot index to its attributes, and map keeps calculated values
+    in array of doubles, accompanied by per-slot validity map. Valid values
+    which are equal to base are not materialized at all and are read from
+    item type.
     """
 
     def __init__(self, item):
         self.__item = item
-        # Actual container of calculated attributes.
+        # Slot indices and base values of item type attributes, fetched lazily
+        # from item type.
+        # Format: {attribute ID: slot index}
+        self.__slots = None
+        # Format: {attribute ID: base value}
+        self.__base_values = None
+        # Per-slot validity map, one byte per slot, which tells if slot has no
+        # valid value, or if valid value is equal to base, or if it differs
+        # from base and is stored in value array
+        self.__states = None
+        # Array with calculated values of item type attributes, allocated only
+        # when some of them gets modified
+        self.__values = None
+        # Calculated values which cannot be stored in slots, e.g. values of
+        # attributes which base off their default values or non-numeric values.
         # Format: {attribute ID: value}
-        self.__modified_attrs = {}
+        self.__extra_attrs = None
+        # When True, value storages above are shared with attribute map of
+        # another item, and have to be copied before they are modified
+        self.__shared = False
         # Override and cap maps are initialized as None to save memory, as they
         # are not needed most of the time
         self.__override_callbacks = None
         self.__cap_map = None
+        # Modification plans for attributes which have been calculated, None
+        # as plan means that attribute has been calculated just once
+        # Format: {attribute ID: modification plan}
+        self.__plans = None
+        # Counters of map activity
+        self.__calculations = 0
+        self.__cache_hits = 0
+        self.__invalidations = 0
+        self.__invalidation_misses = 0
+        self.__override_calls = 0
 
     def __getitem__(self, attr_id):
         # Overridden values are priority. Access 'private' override callbacks
@@ -125,31 +536,58 @@ class MutableAttrMap:
             self.__override_callbacks is not None and
             attr_id in self.__override_callbacks
         ):
+            self.__override_calls += 1
             callback, args, kwargs = self.__override_callbacks[attr_id]
             return callback(*args, **kwargs)
         # If no override is set, use modified value. If value is stored in
-        # modified map, it's considered valid
+        # valid slot, take it from there
+        slots = self.__slots
+        if slots is not None:
+            slot = slots.get(attr_id)
+            if slot is not None:
+                state = self.__states[slot]
+                if state == SLOT_MODIFIED:
+                    self.__cache_hits += 1
+                    return self.__values[slot]
+                if state == SLOT_BASE:
+                    self.__cache_hits += 1
+                    return self.__base_values[attr_id]
+        # Else, check other storages or run full calculation process
         try:
-            value = self.__modified_attrs[attr_id]
-        # Else, we have to run full calculation process
-        except KeyError:
-            try:
-                value = self.__calculate(attr_id)
-            except CALCULATE_RAISABLE_EXCEPTIONS as e:
-                raise KeyError(attr_id) from e
-            else:
-                self.__modified_attrs[attr_id] = value
-        return value
+            return self.__get_unslotted(attr_id)
+        except CALCULATE_RAISABLE_EXCEPTIONS as e:
+            raise KeyError(attr_id) from e
 
     def __len__(self):
-        return len(self.keys())
+        type_attrs = self.__item._type_attrs
+        extra_attrs = self.__extra_attrs or {}
+        length = len(type_attrs)
+        for attr_id in extra_attrs:
+            if attr_id not in type_attrs:
+                length += 1
+        for attr_id in self.__override_callbacks or ():
+            if attr_id not in type_attrs and attr_id not in extra_attrs:
+                length += 1
+        return length
 
     def __contains__(self, attr_id):
-        return attr_id in self.keys()
+        return (
+            attr_id in self.__item._type_attrs or
+            attr_id in (self.__extra_attrs or ()) or
+            attr_id in (self.__override_callbacks or ()))
 
     def __iter__(self):
-        for k in self.keys():
-            yield k
+        # Yield unique attribute IDs from base, modified and override
+        # dictionaries
+        type_attrs = self.__item._type_attrs
+        extra_attrs = self.__extra_attrs or {}
+        yield from type_attrs
+        for attr_id in extra_attrs:
+            if attr_id not in type_attrs:
+                yield attr_id
+        for attr_id in self.__override_callbacks or ():
+            if attr_id not in type_attrs and attr_id not in extra_attrs:
+                yield attr_id
 
     def _force_recalc(self, attr_id):
         """
@@ -158,12 +596,28 @@ class MutableAttrMap:
         Returns:
             True if attribute was calculated, False if it wasn't.
         """
-        try:
-            del self.__modified_attrs[attr_id]
-        except KeyError:
+        slots = self.__slots
+        if slots is not None:
+            slot = slots.get(attr_id)
+            if slot is not None and self.__states[slot] != SLOT_INVALID:
+                self.__journal_values()
+                if self.__shared:
+                    self.__unshare()
+                self.__states[slot] = SLOT_INVALID
+                self.__invalidations += 1
+                return True
+        if self.__extra_attrs is None or attr_id not in self.__extra_attrs:
+            self.__invalidation_misses += 1
             return False
-        else:
-            return True
+        self.__invalidations += 1
+        self.__journal_values()
+        if self.__shared:
+            self.__unshare()
+        extra_attrs = self.__extra_attrs
+        del extra_attrs[attr_id]
+        if not extra_attrs:
+            self.__extra_attrs = None
+        return True
 
     def get(self, attr_id, default=None):
         # Almost copy-paste of __getitem__ due to performance reasons -
@@ -173,27 +627,130 @@ class MutableAttrMap:
             self.__override_callbacks is not None and
             attr_id in self.__override_callbacks
         ):
+            self.__override_calls += 1
             callback, args, kwargs = self.__override_callbacks[attr_id]
             return callback(*args, **kwargs)
+        slots = self.__slots
+        if slots is not None:
+            slot = slots.get(attr_id)
+            if slot is not None:
+                state = self.__states[slot]
+                if state == SLOT_MODIFIED:
+                    self.__cache_hits += 1
+                    return self.__values[slot]
+                if state == SLOT_BASE:
+                    self.__cache_hits += 1
+                    return self.__base_values[attr_id]
         try:
-            value = self.__modified_attrs[attr_id]
+            return self.__get_unslotted(attr_id)
+        except CALCULATE_RAISABLE_EXCEPTIONS:
+            return default
+
+    def explain(self, attr_id):
+        """Describe how calculated value of attribute is composed.
+
+        Modifications are fetched from calculation service the same way they
+        are fetched for calculation, thus explanation does not influence
+        anything, and costs nothing when it is not requested. Overrides are
+        not taken into account.
+
+        Args:
+            attr_id: ID of attribute to explain.
+
+        Returns:
+            Attribute explanation. Modifications are listed in order their
+            operators are applied. Normalized modification value is value
+            reduced to assignment, addition or multiplier form, with
+            resistance applied. Penalty position is position of modification
+            in its stacking penalty chain, None for modifications which are
+            not penalized. Modifications which lose aggregation or which are
+            too far in penalty chain are marked as not applied.
+
+        Raises:
+            KeyError: If attribute value cannot be calculated.
+        """
+        value = self._get_without_overrides(attr_id)
+        if value is None:
+            raise KeyError(attr_id)
+        item = self.__item
+        calculator = item._fit.solar_system._calculator
+        attr = calculator.attr_metadata[attr_id]
+        try:
+            base_value = item._type_attrs[attr_id]
         except KeyError:
-            try:
-                value = self.__calculate(attr_id)
-            except CALCULATE_RAISABLE_EXCEPTIONS:
-                return default
-            else:
-                self.__modified_attrs[attr_id] = value
-        return value
+            base_value = attr.default_value
+        # Modifications are folded the same way as during calculation without
+        # modification plan, recording what happens to them
+        # Format: [modification data]
+        explained_mods = []
+        uncapped_value = self.__fold_specs(
+            (), calculator.get_affector_specs(item, attr_id), base_value,
+            attr, calculator.get_modification, explained_mods=explained_mods)
+        # Assignments pass picked value through as is
+        if isinstance(uncapped_value, ExplainedValue):
+            uncapped_value = float(uncapped_value)
+        explained_mods.sort(key=lambda d: d['operator'])
+        modifications = [
+            ModificationExplanation(**d) for d in explained_mods]
+        cap_attr_id = attr.max_attr_id
+        cap_value = None
+        if cap_attr_id is not None:
+            cap_value = self.get(cap_attr_id)
+        return AttrExplanation(
+            attr_id=attr_id,
+            base_value=base_value,
+            modifications=modifications,
+            uncapped_value=uncapped_value,
+            cap_attr_id=cap_attr_id,
+            cap_value=cap_value,
+            rounded=attr_id in LIMITED_PRECISION_ATTR_IDS,
+            value=value)
+
+    def materialize(self, attr_ids=None):
+        """Calculate values of many attributes at once.
+
+        Caps are calculated before attributes they cap, and values are
+        returned in order attributes were requested.
+
+        Args:
+            attr_ids (optional): Iterable with IDs of attributes. When not
+                specified, all attributes of item are calculated.
+
+        Returns:
+            When attribute IDs are not specified, dictionary in {attribute ID:
+            value} format, without attributes which cannot be calculated.
+            Otherwise, tuple with values aligned with attribute IDs, with None
+            for attributes which cannot be calculated.
+        """
+        item = self.__item
+        return materialize_attrs((item,), attr_ids)[item]
 
     def keys(self):
-        # Return union of attributes from base, modified and override dictionary
-        return set(chain(
-            self.__item._type_attrs, self.__modified_attrs,
-            self.__override_callbacks or {}))
+        return KeysView(self)
 
     def items(self):
-        return set((attr_id, self.get(attr_id)) for attr_id in self.keys())
+        return set((attr_id, self.get(attr_id)) for attr_id in self)
+
+    def _get_stats(self):
+        """Get counters of map activity.
+
+        Returns:
+            Dictionary in {counter name: value} format.
+        """
+        return {
+            'calculations': self.__calculations,
+            'cache_hits': self.__cache_hits,
+            'invalidations': self.__invalidations,
+            'invalidation_misses': self.__invalidation_misses,
+            'override_calls': self.__override_calls}
+
+    def _reset_stats(self):
+        """Reset counters of map activity."""
+        self.__calculations = 0
+        self.__cache_hits = 0
+        self.__invalidations = 0
+        self.__invalidation_misses = 0
+        self.__override_calls = 0
 
     def _clear(self):
         """
@@ -201,8 +758,172 @@ class MutableAttrMap:
 
         Overrides are not removed. Messages for cleared attributes are not sent.
         """
-        self.__modified_attrs.clear()
+        self.__journal_values()
+        self.__slots = None
+        self.__base_values = None
+        self.__states = None
+        self.__values = None
+        self.__extra_attrs = None
+        self.__shared = False
         self.__cap_map = None
+        self.__plans = None
+
+    def _share_calculated(self, other):
+        """Take calculated values from attribute map of another item.
+
+        Values are valid only when both items are calculated in exactly the
+        same context, e.g. when item is a fork of the other item in identical
+        fit. Value storages are shared until either of maps modifies them.
+        Values already calculated on this map are kept.
+        """
+        if self.__item._type is not other.__item._type:
+            return
+        self._restore_calculated(other._save_calculated())
+
+    def _save_calculated(self):
+        """Get calculated values, so that they can be restored later.
+
+        Value storages are not copied right away; instead, map starts treating
+        them as shared, and copies them when it needs to modify them.
+
+        Returns:
+            Object which can be passed to _restore_calculated().
+        """
+        self.__shared = True
+        return (
+            self.__slots, self.__base_values, self.__states, self.__values,
+            self.__extra_attrs, self.__cap_map)
+
+    def _restore_calculated(self, saved):
+        """Take calculated values saved earlier via _save_calculated().
+
+        Values are valid only when item is in exactly the same context as
+        item whose values were saved. Value storages are shared until they
+        need to be modified. Values already calculated on this map are kept.
+        """
+        self.__journal_values()
+        slots, base_values, states, values, extra_attrs, cap_map = saved
+        # Cap map only grows until map is cleared, thus it has to be merged
+        # only when it was replaced since values were saved
+        if cap_map is not None and cap_map is not self.__cap_map:
+            for capping_attr_id, capped_attr_ids in cap_map.items():
+                for capped_attr_id in capped_attr_ids:
+                    self._cap_set(capping_attr_id, capped_attr_id)
+        own_states = self.__states
+        own_values = self.__values
+        own_extra_attrs = self.__extra_attrs
+        if states is not None and states is not own_states:
+            self.__slots = slots
+            self.__base_values = base_values
+            self.__states = states
+            self.__values = values
+            self.__shared = True
+            # Merge values calculated on this map on top of taken ones
+            if own_states is not None and any(own_states):
+                self.__unshare()
+                states = self.__states
+                for slot, state in enumerate(own_states):
+                    if state == SLOT_INVALID:
+                        continue
+                    states[slot] = state
+                    if state == SLOT_MODIFIED:
+                        if self.__values is None:
+                            self.__values = array('d', bytes(8 * len(states)))
+                        self.__values[slot] = own_values[slot]
+        if extra_attrs and extra_attrs is not own_extra_attrs:
+            if own_extra_attrs:
+                extra_attrs = dict(extra_attrs)
+                extra_attrs.update(own_extra_attrs)
+            else:
+                self.__shared = True
+            self.__extra_attrs = extra_attrs
+
+    def __unshare(self):
+        """Make private copies of value storages shared with another map."""
+        self.__shared = False
+        if self.__states is not None:
+            self.__states = bytearray(self.__states)
+        if self.__values is not None:
+            self.__values = array('d', self.__values)
+        if self.__extra_attrs is not None:
+            self.__extra_attrs = dict(self.__extra_attrs)
+
+    def _get_calculated(self, attr_id):
+        """Get stored attribute value without calculating it.
+
+        Overrides are not taken into account.
+
+        Raises:
+            KeyError: If value is not stored.
+        """
+        slots = self.__slots
+        if slots is not None:
+            slot = slots.get(attr_id)
+            if slot is not None:
+                state = self.__states[slot]
+                if state == SLOT_MODIFIED:
+                    return self.__values[slot]
+                if state == SLOT_BASE:
+                    return self.__base_values[attr_id]
+        if self.__extra_attrs is None:
+            raise KeyError(attr_id)
+        return self.__extra_attrs[attr_id]
+
+    def __get_unslotted(self, attr_id):
+        """Get value which is not stored in valid slot.
+
+        Value is taken from extra storage if it is there, otherwise it is
+        calculated and stored.
+
+        Raises:
+            AttrMetadataError: If metadata of attribute being calculated cannot
+                be fetched.
+            BaseValueError: If base value for attribute being calculated cannot
+                be found.
+        """
+        extra_attrs = self.__extra_attrs
+        if extra_attrs is not None and attr_id in extra_attrs:
+            self.__cache_hits += 1
+            return extra_attrs[attr_id]
+        self.__calculations += 1
+        value = self.__calculate(attr_id)
+        self.__store(attr_id, value)
+        return value
+
+    def __store(self, attr_id, value):
+        """Store calculated attribute value."""
+        self.__journal_values()
+        if self.__shared:
+            self.__unshare()
+        slots = self.__slots
+        if slots is None:
+            item_type = self.__item._type
+            if item_type is None:
+                slots = {}
+            else:
+                slots = self.__slots = item_type.attr_slots
+                self.__base_values = item_type.attrs
+                self.__states = bytearray(len(slots))
+        slot = slots.get(attr_id)
+        if slot is not None:
+            if value == self.__base_values[attr_id]:
+                self.__states[slot] = SLOT_BASE
+                return
+            values = self.__values
+            if values is None:
+                values = self.__values = array('d', bytes(8 * len(slots)))
+            # Slots are able to hold only numbers, everything else goes to
+            # extra storage
+            try:
+                values[slot] = value
+            except TypeError:
+                pass
+            else:
+                self.__states[slot] = SLOT_MODIFIED
+                return
+        if self.__extra_attrs is None:
+            self.__extra_attrs = {}
+        self.__extra_attrs[attr_id] = value
 
     def __calculate(self, attr_id):
         """Run calculations to find the actual value of attribute.
@@ -219,12 +940,21 @@ class MutableAttrMap:
             BaseValueError: If base value for attribute being calculated cannot
                 be found.
         """
+        fit = self.__item._fit
+        solar_system = fit.solar_system if fit is not None else None
+        if solar_system is not None and solar_system.calc_sampler is not None:
+            return solar_system.calc_sampler._sample(
+                self.__calculate_value, self.__item, attr_id, solar_system)
+        return self.__calculate_value(attr_id, solar_system)
+
+    def __calculate_value(self, attr_id, solar_system):
         item = self.__item
-        # Attribute object for attribute being calculated
+        # Metadata of attribute being calculated
         try:
-            attr = item._fit.solar_system.source.cache_handler.get_attr(attr_id)
+            calculator = solar_system._calculator
+            attr = calculator.attr_metadata[attr_id]
         # Raise error if we can't get metadata for requested attribute
-        except (AttributeError, AttrFetchError) as e:
+        except (AttributeError, KeyError, AttrFetchError) as e:
             msg = (
                 'unable to fetch metadata for attribute {}, '
                 'requested for item type {}'
@@ -245,6 +975,58 @@ class MutableAttrMap:
                 ).format(attr_id, item._type_id)
                 logger.info(msg)
                 raise BaseValueError(attr_id)
+        # Items which are equivalent to this item might have value calculated
+        # already
+        try:
+            value = calculator.get_equivalent_value(item, attr_id)
+        except KeyError:
+            pass
+        else:
+            return self.__cap_value(attr_id, attr, value)
+        plan = self.__get_plan(attr_id, attr, calculator)
+        if plan is None:
+            buckets = ()
+            dynamic_specs = calculator.get_affector_specs(item, attr_id)
+            # Remember that attribute has been calculated, to compose plan
+            # when it is recalculated. Attributes which nothing targets are
+            # not remembered, to keep them out of map memory entirely
+            if dynamic_specs:
+                if self.__plans is None:
+                    self.__plans = {}
+                self.__plans[attr_id] = None
+        else:
+            buckets = plan.buckets
+            dynamic_specs = plan.dynamic
+        get_modification = calculator.get_modification
+        # When structure of all modifications is known in advance, they are
+        # folded bucket by bucket in one pass
+        if not dynamic_specs:
+            if plan is not None and plan.dirty:
+                plan.refresh(item, get_modification)
+            value = self.__fold_buckets(
+                buckets, value, attr.high_is_good, get_modification)
+            return self.__finalize_value(attr_id, attr, value)
+        value = self.__fold_specs(
+            buckets, dynamic_specs, value, attr, get_modification)
+        return self.__finalize_value(attr_id, attr, value)
+
+    def __fold_specs(
+            self, buckets, dynamic_specs, value, attr, get_modification,
+            explained_mods=None):
+        """Apply modifications of plan buckets and dynamic specs to value.
+
+        Structure of modifications of dynamic specs is not known in advance,
+        and is fetched along with their values. All modifications are
+        gathered first, and then applied by operator.
+
+        Args:
+            explained_mods (optional): List which receives explanation data of
+                modifications. Values of specs in plan buckets carry no data,
+                thus modifications can be explained only when all specs are
+                passed as dynamic.
+        """
+        item = self.__item
+        explain = explained_mods is not None
         # Format: {operator: [values]}
         stack = {}
         # Format: {operator: [values]}
@@ -253,13 +1035,58 @@ class MutableAttrMap:
         aggregate_min = {}
         # Format: {(operator, aggregate key): [(value, penalize)]}
         aggregate_max = {}
-        # Now, go through all affectors affecting our item
-        for (
-            mod_operator, mod_value, resist_value,
-            mod_aggregate_mode, mod_aggregate_key, affector_item) in (
-                item._fit.solar_system._calculator.get_modifications(
-                    item, attr_id)
-        ):
+        # Structure of modifications is known in advance for most affector
+        # specs, here we just fetch their values. Resistance attribute actually
+        # defines resonance, where 1 means 0% resistance and 0 means 100%
+        # resistance
+        for bucket in buckets:
+            mod_operator = bucket.operator
+            normalization_func = bucket.normalization_func
+            for container, affector_specs in (
+                (stack, bucket.stack),
+                (stack_penalized, bucket.stack_penalized)
+            ):
+                if not affector_specs:
+                    continue
+                mod_values = container.setdefault(mod_operator, [])
+                for affector_spec in affector_specs:
+                    try:
+                        _, mod_value, resist_value, _, _ = get_modification(
+                            item, affector_spec)
+                    except ModificationCalculationError:
+                        continue
+                    mod_values.append(
+                        normalization_func(mod_value) * resist_value)
+            for container, bucket_aggregates in (
+                (aggregate_min, bucket.aggregate_min),
+                (aggregate_max, bucket.aggregate_max)
+            ):
+                for mod_aggregate_key, affector_specs in (
+                    bucket_aggregates.items()
+                ):
+                    mod_values = container.setdefault(
+                        (mod_operator, mod_aggregate_key), [])
+                    for affector_spec, penalize in affector_specs.items():
+                        try:
+                            _, mod_value, resist_value, _, _ = (
+                                get_modification(item, affector_spec))
+                        except ModificationCalculationError:
+                            continue
+                        mod_values.append((
+                            normalization_func(mod_value) * resist_value,
+                            penalize))
+        # Modifications whose structure is not known in advance, as well as all
+        # modifications when there is no plan, are processed in full
+        for affector_spec in dynamic_specs:
+            try:
+                (
+                    mod_operator, mod_value, resist_value,
+                    mod_aggregate_mode, mod_aggregate_key
+                ) = get_modification(item, affector_spec)
+            # Do nothing here - errors should be logged in modification getter
+            # or even earlier
+            except ModificationCalculationError:
+                continue
             # Normalize operations to just three types: assignments, additions,
             # reduced multiplications
             try:
@@ -268,18 +1095,18 @@ class MutableAttrMap:
             except KeyError:
                 msg = (
                     'malformed modifier on item type {}: unknown operator {}'
-                ).format(affector_item._type_id, mod_operator)
+                ).format(affector_spec.item._type_id, mod_operator)
                 logger.warning(msg)
                 continue
-            # Resistance attribute actually defines resonance, where 1 means 0%
-            # resistance and 0 means 100% resistance
-            mod_value = normalization_func(mod_value) * resist_value
-            # Decide if modification should be stacking penalized or not
-            penalize = (
-                not attr.stackable and
-                affector_item._type.category_id not in
-                PENALTY_IMMUNE_CATEGORY_IDS and
-                mod_operator in PENALIZABLE_OPERATORS)
+            normalized_value = normalization_func(mod_value) * resist_value
+            penalize = is_penalized(attr.stackable, affector_spec, mod_operator)
+            if explain:
+                mod_value = self.__explain_value(
+                    explained_mods, affector_spec, mod_operator, mod_value,
+                    resist_value, normalized_value, mod_aggregate_mode,
+                    mod_aggregate_key)
+            else:
+                mod_value = normalized_value
             if mod_aggregate_mode == ModAggregateMode.stack:
                 if penalize:
                     stack_penalized.setdefault(mod_operator, []).append(
@@ -294,40 +1121,129 @@ class MutableAttrMap:
                 aggregate_max.setdefault(
                     (mod_operator, mod_aggregate_key), []).append(
                     (mod_value, penalize))
+            elif explain:
+                mod_value.mod_data['applied'] = False
         for container, aggregate_func, sort_func in (
-            (aggregate_min, min, lambda i: (i[0], i[1])),
-            (aggregate_max, max, lambda i: (i[0], not i[1]))
+            (aggregate_min, min, aggregate_min_key),
+            (aggregate_max, max, aggregate_max_key)
         ):
             for k, v in container.items():
+                if not v:
+                    continue
                 mod_operator = k[0]
-                mod_value, penalize = aggregate_func(v, key=sort_func)
+                mod_value, penalize = pick_aggregate_value(
+                    v, aggregate_func, sort_func, explain)
                 if penalize:
                     stack_penalized.setdefault(mod_operator, []).append(
                         mod_value)
                 else:
                     stack.setdefault(mod_operator, []).append(mod_value)
-        # When data gathering is complete, process penalized modifications. They
-        # are penalized on per-operator basis
-        for mod_operator, mod_values in stack_penalized.items():
-            penalized_value = self.__penalize_values(mod_values)
-            stack.setdefault(mod_operator, []).append(penalized_value)
-        # Calculate value of non-penalized modifications, according to operator
-        # order
-        for mod_operator in sorted(stack):
-            mod_values = stack[mod_operator]
-            # Pick best modification for assignments, based on high_is_good
-            # value
-            if mod_operator in ASSIGNMENT_OPERATORS:
-                if attr.high_is_good:
-                    value = max(mod_values)
+        # When data gathering is complete, apply modifications according to
+        # operator order. Penalized modifications are penalized on per-operator
+        # basis
+        for mod_operator in sorted(set(stack).union(stack_penalized)):
+            value = fold_operator_values(
+                value, mod_operator, stack.get(mod_operator, []),
+                stack_penalized.get(mod_operator), attr.high_is_good, explain)
+        return value
+
+    def __explain_value(
+            self, explained_mods, affector_spec, mod_operator, mod_value,
+            resist_value, normalized_value, mod_aggregate_mode,
+            mod_aggregate_key):
+        """Make value which carries explanation data of modification."""
+        mod_data = {
+            'affector_item': affector_spec.item,
+            'effect': affector_spec.effect,
+            'modifier': affector_spec.modifier,
+            'operator': mod_operator,
+            'raw_value': mod_value,
+            'resist_value': resist_value,
+            'normalized_value': normalized_value,
+            'aggregate_mode': mod_aggregate_mode,
+            'aggregate_key': mod_aggregate_key,
+            'penalty_position': None,
+            'applied': True}
+        explained_mods.append(mod_data)
+        explained_value = ExplainedValue(normalized_value)
+        explained_value.mod_data = mod_data
+        return explained_value
+
+    def __fold_buckets(self, buckets, value, high_is_good, get_modification):
+        """Apply modifications of affector specs from plan buckets to value.
+
+        Values are gathered and applied in the same order as in full
+        calculation process, so that results are exactly the same. Buckets of
+        incremental plans provide values of stacked modifications kept from
+        previous recalculations instead.
+        """
+        item = self.__item
+        for bucket in buckets:
+            normalization_func = bucket.normalization_func
+            running = bucket.running
+            penalized_values = []
+            if running is not None:
+                mod_values = list(running.stack_values.values())
+            else:
+                mod_values = []
+                for container, affector_specs in (
+                    (mod_values, bucket.stack),
+                    (penalized_values, bucket.stack_penalized)
+                ):
+                    for affector_spec in affector_specs:
+                        try:
+                            _, mod_value, resist_value, _, _ = (
+                                get_modification(item, affector_spec))
+                        except ModificationCalculationError:
+                            continue
+                        container.append(
+                            normalization_func(mod_value) * resist_value)
+            for bucket_aggregates, aggregate_func, sort_func in (
+                (bucket.aggregate_min, min, aggregate_min_key),
+                (bucket.aggregate_max, max, aggregate_max_key)
+            ):
+                for affector_specs in bucket_aggregates.values():
+                    aggregate_values = []
+                    for affector_spec, penalize in affector_specs.items():
+                        try:
+                            _, mod_value, resist_value, _, _ = (
+                                get_modification(item, affector_spec))
+                        except ModificationCalculationError:
+                            continue
+                        aggregate_values.append((
+                            normalization_func(mod_value) * resist_value,
+                            penalize))
+                    if not aggregate_values:
+                        continue
+                    mod_value, penalize = pick_aggregate_value(
+                        aggregate_values, aggregate_func, sort_func)
+                    if penalize:
+                        penalized_values.append(mod_value)
+                    else:
+                        mod_values.append(mod_value)
+            if running is not None and running.penalized_values:
+                # Aggregated penalized values are not part of running chains,
+                # thus whole chain has to be composed anew
+                if penalized_values:
+                    penalized_values.extend(running.penalized_values.values())
                 else:
-                    value = min(mod_values)
-            elif mod_operator in ADDITION_OPERATORS:
-                for mod_value in mod_values:
-                    value += mod_value
-            elif mod_operator in MULTIPLICATION_OPERATORS:
-                for mod_value in mod_values:
-                    value *= 1 + mod_value
+                    mod_values.append(running.get_penalized_value())
+            value = fold_operator_values(
+                value, bucket.operator, mod_values, penalized_values,
+                high_is_good)
+        return value
+
+    def __finalize_value(self, attr_id, attr, value):
+        """Cap and round calculated value when needed."""
+        value = self.__cap_value(attr_id, attr, value)
+        # Some of attributes are rounded for whatever reason, deal with it after
+        # all the calculations
+        if attr_id in LIMITED_PRECISION_ATTR_IDS:
+            value = round(value, 2)
+        return value
+
+    def __cap_value(self, attr_id, attr, value):
+        """Restrict value by attribute cap, if attribute has any."""
         # If attribute has upper cap, do not let its value to grow above it
         if attr.max_attr_id is not None:
             try:
@@ -340,49 +1256,79 @@ class MutableAttrMap:
                 # Let map know that capping attribute restricts current
                 # attribute
                 self._cap_set(attr.max_attr_id, attr_id)
-        # Some of attributes are rounded for whatever reason, deal with it after
-        # all the calculations
-        if attr_id in LIMITED_PRECISION_ATTR_IDS:
-            value = round(value, 2)
         return value
 
-    def __penalize_values(self, mod_values):
-        """Calculate aggregated reduced multiplier.
+    def __get_plan(self, attr_id, attr, calculator):
+        """Get modification plan for attribute, composing it if needed.
 
-        Assuming all multipliers received should be stacking penalized, and that
-        they are normalized to reduced multiplier form, calculate final
-        reduced multiplier.
+        Plan pays off only when attribute is recalculated, thus on the first
+        calculation None is returned and it is just remembered that attribute
+        has been calculated.
+        """
+        plans = self.__plans
+        if plans is None:
+            return None
+        try:
+            plan = plans[attr_id]
+        except KeyError:
+            return None
+        if plan is not None:
+            return plan
+        affector_specs = calculator.get_affector_specs(self.__item, attr_id)
+        if affector_specs:
+            plan = ModificationPlan(
+                attr.stackable,
+                incremental=attr_id in self.__item.incremental_attr_ids)
+            for affector_spec in affector_specs:
+                plan.add_affector_spec(affector_spec)
+        else:
+            plan = EMPTY_PLAN
+        plans[attr_id] = plan
+        return plan
 
-        Args:
-            mod_values: Iterable with reduced multipliers.
+    def _affector_spec_added(self, affector_spec):
+        """Update modification plan with spec which started affecting item.
 
-        Returns:
-            Final aggregated reduced multiplier.
+        Calculated value is not removed by this method.
         """
-        # Gather positive multipliers into one chain, negative into another
-        chain_positive = []
-        chain_negative = []
-        for mod_value in mod_values:
-            if mod_value >= 0:
-                chain_positive.append(mod_value)
-            else:
-                chain_negative.append(mod_value)
-        # Strongest modifications always go first
-        chain_positive.sort(reverse=True)
-        chain_negative.sort()
-        # Base final multiplier on 1
-        value = 1
-        for penalization_chain in (chain_positive, chain_negative):
-            # Same for intermediate per-chain value
-            chain_value = 1
-            for pos, mod_value in enumerate(penalization_chain):
-                # Ignore 12th modification and further as non-significant
-                if pos > 10:
-                    break
-                # Apply stacking penalty based on modification position
-                chain_value *= 1 + mod_value * PENALTY_BASE ** (pos ** 2)
-            value *= chain_value
-        return value - 1
+        plans = self.__plans
+        if plans is None:
+            return
+        attr_id = affector_spec.modifier.affectee_attr_id
+        plan = plans.get(attr_id)
+        if plan is None:
+            return
+        # Shared plan is never modified, just make sure proper plan will be
+        # composed on the next calculation
+        if plan is EMPTY_PLAN:
+            del plans[attr_id]
+            return
+        plan.add_affector_spec(affector_spec)
+
+    def _affector_spec_removed(self, affector_spec):
+        """Update modification plan with spec which stopped affecting item.
+
+        Calculated value is not removed by this method.
+        """
+        plans = self.__plans
+        if plans is None:
+            return
+        plan = plans.get(affector_spec.modifier.affectee_attr_id)
+        if plan is None or plan is EMPTY_PLAN:
+            return
+        plan.remove_affector_spec(affector_spec)
+
+    def _affector_spec_changed(self, affector_spec):
+        """Let modification plan know that value of spec may have changed.
+
+        Calculated value is not removed by this method.
+        """
+        plans = self.__plans
+        if plans is None:
+            return
+        plan = plans.get(affector_spec.modifier.affectee_attr_id)
+        if plan is not None:
+            plan.mark_changed(affector_spec)
 
     # Override-related methods
     @property
@@ -423,16 +1369,21 @@ class MutableAttrMap:
     def _get_without_overrides(self, attr_id, default=None):
         """Get attribute value without using overrides."""
         # Partially borrowed from get() method
+        slots = self.__slots
+        if slots is not None:
+            slot = slots.get(attr_id)
+            if slot is not None:
+                state = self.__states[slot]
+                if state == SLOT_MODIFIED:
+                    self.__cache_hits += 1
+                    return self.__values[slot]
+                if state == SLOT_BASE:
+                    self.__cache_hits += 1
+                    return self.__base_values[attr_id]
         try:
-            value = self.__modified_attrs[attr_id]
-        except KeyError:
-            try:
-                value = self.__calculate(attr_id)
-            except CALCULATE_RAISABLE_EXCEPTIONS:
-                return default
-            else:
-                self.__modified_attrs[attr_id] = value
-        return value
+            return self.__get_unslotted(attr_id)
+        except CALCULATE_RAISABLE_EXCEPTIONS:
+            return default
 
     # Cap-related methods
     @property
@@ -456,6 +1407,14 @@ class MutableAttrMap:
             self.__cap_map = None
 
     # Auxiliary methods
+    def __journal_values(self):
+        """Let transactions of item's fit save values before they change."""
+        item = self.__item
+        fit = item._fit
+        if fit is not None:
+            for transaction in fit._transactions:
+                transaction._journal_values(item)
+
     def __publish(self, msg):
         try:
             publish_func = self.__item._fit._publish
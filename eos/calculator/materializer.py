@@ -0,0 +1,93 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.cache_handler import AttrFetchError
+
+
+def materialize_attrs(items, attr_ids=None):
+    """Calculate values of many attributes of many items at once.
+
+    On every item, caps are calculated before attributes they cap. Affector
+    attributes are calculated before attributes they modify as part of
+    calculation of the latter, and are taken from storage afterwards.
+
+    Args:
+        items: Iterable with items.
+        attr_ids (optional): Iterable with IDs of attributes to calculate. When
+            not specified, all attributes of items are calculated.
+
+    Returns:
+        Dictionary in {item: values} format, items go in order they were
+        passed. When attribute IDs are not specified, values are dictionaries
+        in {attribute ID: value} format, with attributes which cannot be
+        calculated omitted. When they are specified, values are tuples
+        aligned with attribute IDs, with None for attributes which cannot be
+        calculated.
+    """
+    if attr_ids is not None:
+        attr_ids = tuple(attr_ids)
+    results = {}
+    for item in items:
+        item_attr_ids = tuple(item.attrs) if attr_ids is None else attr_ids
+        values = _calculate_item_attrs(item, item_attr_ids)
+        if attr_ids is None:
+            results[item] = {
+                a: values[a] for a in item_attr_ids if values[a] is not None}
+        else:
+            results[item] = tuple(values[a] for a in item_attr_ids)
+    return results
+
+
+def _calculate_item_attrs(item, attr_ids):
+    """Calculate attributes of an item, caps first.
+
+    Returns:
+        Dictionary in {attribute ID: value} format, with None as value of
+        attributes which cannot be calculated.
+    """
+    try:
+        attr_metadata = item._fit.solar_system._calculator.attr_metadata
+    except AttributeError:
+        attr_metadata = {}
+    get = item.attrs.get
+    # Format: {attribute ID: value}
+    values = {}
+    for attr_id in attr_ids:
+        if attr_id in values:
+            continue
+        try:
+            cap_attr_id = attr_metadata[attr_id].max_attr_id
+        except (KeyError, AttrFetchError):
+            cap_attr_id = None
+        # Chain of attributes which cap each other, the last one caps all the
+        # others
+        chain = [attr_id]
+        while cap_attr_id is not None and cap_attr_id not in values:
+            if cap_attr_id in chain:
+                break
+            chain.append(cap_attr_id)
+            try:
+                cap_attr_id = attr_metadata[cap_attr_id].max_attr_id
+            except (KeyError, AttrFetchError):
+                cap_attr_id = None
+        for chain_attr_id in reversed(chain):
+            values[chain_attr_id] = get(chain_attr_id)
+    return values
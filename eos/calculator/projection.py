@@ -19,6 +19,7 @@
 # ==============================================================================
 
 
+from eos.eve_obj.effect.warfare_buff.base import WarfareBuffEffect
 from eos.util.keyed_storage import KeyedStorage
 
 
@@ -33,9 +34,16 @@ class ProjectionRegister:
         # Format: {carrier item: {projectors}}
         self.__carrier_projectors = KeyedStorage()
 
-        # Projectors whose carrying solar system item is not present
-        # Format: {projectors}
-        self.__carrierless_projectors = set()
+        # Projectors whose carrying solar system item is not present. Items
+        # which carry themselves, like drones, stop their effects before they
+        # are unloaded, thus missing carrier is ship of projector's fit, and
+        # projectors are keyed by the fit
+        # Format: {fit: {projectors}}
+        self.__carrierless_projectors = KeyedStorage()
+
+        # Fits carrierless projectors were stored under
+        # Format: {projector: fit}
+        self.__carrierless_projector_fits = {}
 
         # Solar system items affected by projector
         # Format: {projector: {target items}}
@@ -45,6 +53,15 @@ class ProjectionRegister:
         # Format: {target item: {projectors}}
         self.__tgt_projectors = KeyedStorage()
 
+        # Warfare buff projectors, keyed by fit they belong to. Fleet's buffs
+        # are found via fits of the fleet
+        # Format: {fit: {projectors}}
+        self.__fit_warfare_projectors = KeyedStorage()
+
+        # Fits warfare buff projectors were registered with
+        # Format: {projector: fit}
+        self.__warfare_projector_fits = {}
+
     # Query methods
     def get_projector_tgts(self, projector):
         """Get solar system items which are under effect of passed projector."""
@@ -62,22 +79,41 @@ class ProjectionRegister:
         """Get all known projectors."""
         return self.__projectors
 
+    def get_fit_warfare_projectors(self, fit):
+        """Get warfare buff projectors which belong to passed fit."""
+        return self.__fit_warfare_projectors.get(fit, ())
+
     # Maintenance methods
     def register_projector(self, projector):
         self.__projectors.add(projector)
+        if isinstance(projector.effect, WarfareBuffEffect):
+            fit = projector.item._fit
+            self.__warfare_projector_fits[projector] = fit
+            self.__fit_warfare_projectors.add_data_entry(fit, projector)
         carrier_item = projector.item._solsys_carrier
         if carrier_item is not None:
             self.__carrier_projectors.add_data_entry(carrier_item, projector)
         else:
-            self.__carrierless_projectors.add(projector)
+            self.__add_carrierless(projector.item._fit, (projector,))
 
     def unregister_projector(self, projector):
         self.__projectors.discard(projector)
+        # Fit is taken from the map, as item might be already detached from
+        # fit when projector is unregistered
+        fit = self.__warfare_projector_fits.pop(projector, None)
+        if fit is not None:
+            self.__fit_warfare_projectors.rm_data_entry(fit, projector)
         carrier_item = projector.item._solsys_carrier
         if carrier_item is not None:
             self.__carrier_projectors.rm_data_entry(carrier_item, projector)
+        # Projector might've lost its carrier after registration, e.g. when
+        # fit is removed from solar system, ship is unloaded before modules
+        try:
+            fit = self.__carrierless_projector_fits.pop(projector)
+        except KeyError:
+            pass
         else:
-            self.__carrierless_projectors.discard(projector)
+            self.__carrierless_projectors.rm_data_entry(fit, projector)
 
     def apply_projector(self, projector, tgt_items):
         self.__projector_tgts.add_data_set(projector, tgt_items)
@@ -90,16 +126,26 @@ class ProjectionRegister:
             self.__tgt_projectors.rm_data_entry(tgt_item, projector)
 
     def register_solsys_item(self, solsys_item):
+        fit = solsys_item._fit
         projectors = set()
-        for projector in self.__carrierless_projectors:
+        for projector in self.__carrierless_projectors.get(fit, ()):
             if projector.item._solsys_carrier is solsys_item:
                 projectors.add(projector)
         if projectors:
-            self.__carrierless_projectors.difference_update(projectors)
+            self.__carrierless_projectors.rm_data_set(fit, projectors)
+            for projector in projectors:
+                del self.__carrierless_projector_fits[projector]
             self.__carrier_projectors.add_data_set(solsys_item, projectors)
 
     def unregister_solsys_item(self, solsys_item):
         projectors = self.__carrier_projectors.get(solsys_item, ())
         if projectors:
-            self.__carrierless_projectors.update(projectors)
+            self.__add_carrierless(solsys_item._fit, projectors)
             self.__carrier_projectors.rm_data_set(solsys_item, projectors)
+
+    # Auxiliary methods
+    def __add_carrierless(self, fit, projectors):
+        # Key can be None, e.g. for projectors of charges without container
+        self.__carrierless_projectors.add_data_set(fit, projectors)
+        for projector in projectors:
+            self.__carrierless_projector_fits[projector] = fit
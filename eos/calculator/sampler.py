@@ -0,0 +1,80 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from collections import namedtuple
+from time import perf_counter
+
+
+CalculationStats = namedtuple(
+    'CalculationStats', ('count', 'time', 'own_time'))
+
+
+class CalculationSampler:
+    """Records how often attributes are calculated and how long it takes.
+
+    Sampler is enabled by assigning it to solar system, stats are collected
+    per item type and attribute pair. Time of attribute calculation includes
+    time spent calculating other attributes it relies on, while own time does
+    not.
+    """
+
+    def __init__(self):
+        # Format: {(item type ID, attribute ID): [count, time, own time]}
+        self.__stats = {}
+        # Time spent on nested calculations, per calculation in progress
+        # Format: [time]
+        self.__nested_times = []
+
+    def get_stats(self):
+        """Get collected stats.
+
+        Returns:
+            Dictionary in {(item type ID, attribute ID): stats} format, sorted
+            by own calculation time, most expensive first.
+        """
+        return {
+            k: CalculationStats(*v) for k, v in sorted(
+                self.__stats.items(), key=lambda i: i[1][2], reverse=True)}
+
+    def reset(self):
+        """Forget collected stats."""
+        self.__stats.clear()
+
+    def _sample(self, calc_func, item, attr_id, *args):
+        nested_times = self.__nested_times
+        nested_times.append(0)
+        started = perf_counter()
+        try:
+            return calc_func(attr_id, *args)
+        finally:
+            elapsed = perf_counter() - started
+            own_elapsed = elapsed - nested_times.pop()
+            if nested_times:
+                nested_times[-1] += elapsed
+            key = (item._type_id, attr_id)
+            try:
+                stats = self.__stats[key]
+            except KeyError:
+                self.__stats[key] = [1, elapsed, own_elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += own_elapsed
@@ -20,6 +20,7 @@
 
 
 from eos.cache_handler import BuffTemplatesFetchError
+from eos.const.eos import ModDomain
 from eos.const.eve import AttrId
 from eos.const.eve import EffectCategoryId
 from eos.eve_obj.effect.warfare_buff.base import WarfareBuffEffect
@@ -38,8 +39,11 @@ from eos.pubsub.message import FleetFitRemoved
 from eos.pubsub.message import ItemLoaded
 from eos.pubsub.message import ItemUnloaded
 from eos.pubsub.subscriber import BaseSubscriber
+from eos.source.source import get_source_data
 from eos.util.keyed_storage import KeyedStorage
 from .affection import AffectionRegister
+from .dependency import DependencyRegister
+from .equivalence import EquivalenceRegister
 from .misc import AffectorSpec
 from .misc import Projector
 from .projection import ProjectionRegister
@@ -51,6 +55,13 @@ WARFARE_BUFF_ATTRS = {
     AttrId.warfare_buff_3_id: AttrId.warfare_buff_3_value,
     AttrId.warfare_buff_4_id: AttrId.warfare_buff_4_value}
 
+# Names of counters of calculation events service keeps per fit
+FIT_STAT_NAMES = (
+    'attr_change_msgs',
+    'attr_change_msg_attrs',
+    'affector_specs_registered',
+    'python_revisions')
+
 
 class CalculationService(BaseSubscriber):
     """Service which supports attribute calculation.
@@ -62,89 +73,197 @@ class CalculationService(BaseSubscriber):
 
     def __init__(self, solar_system):
         self.__solar_system = solar_system
+        # Metadata of attributes of solar system's source, bound when source
+        # is set, to let attribute maps fetch it with single lookup
+        # Format: {attribute ID: attribute metadata}
+        self.attr_metadata = {}
         self.__affections = AffectionRegister()
         self.__projections = ProjectionRegister()
-        # Format: {projector: {modifiers}}
+        self.__dependencies = DependencyRegister()
+        self.__equivalences = EquivalenceRegister()
+        # Format: {projector: {affector specs}}
         self.__warfare_buffs = KeyedStorage()
+        # Buff IDs which were used to compose affector specs of running
+        # warfare buff projectors
+        # Format: {projector: ((buff ID attribute ID, buff ID), ...)}
+        self.__warfare_buff_ids = {}
         # Container with affector specs which will receive messages
         # Format: {message type: set(affector specs)}
         self.__subscribed_affectors = KeyedStorage()
-
-    def get_modifications(self, affectee_item, affectee_attr_id):
-        """Get modifications of affectee attribute on affectee item.
+        # Affector specs with python modifiers which declared attributes they
+        # depend on. Attribute owner is affector item for its own attributes,
+        # and (fit, domain) for attributes of fit's ship or character
+        # Format: {(attribute owner, attribute ID): {affector specs}}
+        self.__python_attr_dependents = KeyedStorage()
+        # Keys affector specs were stored under in the map above
+        # Format: {affector spec: ((attribute owner, attribute ID), ...)}
+        self.__python_attr_dep_keys = {}
+        # Memoized modifications of affector specs with dogma modifiers
+        # Format: {affector spec: (operator, value, aggregate mode,
+        # aggregate key)}
+        self.__modifications = {}
+        # Memoized resistance values of carrier items against affector specs
+        # Format: {carrier item: {affector spec: resistance value}}
+        self.__resists = {}
+        # How many attribute values were taken from equivalent items, and how
+        # many had to be calculated for items which had equivalent items
+        self.__shared_values = 0
+        self.__unshared_values = 0
+        # Counters of calculation events, per fit
+        # Format: {fit: {counter name: value}}
+        self.__fit_stats = {}
+
+    def get_affector_specs(self, affectee_item, affectee_attr_id):
+        """Get affector specs which influence attribute on affectee item.
 
         Args:
-            affectee_item: Item, for which we're getting modifications.
-            affectee_attr_id: Affectee attribute ID; only modifications which
+            affectee_item: Item, for which we're getting affector specs.
+            affectee_attr_id: Affectee attribute ID; only affector specs which
                 influence attribute with this ID will be returned.
 
         Returns:
-            Set with tuples in (modification operator, modification value,
-            resistance value, affector item) format.
+            Iterable with affector specs.
         """
-        # Use list because we can have multiple tuples with the same values
-        # as valid configuration
-        mods = []
-        for affector_spec in self.__affections.get_affector_specs(
-            affectee_item
-        ):
-            affector_modifier = affector_spec.modifier
-            affector_item = affector_spec.item
-            if affector_modifier.affectee_attr_id != affectee_attr_id:
-                continue
+        return self.__affections.get_affector_specs(
+            affectee_item, affectee_attr_id)
+
+    def get_modification(self, affectee_item, affector_spec):
+        """Get modification which affector spec applies to affectee item.
+
+        Args:
+            affectee_item: Item, for which we're getting modification.
+            affector_spec: Affector spec which influences affectee item.
+
+        Returns:
+            Tuple in (modification operator, modification value, resistance
+            value, aggregate mode, aggregate key) format.
+
+        Raises:
+            ModificationCalculationError: If modification cannot be calculated.
+        """
+        modifier = affector_spec.modifier
+        # Only modifications of dogma modifiers are memoized. Python modifiers
+        # may rely on anything, e.g. on attributes of items which get replaced,
+        # and messages they revise modifications on do not cover all of it
+        if isinstance(modifier, DogmaModifier):
             try:
-                mod_op, mod_value, mod_aggregate_mode, mod_aggregate_key = (
-                    affector_modifier.get_modification(affector_item))
-            # Do nothing here - errors should be logged in modification
-            # getter or even earlier
-            except ModificationCalculationError:
-                continue
-            # Get resistance value
-            resist_attr_id = affector_spec.effect.resist_attr_id
-            carrier_item = affectee_item._solsys_carrier
-            if resist_attr_id and carrier_item is not None:
+                modification = self.__modifications[affector_spec]
+            except KeyError:
+                # Errors are not memoized, modification will be requested
+                # again on the next calculation
+                modification = modifier.get_modification(affector_spec.item)
+                self.__modifications[affector_spec] = modification
+        else:
+            modification = modifier.get_modification(affector_spec.item)
+        mod_op, mod_value, mod_aggregate_mode, mod_aggregate_key = modification
+        # Get resistance value
+        resist_attr_id = affector_spec.effect.resist_attr_id
+        carrier_item = affectee_item._solsys_carrier
+        if resist_attr_id and carrier_item is not None:
+            carrier_resists = self.__resists.setdefault(carrier_item, {})
+            try:
+                resist_value = carrier_resists[affector_spec]
+            except KeyError:
                 try:
                     resist_value = carrier_item.attrs[resist_attr_id]
                 except KeyError:
                     resist_value = 1
-            else:
-                resist_value = 1
-            mods.append((
-                mod_op, mod_value, resist_value,
-                mod_aggregate_mode, mod_aggregate_key,
-                affector_item))
-        return mods
+                carrier_resists[affector_spec] = resist_value
+        else:
+            resist_value = 1
+        return (
+            mod_op, mod_value, resist_value,
+            mod_aggregate_mode, mod_aggregate_key)
+
+    def get_equivalent_value(self, affectee_item, affectee_attr_id):
+        """Get attribute value calculated for item equivalent to passed one.
+
+        Args:
+            affectee_item: Item, for which we're getting attribute value.
+            affectee_attr_id: ID of attribute to get value of.
+
+        Returns:
+            Attribute value.
+
+        Raises:
+            KeyError: If there are no equivalent items which are not targeted
+                individually and which have the value calculated.
+        """
+        if self.__is_targeted_individually(affectee_item):
+            raise KeyError(affectee_attr_id)
+        equivalent_items = self.__equivalences.get_equivalent_items(
+            affectee_item)
+        if len(equivalent_items) < 2:
+            raise KeyError(affectee_attr_id)
+        for equivalent_item in equivalent_items:
+            if equivalent_item is affectee_item:
+                continue
+            try:
+                value = equivalent_item.attrs._get_calculated(affectee_attr_id)
+            except KeyError:
+                continue
+            if self.__is_targeted_individually(equivalent_item):
+                continue
+            # Value of attribute is cached only when values of all attributes
+            # it depends on are cached as well, which is relied upon when
+            # dependent values are cleared. Affector specs which target domain
+            # of affectee item are shared with equivalent item, thus their
+            # inputs are cached already; affector specs which target item
+            # directly are specific to it, and their inputs are cached here
+            for affector_spec in self.__affections.get_item_affector_specs(
+                affectee_item, affectee_attr_id
+            ):
+                try:
+                    self.get_modification(affectee_item, affector_spec)
+                except ModificationCalculationError:
+                    pass
+            self.__shared_values += 1
+            return value
+        self.__unshared_values += 1
+        raise KeyError(affectee_attr_id)
+
+    @property
+    def equivalence_stats(self):
+        """Get stats on sharing of attribute values between equivalent items.
+
+        Returns:
+            Dictionary with quantity of attribute values which were taken from
+            equivalent items, and quantity of values which had to be
+            calculated despite item having equivalent items.
+        """
+        return {
+            'shared': self.__shared_values,
+            'unshared': self.__unshared_values}
+
+    def reset_equivalence_stats(self):
+        """Reset stats on sharing of attribute values."""
+        self.__shared_values = 0
+        self.__unshared_values = 0
+
+    def get_fit_stats(self, fit):
+        """Get counters of calculation events which happened on fit.
+
+        Returns:
+            Dictionary in {counter name: value} format.
+        """
+        return dict(self.__fit_stats[fit])
+
+    def reset_fit_stats(self, fit):
+        """Reset counters of calculation events which happened on fit."""
+        self.__fit_stats[fit] = dict.fromkeys(FIT_STAT_NAMES, 0)
 
     # Handle fits
     def _handle_fit_added(self, fit):
         fit._subscribe(self, self._handler_map.keys())
+        self.reset_fit_stats(fit)
 
     def _handle_fit_removed(self, fit):
         fit._unsubscribe(self, self._handler_map.keys())
+        del self.__fit_stats[fit]
 
     # Handle item changes which are significant for calculator
     def _handle_fleet_fit_added(self, msg):
-        fits_effect_applications = {}
-        for projector in self.__projections.get_projectors():
-            if not isinstance(projector.effect, WarfareBuffEffect):
-                continue
-            projector_fit = projector.item._fit
-            # Affect this fit by buffs existing in fleet
-            if (
-                msg.fit.ship is not None and
-                projector_fit.fleet is msg.fit.fleet
-            ):
-                fits_effect_applications.setdefault(
-                    projector_fit, []).append(
-                    (projector, [msg.fit.ship]))
-            # Affect other fits by buffs from this fit
-            if projector_fit is msg.fit:
-                for fit in msg.fit.fleet.fits:
-                    if fit is msg.fit:
-                        continue
-                    fits_effect_applications.setdefault(
-                        projector_fit, []).append(
-                        (projector, [fit.ship]))
+        fits_effect_applications = self.__get_fleet_buff_applications(msg.fit)
         # Apply warfare buffs
         if fits_effect_applications:
             for fit, effect_applications in fits_effect_applications.items():
@@ -155,27 +274,8 @@ class CalculationService(BaseSubscriber):
                 fit._publish_bulk(msgs)
 
     def _handle_fleet_fit_removed(self, msg):
-        fits_effect_unapplications = {}
-        for projector in self.__projections.get_projectors():
-            if not isinstance(projector.effect, WarfareBuffEffect):
-                continue
-            projector_fit = projector.item._fit
-            # Unaffect this fit by buffs existing in fleet
-            if (
-                msg.fit.ship is not None and
-                projector_fit.fleet is msg.fit.fleet
-            ):
-                fits_effect_unapplications.setdefault(
-                    projector_fit, []).append(
-                    (projector, [msg.fit.ship]))
-            # Unaffect other fits by buffs from this fit
-            if projector_fit is msg.fit:
-                for fit in msg.fit.fleet.fits:
-                    if fit is msg.fit:
-                        continue
-                    fits_effect_unapplications.setdefault(
-                        projector_fit, []).append(
-                        (projector, [fit.ship]))
+        fits_effect_unapplications = self.__get_fleet_buff_applications(
+            msg.fit)
         # Unapply warfare buffs
         if fits_effect_unapplications:
             for fit, effect_unapplications in (
@@ -190,30 +290,38 @@ class CalculationService(BaseSubscriber):
     def _handle_item_loaded(self, msg):
         item = msg.item
         self.__affections.register_affectee_item(item)
+        self.__equivalences.forget_item(item)
         if isinstance(item, SolarSystemItemMixin):
             self.__projections.register_solsys_item(item)
 
     def _handle_item_unloaded(self, msg):
         item = msg.item
+        self.__resists.pop(item, None)
         self.__affections.unregister_affectee_item(item)
+        self.__equivalences.forget_item(item)
         if isinstance(item, SolarSystemItemMixin):
             self.__projections.unregister_solsys_item(item)
 
     def _handle_effects_started(self, msg):
         item = msg.item
         effect_ids = msg.effect_ids
+        self.__equivalences.register_effects(item, effect_ids)
         attr_changes = {}
-        for affector_spec in self.__generate_local_affector_specs(
-            item, effect_ids
-        ):
+        affector_specs = self.__generate_local_affector_specs(item, effect_ids)
+        self.__fit_stats[msg.fit]['affector_specs_registered'] += len(
+            affector_specs)
+        for affector_spec in affector_specs:
             # Register the affector spec
             if isinstance(affector_spec.modifier, BasePythonModifier):
                 self.__subscribe_python_affector_spec(msg.fit, affector_spec)
+            elif isinstance(affector_spec.modifier, DogmaModifier):
+                self.__dependencies.register_local_affector_spec(affector_spec)
             self.__affections.register_local_affector_spec(affector_spec)
             # Clear values of attributes dependent on the affector spec
             for affectee_item in self.__affections.get_local_affectee_items(
                 affector_spec
             ):
+                affectee_item.attrs._affector_spec_added(affector_spec)
                 attr_id = affector_spec.modifier.affectee_attr_id
                 if affectee_item.attrs._force_recalc(attr_id):
                     attr_ids = attr_changes.setdefault(affectee_item, set())
@@ -223,42 +331,21 @@ class CalculationService(BaseSubscriber):
             self.__projections.register_projector(projector)
         # Register warfare buffs
         effect_applications = []
-        item_fleet = msg.fit.fleet
         for effect_id in effect_ids:
             effect = item._type_effects[effect_id]
             if not isinstance(effect, WarfareBuffEffect):
                 continue
             projector = Projector(item, effect)
-            for buff_id_attr_id in WARFARE_BUFF_ATTRS:
-                try:
-                    buff_id = item.attrs[buff_id_attr_id]
-                except KeyError:
-                    continue
-                getter = (
-                    self.__solar_system.source.cache_handler.get_buff_templates)
-                try:
-                    buff_templates = getter(buff_id)
-                except BuffTemplatesFetchError:
-                    continue
-                affector_attr_id = WARFARE_BUFF_ATTRS[buff_id_attr_id]
-                if not buff_templates:
-                    continue
-                for buff_template in buff_templates:
-                    modifier = DogmaModifier._make_from_buff_template(
-                        buff_template, affector_attr_id)
-                    affector_spec = AffectorSpec(item, effect, modifier)
-                    self.__warfare_buffs.add_data_entry(
-                        projector, affector_spec)
-                tgt_ships = []
-                for tgt_fit in self.__solar_system.fits:
-                    if (
-                        tgt_fit is msg.fit or
-                        (item_fleet is not None and tgt_fit.fleet is item_fleet)
-                    ):
-                        tgt_ship = tgt_fit.ship
-                        if tgt_ship is not None:
-                            tgt_ships.append(tgt_ship)
-                effect_applications.append((projector, tgt_ships))
+            buff_ids, affector_specs = self.__make_warfare_buff_specs(
+                projector)
+            self.__warfare_buff_ids[projector] = buff_ids
+            if not affector_specs:
+                continue
+            self.__warfare_buffs.add_data_set(projector, affector_specs)
+            effect_applications.append(
+                (projector, self.__get_warfare_buff_tgts(item)))
+        self.__register_projected_affector_specs(
+            self.__generate_projected_affectors(item, effect_ids))
         if attr_changes:
             self.__publish_attr_changes(attr_changes)
         # Apply warfare buffs
@@ -270,12 +357,16 @@ class CalculationService(BaseSubscriber):
             msg.fit._publish_bulk(msgs)
 
     def _handle_effects_stopped(self, msg):
+        projected_affector_specs = self.__generate_projected_affectors(
+            msg.item, msg.effect_ids)
         # Get info on warfare buffs
         effect_unapplications = []
         for projector in self.__generate_projectors(msg.item, msg.effect_ids):
+            self.__warfare_buff_ids.pop(projector, None)
             if projector not in self.__warfare_buffs:
                 continue
-            tgt_ships = self.__projections.get_projector_tgts(projector)
+            # Copy targets, as unapplication modifies the set we receive
+            tgt_ships = set(self.__projections.get_projector_tgts(projector))
             effect_unapplications.append((projector, tgt_ships))
         # Unapply and unregister warfare buffs
         if effect_unapplications:
@@ -286,6 +377,7 @@ class CalculationService(BaseSubscriber):
             msg.fit._publish_bulk(msgs)
             for projector, _ in effect_unapplications:
                 del self.__warfare_buffs[projector]
+        self.__unregister_projected_affector_specs(projected_affector_specs)
         attr_changes = {}
         # Remove values of affectee attributes
         for affector_spec in self.__generate_local_affector_specs(
@@ -295,25 +387,33 @@ class CalculationService(BaseSubscriber):
             for affectee_item in self.__affections.get_local_affectee_items(
                 affector_spec
             ):
+                affectee_item.attrs._affector_spec_removed(affector_spec)
                 attr_id = affector_spec.modifier.affectee_attr_id
                 if affectee_item.attrs._force_recalc(attr_id):
                     attr_ids = attr_changes.setdefault(affectee_item, set())
                     attr_ids.add(attr_id)
             # Unregister the affector spec
             self.__affections.unregister_local_affector_spec(affector_spec)
+            self.__forget_modification(affector_spec)
             if isinstance(affector_spec.modifier, BasePythonModifier):
                 self.__unsubscribe_python_affector_spec(msg.fit, affector_spec)
+            elif isinstance(affector_spec.modifier, DogmaModifier):
+                self.__dependencies.unregister_local_affector_spec(
+                    affector_spec)
         # Unregister projectors
         for projector in self.__generate_projectors(msg.item, msg.effect_ids):
             self.__projections.unregister_projector(projector)
+        self.__equivalences.unregister_effects(msg.item, msg.effect_ids)
         if attr_changes:
             self.__publish_attr_changes(attr_changes)
 
     def _handle_effect_applied(self, msg):
         attr_changes = {}
-        for affector_spec in self.__generate_projected_affectors(
-            msg.item, (msg.effect_id,)
-        ):
+        affector_specs = self.__generate_projected_affectors(
+            msg.item, (msg.effect_id,))
+        self.__fit_stats[msg.fit]['affector_specs_registered'] += len(
+            affector_specs)
+        for affector_spec in affector_specs:
             # Register the affector spec
             self.__affections.register_projected_affector_spec(
                 affector_spec, msg.tgt_items)
@@ -321,6 +421,7 @@ class CalculationService(BaseSubscriber):
             for affectee_item in self.__affections.get_projected_affectee_items(
                 affector_spec, msg.tgt_items
             ):
+                affectee_item.attrs._affector_spec_added(affector_spec)
                 attr_id = affector_spec.modifier.affectee_attr_id
                 if affectee_item.attrs._force_recalc(attr_id):
                     attr_ids = attr_changes.setdefault(affectee_item, set())
@@ -328,6 +429,7 @@ class CalculationService(BaseSubscriber):
         # Apply projector
         for projector in self.__generate_projectors(msg.item, (msg.effect_id,)):
             self.__projections.apply_projector(projector, msg.tgt_items)
+            self.__dependencies.apply_projector(projector, msg.tgt_items)
         if attr_changes:
             self.__publish_attr_changes(attr_changes)
 
@@ -340,6 +442,7 @@ class CalculationService(BaseSubscriber):
             for affectee_item in self.__affections.get_projected_affectee_items(
                 affector_spec, msg.tgt_items
             ):
+                affectee_item.attrs._affector_spec_removed(affector_spec)
                 attr_id = affector_spec.modifier.affectee_attr_id
                 if affectee_item.attrs._force_recalc(attr_id):
                     attr_ids = attr_changes.setdefault(affectee_item, set())
@@ -347,9 +450,12 @@ class CalculationService(BaseSubscriber):
             # Unregister the affector spec
             self.__affections.unregister_projected_affector(
                 affector_spec, msg.tgt_items)
+            for tgt_item in msg.tgt_items:
+                self.__forget_resist(tgt_item, affector_spec)
         # Un-apply projector
         for projector in self.__generate_projectors(msg.item, (msg.effect_id,)):
             self.__projections.unapply_projector(projector, msg.tgt_items)
+            self.__dependencies.unapply_projector(projector, msg.tgt_items)
         if attr_changes:
             self.__publish_attr_changes(attr_changes)
 
@@ -362,151 +468,65 @@ class CalculationService(BaseSubscriber):
         attribute map and via affector specs with dogma modifiers. Affector
         specs with python modifiers are processed separately.
         """
-        affections = self.__affections
-        projections = self.__projections
-        effect_unapplications = []
-        # Unapply warfare buffs
+        fit_stats = self.__fit_stats[msg.fit]
+        fit_stats['attr_change_msgs'] += 1
+        fit_stats['attr_change_msg_attrs'] += sum(
+            len(attr_ids) for attr_ids in msg.attr_changes.values())
+        # Warfare buffs are re-applied only when IDs of buffs they apply
+        # change. Changes of buff values are processed like changes of any
+        # other affector attribute
+        reapplications = []
         for item, attr_ids in msg.attr_changes.items():
+            if attr_ids.isdisjoint(WARFARE_BUFF_ATTRS):
+                continue
             for effect in item._type_effects.values():
                 projector = Projector(item, effect)
-                if projector not in self.__warfare_buffs:
+                old_buff_ids = self.__warfare_buff_ids.get(projector)
+                if old_buff_ids is None:
                     continue
-                if not attr_ids.intersection(WARFARE_BUFF_ATTRS):
+                buff_ids, affector_specs = self.__make_warfare_buff_specs(
+                    projector)
+                if buff_ids == old_buff_ids:
                     continue
-                tgt_items = self.__projections.get_projector_tgts(projector)
-                effect_unapplications.append((projector, tgt_items))
-        msgs = []
-        for projector, tgt_items in effect_unapplications:
-            msgs.append(EffectUnapplied(
-                projector.item, projector.effect.id, tgt_items))
-        msg.fit._publish_bulk(msgs)
-        attr_changes = {}
-        for item, attr_ids in msg.attr_changes.items():
-            # Remove values of affectee attributes capped by the changing
-            # attribute
-            for attr_id in attr_ids:
-                for capped_attr_id in item.attrs._cap_map.get(attr_id, ()):
-                    if item.attrs._force_recalc(capped_attr_id):
-                        attr_changes.setdefault(item, set()).add(capped_attr_id)
-            # Force attribute recalculation when local affector spec
-            # modification changes
-            for affector_spec in self.__generate_local_affector_specs(
-                item, item._running_effect_ids
-            ):
-                affector_modifier = affector_spec.modifier
-                # Only dogma modifiers have source attribute specified, python
-                # modifiers are processed separately
-                if (
-                    not isinstance(affector_modifier, DogmaModifier) or
-                    affector_modifier.affector_attr_id not in attr_ids
-                ):
-                    continue
-                # Remove values
-                for affectee_item in affections.get_local_affectee_items(
-                    affector_spec
-                ):
-                    attr_id = affector_modifier.affectee_attr_id
-                    if affectee_item.attrs._force_recalc(attr_id):
-                        attr_changes.setdefault(affectee_item, set()).add(
-                            attr_id)
-            # Force attribute recalculation when projected affector spec
-            # modification changes
-            for projector in self.__generate_projectors(
-                item, item._running_effect_ids
-            ):
-                tgt_items = projections.get_projector_tgts(projector)
-                # When projector doesn't target any items, then we do not need
-                # to clean anything
-                if not tgt_items:
-                    continue
-                for affector_spec in self.__generate_projected_affectors(
-                    item, (projector.effect.id,)
-                ):
-                    affector_modifier = affector_spec.modifier
-                    # Only dogma modifiers have source attribute specified,
-                    # python modifiers are processed separately
-                    if (
-                        not isinstance(affector_modifier, DogmaModifier) or
-                        affector_modifier.affector_attr_id not in attr_ids
-                    ):
-                        continue
-                    for affectee_item in (
-                        affections.get_projected_affectee_items(
-                            affector_spec, tgt_items)
-                    ):
-                        attr_id = affector_modifier.affectee_attr_id
-                        if affectee_item.attrs._force_recalc(attr_id):
-                            attr_changes.setdefault(affectee_item, set()).add(
-                                attr_id)
-            # Force attribute recalculation if changed attribute defines
-            # resistance to some effect
-            for projector in projections.get_tgt_projectors(item):
-                effect = projector.effect
-                if effect.resist_attr_id not in attr_ids:
-                    continue
-                tgt_items = projections.get_projector_tgts(projector)
-                for affector_spec in self.__generate_projected_affectors(
-                    projector.item, (effect.id,)
-                ):
-                    for affectee_item in (
-                        affections.get_projected_affectee_items(
-                            affector_spec, tgt_items)
-                    ):
-                        attr_id = affector_spec.modifier.affectee_attr_id
-                        if affectee_item.attrs._force_recalc(attr_id):
-                            attr_changes.setdefault(affectee_item, set()).add(
-                                attr_id)
+                reapplications.append((projector, buff_ids, affector_specs))
+        # Unapply warfare buffs
+        effect_unapplications = []
+        for projector, _, _ in reapplications:
+            if projector not in self.__warfare_buffs:
+                continue
+            tgt_items = set(self.__projections.get_projector_tgts(projector))
+            effect_unapplications.append((projector, tgt_items))
+        if effect_unapplications:
+            msgs = []
+            for projector, tgt_items in effect_unapplications:
+                msgs.append(EffectUnapplied(
+                    projector.item, projector.effect.id, tgt_items))
+            msg.fit._publish_bulk(msgs)
+        # Messages published by the service itself, as well as messages merged
+        # only out of them, already contain all dependents of changed
+        # attributes
+        if msg.revised:
+            attr_changes = {}
+        else:
+            attr_changes = self.__invalidate_attr_dependents(msg.attr_changes)
         # Unregister warfare buffs only after composing list of attributes we
         # should update
-        for projector, tgt_items in effect_unapplications:
+        for projector, _ in effect_unapplications:
+            self.__unregister_projected_affector_specs(
+                self.__warfare_buffs[projector])
             del self.__warfare_buffs[projector]
         if attr_changes:
-            self.__publish_attr_changes(attr_changes)
+            self.__publish_attr_changes(attr_changes, revised=True)
         # Register warfare buffs
         effect_applications = []
-        for item, attr_ids in msg.attr_changes.items():
-            if not attr_ids.intersection(WARFARE_BUFF_ATTRS):
+        for projector, buff_ids, affector_specs in reapplications:
+            self.__warfare_buff_ids[projector] = buff_ids
+            if not affector_specs:
                 continue
-            item_fleet = item._fit.fleet
-            for effect_id in item._running_effect_ids:
-                effect = item._type_effects[effect_id]
-                if not isinstance(effect, WarfareBuffEffect):
-                    continue
-                projector = Projector(item, effect)
-                for buff_id_attr_id in WARFARE_BUFF_ATTRS:
-                    try:
-                        buff_id = item.attrs[buff_id_attr_id]
-                    except KeyError:
-                        continue
-                    getter = (
-                        self.__solar_system.source.
-                        cache_handler.get_buff_templates)
-                    try:
-                        buff_templates = getter(buff_id)
-                    except BuffTemplatesFetchError:
-                        continue
-                    affector_attr_id = WARFARE_BUFF_ATTRS[buff_id_attr_id]
-                    if not buff_templates:
-                        continue
-                    for buff_template in buff_templates:
-                        modifier = DogmaModifier._make_from_buff_template(
-                            buff_template, affector_attr_id)
-                        affector_spec = AffectorSpec(item, effect, modifier)
-                        self.__warfare_buffs.add_data_entry(
-                            projector, affector_spec)
-                    tgt_ships = []
-                    for tgt_fit in self.__solar_system.fits:
-                        if (
-                            tgt_fit is msg.fit or (
-                                item_fleet is not None and
-                                tgt_fit.fleet is item_fleet)
-                        ):
-                            tgt_ship = tgt_fit.ship
-                            if tgt_ship is not None:
-                                tgt_ships.append(tgt_ship)
-                    effect_applications.append((projector, tgt_ships))
-        if attr_changes:
-            self.__publish_attr_changes(attr_changes)
+            self.__warfare_buffs.add_data_set(projector, affector_specs)
+            self.__register_projected_affector_specs(affector_specs)
+            effect_applications.append(
+                (projector, self.__get_warfare_buff_tgts(projector.item)))
         # Apply warfare buffs
         if effect_applications:
             msgs = []
@@ -523,22 +543,31 @@ class CalculationService(BaseSubscriber):
         should be removed, we remove values which depend on such modifiers.
         """
         attr_changes = {}
-        # If there's no subscribed affector specs for received message type, do
-        # nothing
         msg_type = type(msg)
-        if msg_type not in self.__subscribed_affectors:
+        affector_specs = self.__subscribed_affectors.get(msg_type, ())
+        # Attribute changes are delivered to modifiers which declared their
+        # dependencies only when changes touch these dependencies
+        if msg_type is AttrsValueChanged and self.__python_attr_dependents:
+            affector_specs = self.__get_python_attr_dependents(
+                msg.attr_changes).union(affector_specs)
+        # If there's no affector specs interested in received message, do
+        # nothing
+        if not affector_specs:
             return
         # Otherwise, ask modifier if value of attribute it calculates may
         # change, and force recalculation if answer is yes
-        for affector_spec in self.__subscribed_affectors[msg_type]:
+        for affector_spec in affector_specs:
             if not affector_spec.modifier.revise_modification(
                 msg, affector_spec.item
             ):
                 continue
+            self.__fit_stats[msg.fit]['python_revisions'] += 1
             for affectee_item in self.__affections.get_local_affectee_items(
                 affector_spec
             ):
                 attr_id = affector_spec.modifier.affectee_attr_id
+                if attr_id in affectee_item.incremental_attr_ids:
+                    affectee_item.attrs._affector_spec_changed(affector_spec)
                 if affectee_item.attrs._force_recalc(attr_id):
                     attr_ids = attr_changes.setdefault(affectee_item, set())
                     attr_ids.add(attr_id)
@@ -557,11 +586,12 @@ class CalculationService(BaseSubscriber):
         EffectUnapplied: _handle_effect_unapplied,
         AttrsValueChanged: _revise_regular_attr_dependents}
 
-    def _notify(self, msg):
-        BaseSubscriber._notify(self, msg)
+    def _get_handlers(self, msg_type):
         # Relay all messages to python modifiers, as in case of python modifiers
         # any message may result in deleting dependent attributes
-        self._revise_python_attr_dependents(msg)
+        return (
+            BaseSubscriber._get_handlers(self, msg_type) +
+            (self._revise_python_attr_dependents,))
 
     # Affector-related methods
     def __generate_local_affector_specs(self, item, effect_ids):
@@ -591,8 +621,17 @@ class CalculationService(BaseSubscriber):
 
     def __subscribe_python_affector_spec(self, fit, affector_spec):
         """Subscribe affector spec with python modifier."""
+        msg_types = affector_spec.modifier.revise_msg_types
+        dep_keys = self.__get_python_attr_dep_keys(affector_spec)
+        if dep_keys is not None:
+            self.__python_attr_dep_keys[affector_spec] = dep_keys
+            for dep_key in dep_keys:
+                self.__python_attr_dependents.add_data_entry(
+                    dep_key, affector_spec)
+            msg_types = set(msg_types)
+            msg_types.discard(AttrsValueChanged)
         to_subscribe = set()
-        for msg_type in affector_spec.modifier.revise_msg_types:
+        for msg_type in msg_types:
             # Subscribe service to new message type only if there's no such
             # subscription yet
             if (
@@ -607,8 +646,16 @@ class CalculationService(BaseSubscriber):
 
     def __unsubscribe_python_affector_spec(self, fit, affector_spec):
         """Unsubscribe affector spec with python modifier."""
+        msg_types = affector_spec.modifier.revise_msg_types
+        dep_keys = self.__python_attr_dep_keys.pop(affector_spec, None)
+        if dep_keys is not None:
+            for dep_key in dep_keys:
+                self.__python_attr_dependents.rm_data_entry(
+                    dep_key, affector_spec)
+            msg_types = set(msg_types)
+            msg_types.discard(AttrsValueChanged)
         to_ubsubscribe = set()
-        for msg_type in affector_spec.modifier.revise_msg_types:
+        for msg_type in msg_types:
             # Make sure affector spec will not receive messages anymore
             self.__subscribed_affectors.rm_data_entry(msg_type, affector_spec)
             # Unsubscribe service from message type if there're no recipients
@@ -621,9 +668,278 @@ class CalculationService(BaseSubscriber):
         if to_ubsubscribe:
             fit._unsubscribe(self, to_ubsubscribe)
 
+    def __get_python_attr_dep_keys(self, affector_spec):
+        """Get keys to index affector spec by attributes it depends on.
+
+        Returns:
+            Tuple with (attribute owner, attribute ID) keys, or None if
+            modifier of affector spec does not declare its dependencies, or
+            declares them in a way which cannot be indexed.
+        """
+        attr_deps = affector_spec.modifier.revise_attr_deps
+        if attr_deps is None:
+            return None
+        affector_item = affector_spec.item
+        dep_keys = []
+        for domain, attr_id in attr_deps:
+            if domain == ModDomain.self:
+                dep_keys.append((affector_item, attr_id))
+            elif domain in (ModDomain.ship, ModDomain.character):
+                dep_keys.append(((affector_item._fit, domain), attr_id))
+            else:
+                return None
+        return tuple(dep_keys)
+
+    def __get_python_attr_dependents(self, attr_changes):
+        """Get affector specs whose declared dependencies were changed."""
+        python_attr_dependents = self.__python_attr_dependents
+        affector_specs = set()
+        for item, attr_ids in attr_changes.items():
+            attr_owners = [item]
+            fit = item._fit
+            if fit is not None:
+                if item is fit.ship:
+                    attr_owners.append((fit, ModDomain.ship))
+                elif item is fit.character:
+                    attr_owners.append((fit, ModDomain.character))
+            for attr_owner in attr_owners:
+                for attr_id in attr_ids:
+                    dependents = python_attr_dependents.get(
+                        (attr_owner, attr_id))
+                    if dependents:
+                        affector_specs.update(dependents)
+        return affector_specs
+
+    def __forget_modification(self, affector_spec):
+        """Remove memoized modification data of affector spec."""
+        self.__modifications.pop(affector_spec, None)
+        if affector_spec.effect.resist_attr_id:
+            for carrier_item in list(self.__resists):
+                self.__forget_resist(carrier_item, affector_spec)
+
+    def __forget_resist(self, carrier_item, affector_spec):
+        """Remove memoized resistance value of carrier against spec."""
+        carrier_resists = self.__resists.get(carrier_item)
+        if carrier_resists is None:
+            return
+        carrier_resists.pop(affector_spec, None)
+        if not carrier_resists:
+            del self.__resists[carrier_item]
+
+    def __register_projected_affector_specs(self, affector_specs):
+        """Add projected affector specs to dependency register."""
+        for affector_spec in affector_specs:
+            if isinstance(affector_spec.modifier, DogmaModifier):
+                self.__dependencies.register_projected_affector_spec(
+                    affector_spec)
+
+    def __unregister_projected_affector_specs(self, affector_specs):
+        """Remove projected affector specs from dependency register."""
+        for affector_spec in affector_specs:
+            if isinstance(affector_spec.modifier, DogmaModifier):
+                self.__dependencies.unregister_projected_affector_spec(
+                    affector_spec)
+            self.__forget_modification(affector_spec)
+
+    # Dependency-related methods
+    def __invalidate_attr_dependents(self, attr_changes):
+        """Remove calculated values of attributes which rely on passed ones.
+
+        Whole transitive closure of dependents is processed in one pass.
+        Attributes whose values are not calculated are not traversed further,
+        as nothing calculated can rely on them. Attributes whose values are
+        masked by overrides are not traversed further either, as values which
+        rely on them do not change.
+
+        Args:
+            attr_changes: Changed attributes in {item: {attr IDs}} format.
+
+        Returns:
+            Attributes whose values were removed, in {item: {attr IDs}}
+            format.
+        """
+        affections = self.__affections
+        projections = self.__projections
+        dependencies = self.__dependencies
+        modifications = self.__modifications
+        # Format: {item: {attr IDs}}
+        removed = {}
+        # Format: [(item, {attr IDs})]
+        pending = list(attr_changes.items())
+
+        def remove_value(
+            affectee_item, affectee_attr_id, traversed, affector_spec=None
+        ):
+            affectee_attrs = affectee_item.attrs
+            # Incrementally recalculated attributes have to know which of
+            # modifications changed, regardless of value being calculated
+            if (
+                affector_spec is not None and
+                affectee_attr_id in affectee_item.incremental_attr_ids
+            ):
+                affectee_attrs._affector_spec_changed(affector_spec)
+            if not affectee_attrs._force_recalc(affectee_attr_id):
+                return
+            removed.setdefault(affectee_item, set()).add(affectee_attr_id)
+            if affectee_attr_id not in affectee_attrs._override_callbacks:
+                traversed.setdefault(affectee_item, set()).add(
+                    affectee_attr_id)
+
+        while pending:
+            item, attr_ids = pending.pop()
+            # Format: {item: {attr IDs}}
+            traversed = {}
+            cap_map = item.attrs._cap_map
+            # Forget resistance values which rely on changing attributes
+            carrier_resists = self.__resists.get(item)
+            if carrier_resists is not None:
+                for affector_spec in [
+                    s for s in carrier_resists
+                    if s.effect.resist_attr_id in attr_ids
+                ]:
+                    self.__forget_resist(item, affector_spec)
+            for attr_id in attr_ids:
+                # Attributes capped by the changing attribute
+                for capped_attr_id in cap_map.get(attr_id, ()):
+                    remove_value(item, capped_attr_id, traversed)
+                # Attributes modified by local affector specs
+                for affector_spec in dependencies.get_local_affector_specs(
+                    item, attr_id
+                ):
+                    modifications.pop(affector_spec, None)
+                    affectee_attr_id = affector_spec.modifier.affectee_attr_id
+                    for affectee_item in affections.get_local_affectee_items(
+                        affector_spec
+                    ):
+                        remove_value(
+                            affectee_item, affectee_attr_id, traversed,
+                            affector_spec)
+                # Attributes modified by projected affector specs
+                for affector_spec in dependencies.get_projected_affector_specs(
+                    item, attr_id
+                ):
+                    modifications.pop(affector_spec, None)
+                    tgt_items = projections.get_projector_tgts(
+                        Projector(affector_spec.item, affector_spec.effect))
+                    # When projector doesn't target any items, then we do not
+                    # need to clean anything else
+                    if not tgt_items:
+                        continue
+                    affectee_attr_id = affector_spec.modifier.affectee_attr_id
+                    for affectee_item in (
+                        affections.get_projected_affectee_items(
+                            affector_spec, tgt_items)
+                    ):
+                        remove_value(
+                            affectee_item, affectee_attr_id, traversed,
+                            affector_spec)
+                # Attributes modified by projectors, when changing attribute
+                # defines resistance to them
+                for projector in dependencies.get_resist_projectors(
+                    item, attr_id
+                ):
+                    for affector_spec in self.__generate_projected_affectors(
+                        projector.item, (projector.effect.id,)
+                    ):
+                        affectee_attr_id = (
+                            affector_spec.modifier.affectee_attr_id)
+                        for affectee_item in (
+                            affections.get_projected_affectee_items(
+                                affector_spec, (item,))
+                        ):
+                            remove_value(
+                                affectee_item, affectee_attr_id, traversed,
+                                affector_spec)
+            pending.extend(traversed.items())
+        return removed
+
     # Warfare buffs-related methods
+    def __get_fleet_buff_applications(self, fleet_fit):
+        """Get warfare buff applications between fit and rest of its fleet.
+
+        Returns:
+            Dictionary in {projector fit: [(projector, target items)]} format.
+        """
+        fits_effect_applications = {}
+        fleet_fits = fleet_fit.fleet.fits
+        get_fit_warfare_projectors = (
+            self.__projections.get_fit_warfare_projectors)
+        # Fit is affected by buffs existing in fleet. Buffs of the fit itself
+        # affect its ship regardless of fleet membership
+        if fleet_fit.ship is not None:
+            for projector_fit in fleet_fits:
+                if projector_fit is fleet_fit:
+                    continue
+                for projector in get_fit_warfare_projectors(projector_fit):
+                    fits_effect_applications.setdefault(
+                        projector_fit, []).append(
+                        (projector, [fleet_fit.ship]))
+        # Other fits are affected by buffs from this fit
+        for projector in get_fit_warfare_projectors(fleet_fit):
+            for fit in fleet_fits:
+                if fit is fleet_fit or fit.ship is None:
+                    continue
+                fits_effect_applications.setdefault(
+                    fleet_fit, []).append(
+                    (projector, [fit.ship]))
+        return fits_effect_applications
+
+    def __make_warfare_buff_specs(self, projector):
+        """Compose affector specs which apply buffs of warfare projector.
+
+        Returns:
+            Tuple in (buff IDs, affector specs) format, where buff IDs is
+            tuple of (buff ID attribute ID, buff ID) pairs specs were composed
+            from.
+        """
+        item = projector.item
+        get_buff_modifiers = get_source_data(
+            self.__solar_system.source).get_buff_modifiers
+        buff_ids = []
+        affector_specs = set()
+        for buff_id_attr_id, affector_attr_id in WARFARE_BUFF_ATTRS.items():
+            try:
+                buff_id = item.attrs[buff_id_attr_id]
+            except KeyError:
+                continue
+            buff_ids.append((buff_id_attr_id, buff_id))
+            try:
+                modifiers = get_buff_modifiers(buff_id, affector_attr_id)
+            except BuffTemplatesFetchError:
+                continue
+            for modifier in modifiers:
+                affector_specs.add(
+                    AffectorSpec(item, projector.effect, modifier))
+        return tuple(buff_ids), affector_specs
+
+    def __get_warfare_buff_tgts(self, item):
+        """Get ships which should receive warfare buffs from passed item."""
+        item_fit = item._fit
+        item_fleet = item_fit.fleet
+        tgt_ships = []
+        for tgt_fit in self.__solar_system.fits:
+            if (
+                tgt_fit is item_fit or
+                (item_fleet is not None and tgt_fit.fleet is item_fleet)
+            ):
+                tgt_ship = tgt_fit.ship
+                if tgt_ship is not None:
+                    tgt_ships.append(tgt_ship)
+        return tgt_ships
 
     # Projector-related methods
+    def __is_targeted_individually(self, item):
+        """Check if item or its 'other' items are targeted individually.
+
+        Values of such items may differ from values of equivalent items.
+        """
+        for checked_item in (item, *self.__equivalences.get_others(item)):
+            if checked_item.attrs._override_callbacks:
+                return True
+            if self.__projections.get_tgt_projectors(checked_item):
+                return True
+        return False
+
     def __generate_projectors(self, item, effect_ids):
         """Get projectors spawned by the item."""
         projectors = set()
@@ -639,7 +955,28 @@ class CalculationService(BaseSubscriber):
         return projectors
 
     # Auxiliary methods
-    def __publish_attr_changes(self, attr_changes):
+    def __publish_attr_changes(self, attr_changes, revised=False):
+        """Notify everyone about changed attribute values.
+
+        Args:
+            attr_changes: Attributes whose values were removed, in
+                {item: {attr IDs}} format.
+            revised (optional): When False, values of attributes which depend
+                on passed attributes are removed, and they are published
+                along with passed attributes. When True, it is assumed that
+                passed attributes already include all their dependents.
+        """
+        if not revised:
+            regular_changes = {}
+            for item, attr_ids in attr_changes.items():
+                item_changes_regular = attr_ids.difference(
+                    item.attrs._override_callbacks)
+                if item_changes_regular:
+                    regular_changes[item] = item_changes_regular
+            for item, attr_ids in self.__invalidate_attr_dependents(
+                regular_changes
+            ).items():
+                attr_changes.setdefault(item, set()).update(attr_ids)
         # Format: {fit: {item: {attr_ids}}}
         fit_changes_regular = {}
         # Format: {fit: {item: {attr_ids}}}
@@ -658,10 +995,10 @@ class CalculationService(BaseSubscriber):
         # Format: {fit, [messages]}
         fits_msgs = {}
         for fit, attr_changes in fit_changes_regular.items():
-            msg = AttrsValueChanged(attr_changes)
+            msg = AttrsValueChanged(attr_changes, revised=True)
             fits_msgs.setdefault(fit, []).append(msg)
         for fit, attr_changes in fit_changes_masked.items():
-            msg = AttrsValueChangedMasked(attr_changes)
+            msg = AttrsValueChangedMasked(attr_changes, revised=True)
             fits_msgs.setdefault(fit, []).append(msg)
         for fit, msgs in fits_msgs.items():
             fit._publish_bulk(msgs)
@@ -37,6 +37,28 @@ class EffectStatusResolver:
             item, [effect_id], state_override)
         return effects_status[effect_id]
 
+    @staticmethod
+    def resolve_running_effect_ids(item):
+        """Decide which effects of item should be running.
+
+        Items which run all their effects in full compliance mode take them
+        from tables precomputed on item type, statuses of effects of other
+        items are resolved one by one.
+
+        Args:
+            item: Item which should carry the effects.
+
+        Returns:
+            Set-like container with IDs of effects which should be running.
+        """
+        item_type = item._type
+        if item_type is not None and not item._has_effect_mode_overrides:
+            return item_type.running_effect_ids[item.state]
+        effects_status = EffectStatusResolver.resolve_effects_status(item)
+        return {
+            effect_id for effect_id, status in effects_status.items()
+            if status}
+
     @staticmethod
     def resolve_effects_status(item, effect_ids=None, state_override=None):
         """Decide if effects should be running or not.
@@ -84,19 +106,10 @@ class EffectStatusResolver:
     @staticmethod
     def __resolve_effect_status(
             item, effect, online_running, state_override):
-        resolver_map = {
-            EffectMode.full_compliance:
-                EffectStatusResolver.__resolve_full_compliance,
-            EffectMode.state_compliance:
-                EffectStatusResolver.__resolve_state_compliance,
-            EffectMode.force_run:
-                EffectStatusResolver.__resolve_force_run,
-            EffectMode.force_stop:
-                EffectStatusResolver.__resolve_force_stop}
         # Decide how we handle effect based on its run mode
         effect_mode = item.get_effect_mode(effect.id)
         try:
-            resolver = resolver_map[effect_mode]
+            resolver = EffectStatusResolver.__resolver_map[effect_mode]
         except KeyError:
             msg = 'unknown effect mode {}'.format(effect_mode)
             logger.warning(msg)
@@ -154,3 +167,10 @@ class EffectStatusResolver:
     @staticmethod
     def __resolve_force_stop(*_):
         return False
+
+    # Format: {effect mode: resolver}
+    __resolver_map = {
+        EffectMode.full_compliance: __resolve_full_compliance.__func__,
+        EffectMode.state_compliance: __resolve_state_compliance.__func__,
+        EffectMode.force_run: __resolve_force_run.__func__,
+        EffectMode.force_stop: __resolve_force_stop.__func__}
@@ -83,6 +83,10 @@ class AncillaryRepAmountModifier(BasePythonModifier):
     def revise_msg_types(self):
         return set(self.__revision_map.keys())
 
+    @property
+    def revise_attr_deps(self):
+        return (ModDomain.self, AttrId.charged_armor_dmg_mult),
+
     def revise_modification(self, msg, affector_item):
         revision_func = self.__revision_map[type(msg)]
         return revision_func(self, msg, affector_item)
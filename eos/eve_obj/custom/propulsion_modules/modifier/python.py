@@ -89,6 +89,13 @@ class PropulsionModuleVelocityBoostModifier(BasePythonModifier):
     def revise_msg_types(self):
         return set(self.__revision_map)
 
+    @property
+    def revise_attr_deps(self):
+        return (
+            (ModDomain.ship, AttrId.mass),
+            (ModDomain.self, AttrId.speed_factor),
+            (ModDomain.self, AttrId.speed_boost_factor))
+
     def revise_modification(self, msg, affector_item):
         revision_func = self.__revision_map[type(msg)]
         return revision_func(self, msg, affector_item)
@@ -58,6 +58,22 @@ class BasePythonModifier(BaseModifier, metaclass=ABCMeta):
         """
         ...
 
+    @property
+    def revise_attr_deps(self):
+        """Get attributes which modification value depends on.
+
+        When modifier declares them, attribute change messages are delivered
+        to it only when any of these attributes changes. Attributes are
+        specified relatively to affector item, via domain of item which
+        carries them.
+
+        Returns:
+            Iterable with (domain, attribute ID) tuples, where domain is
+            ModDomain.self, ModDomain.ship or ModDomain.character, or None if
+            modifier should receive all attribute change messages.
+        """
+        return None
+
     @abstractmethod
     def revise_modification(self, msg, affector_item):
         """Decide if modification value may change.
@@ -23,6 +23,8 @@ from collections import namedtuple
 
 from eos.const.eos import State
 from eos.const.eve import AttrId
+from eos.const.eve import EffectId
+from eos.const.eve import TypeCategoryId
 from eos.const.eve import fighter_ability_map
 from eos.util.cached_property import cached_property
 from eos.util.repr import make_repr_str
@@ -30,6 +32,15 @@ from eos.util.repr import make_repr_str
 
 AbilityData = namedtuple('AbilityData', ('cooldown_time', 'charge_quantity'))
 
+# Items belonging to these categories never have their effects stacking
+# penalized
+PENALTY_IMMUNE_CATEGORY_IDS = frozenset((
+    TypeCategoryId.ship,
+    TypeCategoryId.charge,
+    TypeCategoryId.skill,
+    TypeCategoryId.implant,
+    TypeCategoryId.subsystem))
+
 
 class Type:
     """Represents item type with all its metadata.
@@ -67,6 +78,21 @@ class Type:
             abilities_data = {}
         self.abilities_data = abilities_data
 
+    @cached_property
+    def attr_slots(self):
+        """Get stable slot indices of attributes defined on this type.
+
+        Returns:
+            Map between attribute IDs and slot indices, where indices are
+            sequential and start from 0.
+        """
+        return {attr_id: i for i, attr_id in enumerate(self.attrs)}
+
+    @cached_property
+    def penalty_immune(self):
+        """Check if effects of items of this type are never penalized."""
+        return self.category_id in PENALTY_IMMUNE_CATEGORY_IDS
+
     @cached_property
     def effects_data(self):
         """Get extended effect data."""
@@ -122,6 +148,46 @@ class Type:
             max_state = max(max_state, effect._state)
         return max_state
 
+    @cached_property
+    def running_effect_ids(self):
+        """Get IDs of effects which run when item takes specific state.
+
+        Effects are assumed to be in full compliance mode: offline effects
+        without fitting usage chance, online effects when 'online' effect is
+        running, default effect among active effects, and all overload
+        effects.
+
+        Returns:
+            Map between states and frozensets with effect IDs.
+        """
+        running_effect_ids = {state: set() for state in State}
+        online_dependent_effects = []
+        for effect in self.effects.values():
+            effect_state = effect._state
+            if effect_state == State.offline:
+                if effect.fitting_usage_chance_attr_id is not None:
+                    continue
+            elif effect_state == State.online:
+                if effect.id != EffectId.online:
+                    online_dependent_effects.append(effect)
+                    continue
+            elif effect_state == State.active:
+                if effect is not self.default_effect:
+                    continue
+            for state, effect_ids in running_effect_ids.items():
+                if state >= effect_state:
+                    effect_ids.add(effect.id)
+        # Regular online effects run only when 'online' effect runs
+        for state, effect_ids in running_effect_ids.items():
+            if EffectId.online not in effect_ids:
+                continue
+            for effect in online_dependent_effects:
+                if state >= effect._state:
+                    effect_ids.add(effect.id)
+        return {
+            state: frozenset(effect_ids)
+            for state, effect_ids in running_effect_ids.items()}
+
     # Auxiliary methods
     def __repr__(self):
         spec = ['id']
@@ -22,3 +22,8 @@
 class EosError(Exception):
     """Base class for all Eos exceptions."""
     ...
+
+
+class TransactionClosedError(EosError):
+    """Raised when rollback of finished transaction is requested."""
+    ...
@@ -19,8 +19,11 @@
 # ==============================================================================
 
 
+from contextlib import contextmanager
 from itertools import chain
 
+from eos.calculator.materializer import materialize_attrs
+from eos.calculator.service import FIT_STAT_NAMES
 from eos.const.eve import TypeId
 from eos.item import Booster
 from eos.item import Character
@@ -36,6 +39,7 @@ from eos.item import Ship
 from eos.item import Skill
 from eos.item import Stance
 from eos.item import Subsystem
+from eos.item.mixin.targetable import SingleTargetableMixin
 from eos.item_container import ItemDescriptor
 from eos.item_container import ItemList
 from eos.item_container import ItemSet
@@ -49,6 +53,7 @@ from eos.sim import ReactiveArmorHardenerSimulator
 from eos.solar_system import SolarSystem
 from eos.stats import StatService
 from eos.stats_container import DmgProfile
+from eos.transaction import FitTransaction
 from eos.util.default import DEFAULT
 from eos.util.repr import make_repr_str
 
@@ -90,6 +95,8 @@ class Fit(FitMsgBroker):
         self._fleet = None
         self.__incoming_dmg_default = None
         self.__incoming_dmg_rah = None
+        # Transactions which are currently active on the fit
+        self._transactions = []
         # Character-related item containers
         self.skills = TypeUniqueItemSet(self, Skill)
         self.implants = ItemSet(self, Implant)
@@ -142,6 +149,169 @@ class Fit(FitMsgBroker):
         """
         self._restriction.validate(skip_checks)
 
+    @contextmanager
+    def batch(self):
+        """Context manager which defers attribute change notifications.
+
+        Within the block, notifications about changed attribute values are
+        accumulated, and are merged and processed only when the block is
+        exited. Use it when doing many changes to the fit at once, e.g. when
+        composing fit from scratch. Values of attributes accessed within the
+        block may not reflect changes done within the block.
+        """
+        self._start_batch()
+        try:
+            yield self
+        finally:
+            self._finish_batch()
+
+    @contextmanager
+    def transaction(self):
+        """Context manager which allows to revert changes done to the fit.
+
+        Context manager provides transaction object, whose rollback() method
+        returns fit to the state it had when the block was entered. Changes
+        to items are reverted like if they were done manually, but rollback
+        puts back calculated attribute values instead of recalculating them,
+        when the fit is the only fit in its solar system. If the block raises
+        an exception, changes are rolled back automatically. Transaction can
+        be rolled back only within the block. Fleet membership of the fit is
+        not tracked.
+        """
+        transaction = FitTransaction(self)
+        try:
+            yield transaction
+        except Exception:
+            transaction.rollback()
+            raise
+        finally:
+            transaction._close()
+
+    def fork(self):
+        """Make independent copy of the fit.
+
+        Fork is placed into its own solar system which uses the same source.
+        Copies of all items are added to it in batch mode, thus items, their
+        effects and calculator registrations are not shared, and the fork is
+        registered as fully as any other fit. Changes to the fork never affect
+        this fit, and vice versa. Targets of items and fleet membership are
+        not carried over.
+
+        Only calculated attribute values are shared: when this fit is the only
+        fit in its solar system and its items target nothing, forked items
+        take value storages of their counterparts, and either side copies them
+        on its first write.
+
+        Returns:
+            New fit.
+        """
+        solar_system = self.solar_system
+        if solar_system is None:
+            fork = Fit(solar_system=None)
+        else:
+            fork = Fit(solar_system=SolarSystem(source=solar_system.source))
+        fork.default_incoming_dmg = self.default_incoming_dmg
+        fork.rah_incoming_dmg = self.rah_incoming_dmg
+        # Format: [(item, item fork)]
+        item_forks = []
+        with fork.batch():
+            for attr_name in ('character', 'ship', 'stance', 'effect_beacon'):
+                item = getattr(self, attr_name)
+                if item is None:
+                    setattr(fork, attr_name, None)
+                    continue
+                item_fork = item._fork()
+                setattr(fork, attr_name, item_fork)
+                item_forks.append((item, item_fork))
+            for attr_name in (
+                'skills', 'implants', 'boosters', 'subsystems', 'rigs',
+                'drones', 'fighters'
+            ):
+                fork_container = getattr(fork, attr_name)
+                for item in getattr(self, attr_name):
+                    item_fork = item._fork()
+                    fork_container.add(item_fork)
+                    item_forks.append((item, item_fork))
+            for attr_name in ('high', 'mid', 'low'):
+                fork_rack = getattr(fork.modules, attr_name)
+                for index, item in enumerate(getattr(self.modules, attr_name)):
+                    if item is None:
+                        continue
+                    item_fork = item._fork()
+                    fork_rack.place(index, item_fork)
+                    item_forks.append((item, item_fork))
+        # Fork is composed in the same context as this fit only when there is
+        # nothing else in solar system which might influence this fit, and
+        # when there are no projections within this fit, since targets are
+        # not carried over
+        if (
+            solar_system is not None and
+            len(solar_system.fits) == 1 and
+            not self.__has_targets()
+        ):
+            for item, item_fork in self.__iter_fork_pairs(item_forks):
+                item_fork.attrs._share_calculated(item.attrs)
+        return fork
+
+    def materialize_attrs(self, items=None, attr_ids=None):
+        """Calculate values of many attributes of many items at once.
+
+        Caps are calculated before attributes they cap, and values are
+        returned in order attributes were requested.
+
+        Args:
+            items (optional): Iterable with items. When not specified, all
+                items of the fit are used.
+            attr_ids (optional): Iterable with IDs of attributes. When not
+                specified, all attributes of items are calculated.
+
+        Returns:
+            Dictionary in {item: values} format, items go in order they were
+            passed. When attribute IDs are not specified, values are
+            dictionaries in {attribute ID: value} format. When they are
+            specified, values are tuples aligned with attribute IDs, thus
+            values of dictionary form 2-dimensional table, with None for
+            attributes which cannot be calculated.
+        """
+        if items is None:
+            items = self._item_iter()
+        return materialize_attrs(items, attr_ids)
+
+    def get_calc_stats(self):
+        """Get counters of attribute calculation activity on the fit.
+
+        Counters are always collected, and are kept until reset. Counters of
+        items are reported only while items are part of the fit, and
+        counters of calculation service are kept only while fit stays in its
+        solar system.
+
+        Returns:
+            Dictionary with quantities of attribute values which were
+            calculated, taken from storage, removed from storage or removal
+            of which was requested when they were not stored, calls to
+            override callbacks, published attribute change messages and
+            attributes they carried (with average attributes per message),
+            registered affector specs and revisions of modifications by python
+            modifiers.
+        """
+        stats = dict.fromkeys(FIT_STAT_NAMES, 0)
+        for item in self._item_iter():
+            for name, value in item.attrs._get_stats().items():
+                stats[name] = stats.get(name, 0) + value
+        if self.solar_system is not None:
+            stats.update(self.solar_system._calculator.get_fit_stats(self))
+        msgs = stats['attr_change_msgs']
+        stats['attr_change_msg_avg_size'] = (
+            stats['attr_change_msg_attrs'] / msgs if msgs else 0)
+        return stats
+
+    def reset_calc_stats(self):
+        """Reset counters of attribute calculation activity on the fit."""
+        for item in self._item_iter():
+            item.attrs._reset_stats()
+        if self.solar_system is not None:
+            self.solar_system._calculator.reset_fit_stats(self)
+
     @property
     def solar_system(self):
         return self._solar_system
@@ -213,6 +383,32 @@ class Fit(FitMsgBroker):
         # container's fit is used, thus fit's fit is self
         return self
 
+    def __has_targets(self):
+        """Check if any item of the fit targets anything."""
+        for item in self._item_iter():
+            if (
+                isinstance(item, SingleTargetableMixin) and
+                item.target is not None
+            ):
+                return True
+        return False
+
+    @staticmethod
+    def __iter_fork_pairs(item_forks):
+        """Iterate over items and their forks, including child items."""
+        pending = list(item_forks)
+        while pending:
+            item, item_fork = pending.pop()
+            yield item, item_fork
+            charge = getattr(item, 'charge', None)
+            if charge is not None:
+                pending.append((charge, item_fork.charge))
+            fork_autocharges = item_fork.autocharges
+            for effect_id, autocharge in item.autocharges.items():
+                autocharge_fork = fork_autocharges.get(effect_id)
+                if autocharge_fork is not None:
+                    pending.append((autocharge, autocharge_fork))
+
     def _item_iter(self, skip_autoitems=False):
         single = (self.character, self.ship, self.stance, self.effect_beacon)
         for item in chain(
@@ -56,7 +56,16 @@ class BaseItemMixin(metaclass=ABCMeta):
         self._type_id = type_id
         # Which item type this item based on
         self._type = None
+        # Item type properties, exposed with safe fallback when item is not
+        # loaded. Stored directly, as they are accessed on every attribute
+        # calculation
+        self._type_attrs = {}
+        self._type_effects = {}
+        self._type_default_effect = None
         self._container = None
+        # Fit to which item belongs, set by item containers when item is
+        # added or removed, to avoid walking chain of containers
+        self._fit = None
         # Container for effects IDs which are currently running
         self._running_effect_ids = set()
         # Special dictionary subclass that holds modified attributes and data
@@ -80,44 +89,15 @@ class BaseItemMixin(metaclass=ABCMeta):
             for item in child_item_iter(skip_autoitems=skip_autoitems):
                 yield item
 
-    @property
-    def _fit(self):
-        try:
-            return self._container._fit
-        except AttributeError:
-            return None
-
     @property
     @abstractmethod
     def state(self):
         ...
 
-    # Properties which expose various item type properties with safe fallback
-    @property
-    def _type_attrs(self):
-        try:
-            return self._type.attrs
-        except AttributeError:
-            return {}
-
-    @property
-    def _type_effects(self):
-        try:
-            return self._type.effects
-        except AttributeError:
-            return {}
-
-    @property
-    def _type_default_effect(self):
-        try:
-            return self._type.default_effect
-        except AttributeError:
-            return None
-
     @property
     def _type_default_effect_id(self):
         try:
-            return self._type.default_effect.id
+            return self._type_default_effect.id
         except AttributeError:
             return None
 
@@ -146,6 +126,12 @@ class BaseItemMixin(metaclass=ABCMeta):
         other_items.update(self._child_item_iter())
         return other_items
 
+    # IDs of attributes which keep normalized modification values between
+    # recalculations, so that only changed modifications are fetched again.
+    # Pays off for attributes which have many modifications and are
+    # recalculated often. Can be overridden per item class or per item
+    incremental_attr_ids = frozenset()
+
     # Effect methods
     @property
     def effects(self):
@@ -162,6 +148,10 @@ class BaseItemMixin(metaclass=ABCMeta):
             effects[effect_id] = EffectData(effect, mode, status)
         return effects
 
+    @property
+    def _has_effect_mode_overrides(self):
+        return self.__effect_mode_overrides is not None
+
     def get_effect_mode(self, effect_id):
         """Get effect's run mode for this item."""
         if self.__effect_mode_overrides is None:
@@ -179,6 +169,7 @@ class BaseItemMixin(metaclass=ABCMeta):
         Args:
             effects_modes: Map in {effect ID: effect run mode} format.
         """
+        self._journal_setup()
         for effect_id, effect_mode in effects_modes.items():
             # If new mode is default, then remove it from override map
             if effect_mode == DEFAULT_EFFECT_MODE:
@@ -238,6 +229,56 @@ class BaseItemMixin(metaclass=ABCMeta):
             self.__autocharges.clear()
             self.__autocharges = None
 
+    # Fork-related methods
+    def _fork(self):
+        """Make detached item which repeats setup of this item.
+
+        Child items are forked along with item, except for autocharges, which
+        items spawn on their own. Targets are not carried over.
+        """
+        fork = self._make_fork()
+        if self.__effect_mode_overrides is not None:
+            fork.__effect_mode_overrides = dict(self.__effect_mode_overrides)
+        return fork
+
+    def _make_fork(self):
+        """Instantiate item of the same class and type."""
+        return type(self)(self._type_id)
+
+    # Setup-related methods
+    def _journal_setup(self):
+        """Let transactions of item's fit save setup before it changes."""
+        fit = self._fit
+        if fit is not None:
+            for transaction in fit._transactions:
+                transaction._journal_setup(self)
+
+    def _get_setup(self):
+        """Get data which describes how item has been set up by user.
+
+        Child items and placement of item are not included.
+
+        Returns:
+            Dictionary which can be passed to _restore_setup().
+        """
+        effect_mode_overrides = self.__effect_mode_overrides
+        if effect_mode_overrides is not None:
+            effect_mode_overrides = dict(effect_mode_overrides)
+        return {'effect_modes': effect_mode_overrides}
+
+    def _restore_setup(self, setup):
+        """Return item to setup taken earlier via _get_setup()."""
+        old_effects_modes = setup['effect_modes'] or {}
+        effects_modes = {}
+        for effect_id in self.__effect_mode_overrides or ():
+            if effect_id not in old_effects_modes:
+                effects_modes[effect_id] = DEFAULT_EFFECT_MODE
+        for effect_id, effect_mode in old_effects_modes.items():
+            if self.get_effect_mode(effect_id) != effect_mode:
+                effects_modes[effect_id] = effect_mode
+        if effects_modes:
+            self._set_effects_modes(effects_modes)
+
     # Source-related methods
     @property
     def _is_loaded(self):
@@ -253,9 +294,13 @@ class BaseItemMixin(metaclass=ABCMeta):
             return
         # Do nothing if cache handler doesn't have item type we need
         try:
-            self._type = getter(self._type_id)
+            item_type = getter(self._type_id)
         except TypeFetchError:
             return
+        self._type = item_type
+        self._type_attrs = item_type.attrs
+        self._type_effects = item_type.effects
+        self._type_default_effect = item_type.default_effect
         # If fetch is successful, launch bunch of messages
         if fit is not None:
             msgs = MsgHelper.get_item_loaded_msgs(self)
@@ -277,3 +322,6 @@ class BaseItemMixin(metaclass=ABCMeta):
         self.attrs._clear()
         self._clear_autocharges()
         self._type = None
+        self._type_attrs = {}
+        self._type_effects = {}
+        self._type_default_effect = None
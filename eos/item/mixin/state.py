@@ -71,6 +71,7 @@ class MutableStateMixin(BaseItemMixin):
         old_state = self.__state
         if new_state == old_state:
             return
+        self._journal_setup()
         self.__state = new_state
         # When item is assigned to some fit, ask fit to perform fit-specific
         # state switch of our item
@@ -87,6 +88,18 @@ class MutableStateMixin(BaseItemMixin):
                         child_item, old_state, new_state))
             fit._publish_bulk(msgs)
 
+    def _make_fork(self):
+        return type(self)(self._type_id, state=self.__state)
+
+    def _get_setup(self):
+        setup = super()._get_setup()
+        setup['state'] = self.__state
+        return setup
+
+    def _restore_setup(self, setup):
+        super()._restore_setup(setup)
+        self.state = setup['state']
+
 
 class ContainerStateMixin(BaseItemMixin):
     """Items based on this class inherit state from item which contains them."""
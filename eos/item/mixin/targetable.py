@@ -50,6 +50,7 @@ class SingleTargetableMixin(BaseItemMixin, BaseTargetableMixin):
         old_tgt = self.__target
         if old_tgt is new_tgt:
             return
+        self._journal_setup()
         fit = self._fit
         if fit is not None:
             projectable_effects = set()
@@ -72,6 +73,15 @@ class SingleTargetableMixin(BaseItemMixin, BaseTargetableMixin):
         else:
             self.__target = new_tgt
 
+    def _get_setup(self):
+        setup = super()._get_setup()
+        setup['target'] = self.__target
+        return setup
+
+    def _restore_setup(self, setup):
+        super()._restore_setup(setup)
+        self.target = setup['target']
+
     def _get_effects_tgts(self, effect_ids):
         effect_tgts = {}
         tgt = self.__target
@@ -54,6 +54,12 @@ class Module(MutableStateMixin, SingleTargetableMixin, EffectStatsMixin):
             for item in child_item_iter(**kwargs):
                 yield item
 
+    def _make_fork(self):
+        charge = self.charge
+        if charge is not None:
+            charge = charge._fork()
+        return type(self)(self._type_id, state=self.state, charge=charge)
+
     @property
     def charge_quantity(self):
         """Max quantity of loadable charges.
@@ -52,9 +52,22 @@ class Skill(ImmutableStateMixin):
         old_lvl = self.__level
         if new_lvl == old_lvl:
             return
+        self._journal_setup()
         self.__level = new_lvl
         self.attrs._override_value_may_change(AttrId.skill_level)
 
+    def _make_fork(self):
+        return type(self)(self._type_id, level=self.__level)
+
+    def _get_setup(self):
+        setup = super()._get_setup()
+        setup['level'] = self.__level
+        return setup
+
+    def _restore_setup(self, setup):
+        super()._restore_setup(setup)
+        self.level = setup['level']
+
     # Attribute calculation-related properties
     _modifier_domain = ModDomain.character
     _owner_modifiable = False
@@ -44,7 +44,9 @@ class ItemContainerBase:
         if item._container:
             raise ItemAlreadyAssignedError(item)
         item._container = container
-        fit = item._fit
+        fit = container._fit
+        for subitem in self.__subitem_iter(item):
+            subitem._fit = fit
         if fit is not None:
             for subitem in self.__subitem_iter(item):
                 msgs = MsgHelper.get_item_added_msgs(subitem)
@@ -59,11 +61,16 @@ class ItemContainerBase:
         """
         fit = item._fit
         for subitem in self.__subitem_iter(item):
+            # Item might be changed while it is out of fit, thus its setup
+            # has to be saved before it leaves
+            subitem._journal_setup()
             subitem._unload()
             if fit is not None:
                 msgs = MsgHelper.get_item_removed_msgs(subitem)
                 fit._publish_bulk(msgs)
         item._container = None
+        for subitem in self.__subitem_iter(item):
+            subitem._fit = None
 
     def __subitem_iter(self, item):
         """Iterate through passed item and its child items."""
@@ -19,41 +19,150 @@
 # ==============================================================================
 
 
+from itertools import chain
+
+from .message import AttrsValueChanged
+from .message import AttrsValueChangedMasked
+
+
+# Types of messages whose delivery is deferred while batch is active. Messages
+# of the same type are merged into one before being delivered
+BATCHED_MSG_TYPES = (AttrsValueChanged, AttrsValueChangedMasked)
+
+
 class FitMsgBroker:
-    """Manages message subscriptions and dispatch messages to recipients."""
+    """Manages message subscriptions and dispatch messages to recipients.
+
+    Attributes:
+        msg_profiler: Message profiler which records stats of message handling
+            on the fit, None when stats are not needed. Handlers are not
+            wrapped in any way when profiler is not set.
+    """
 
     def __init__(self):
-        # Format: {event class: {subscribers}}
+        # Format: {message type: {subscriber: (handlers)}}
         self.__subscribers = {}
+        # Handlers of all subscribers, compiled into a tuple per message type
+        # in order subscribers subscribed, rebuilt when subscriptions change
+        # Format: {message type: (handlers)}
+        self.__handlers = {}
+        # How many batches are currently active
+        self.__batch_depth = 0
+        # Attribute changes received while batch is active
+        # Format: {message type: {item: {attr IDs}}}
+        self.__batched_attr_changes = {}
+        # Types of batched messages which had at least one message with
+        # dependents of changed attributes not revised yet
+        self.__batched_unrevised_types = set()
+        self.__msg_profiler = None
+
+    @property
+    def msg_profiler(self):
+        return self.__msg_profiler
+
+    @msg_profiler.setter
+    def msg_profiler(self, new_profiler):
+        self.__msg_profiler = new_profiler
+        for msg_type in self.__subscribers:
+            self.__compile_handlers(msg_type)
 
     def _subscribe(self, subscriber, msg_types):
         """Register subscriber for passed message types."""
         for msg_type in msg_types:
-            self.__subscribers.setdefault(msg_type, set()).add(subscriber)
+            subscribers = self.__subscribers.setdefault(msg_type, {})
+            if subscriber in subscribers:
+                continue
+            subscribers[subscriber] = subscriber._get_handlers(msg_type)
+            self.__compile_handlers(msg_type)
 
     def _unsubscribe(self, subscriber, msg_types):
         """Unregister subscriber from passed message types."""
-        msgtypes_to_remove = set()
         for msg_type in msg_types:
             try:
                 subscribers = self.__subscribers[msg_type]
             except KeyError:
                 continue
-            subscribers.discard(subscriber)
-            if not subscribers:
-                msgtypes_to_remove.add(msg_type)
-        for msg_type in msgtypes_to_remove:
-            del self.__subscribers[msg_type]
+            if subscriber not in subscribers:
+                continue
+            del subscribers[subscriber]
+            if subscribers:
+                self.__compile_handlers(msg_type)
+            else:
+                del self.__subscribers[msg_type]
+                del self.__handlers[msg_type]
+
+    def __compile_handlers(self, msg_type):
+        """Rebuild tuple of handlers which receive messages of passed type."""
+        subscribers = self.__subscribers[msg_type]
+        if self.__msg_profiler is not None:
+            self.__handlers[msg_type] = self.__msg_profiler._compile_handlers(
+                msg_type, subscribers)
+        else:
+            self.__handlers[msg_type] = tuple(chain.from_iterable(
+                subscribers.values()))
 
     def _publish(self, msg):
         """Publish single message."""
+        if self.__batch_depth and self.__batch_msg(msg):
+            return
         msg.fit = self
-        for subscriber in self.__subscribers.get(type(msg), ()):
-            subscriber._notify(msg)
+        for handler in self.__handlers.get(type(msg), ()):
+            handler(msg)
 
     def _publish_bulk(self, msgs):
         """Publish multiple messages."""
+        if self.__batch_depth:
+            msgs = [m for m in msgs if not self.__batch_msg(m)]
+        handlers = self.__handlers
         for msg in msgs:
             msg.fit = self
-            for subscriber in self.__subscribers.get(type(msg), ()):
-                subscriber._notify(msg)
+            for handler in handlers.get(type(msg), ()):
+                handler(msg)
+
+    def _start_batch(self):
+        """Start deferring delivery of attribute change messages."""
+        self.__batch_depth += 1
+
+    def _finish_batch(self):
+        """Deliver deferred messages if outermost batch is finished.
+
+        Attribute changes are merged per message type, so that subscribers
+        receive one message per type, with all changes of every item.
+        """
+        self.__batch_depth -= 1
+        if self.__batch_depth:
+            return
+        batched_attr_changes = self.__batched_attr_changes
+        self.__batched_attr_changes = {}
+        unrevised_types = self.__batched_unrevised_types
+        self.__batched_unrevised_types = set()
+        msgs = []
+        for msg_type in BATCHED_MSG_TYPES:
+            # Items which left the fit while batch was active are of no
+            # interest to subscribers anymore
+            attr_changes = {
+                item: attr_ids for item, attr_ids in
+                batched_attr_changes.get(msg_type, {}).items()
+                if item._fit is self}
+            if attr_changes:
+                msgs.append(msg_type(
+                    attr_changes, revised=msg_type not in unrevised_types))
+        if msgs:
+            self._publish_bulk(msgs)
+
+    def __batch_msg(self, msg):
+        """Store message for delivery when batch is finished, if possible.
+
+        Returns:
+            Boolean flag which tells if message was stored.
+        """
+        msg_type = type(msg)
+        if msg_type not in BATCHED_MSG_TYPES:
+            return False
+        batched_attr_changes = self.__batched_attr_changes.setdefault(
+            msg_type, {})
+        if not msg.revised:
+            self.__batched_unrevised_types.add(msg_type)
+        for item, attr_ids in msg.attr_changes.items():
+            batched_attr_changes.setdefault(item, set()).update(attr_ids)
+        return True
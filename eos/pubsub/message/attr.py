@@ -24,23 +24,29 @@ from eos.util.repr import make_repr_str
 
 class AttrsValueChanged:
 
-    def __init__(self, attr_changes):
+    def __init__(self, attr_changes, revised=False):
         self.fit = None
         # Format: {item: {attr IDs}}
         self.attr_changes = attr_changes
+        # When True, values of attributes which depend on changed attributes
+        # have already been removed
+        self.revised = revised
 
     def __repr__(self):
-        spec = ['fit', 'attr_changes']
+        spec = ['fit', 'attr_changes', 'revised']
         return make_repr_str(self, spec)
 
 
 class AttrsValueChangedMasked:
 
-    def __init__(self, attr_changes):
+    def __init__(self, attr_changes, revised=False):
         self.fit = None
         # Format: {item: {attr IDs}}
         self.attr_changes = attr_changes
+        # When True, values of attributes which depend on changed attributes
+        # have already been removed
+        self.revised = revised
 
     def __repr__(self):
-        spec = ['fit', 'attr_changes']
+        spec = ['fit', 'attr_changes', 'revised']
         return make_repr_str(self, spec)
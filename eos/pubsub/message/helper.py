@@ -129,11 +129,8 @@ class MsgHelper:
         which are considered as running.
         """
         # Set of effects which should be running according to new conditions
-        new_running_effect_ids = set()
-        effects_status = EffectStatusResolver.resolve_effects_status(item)
-        for effect_id, status in effects_status.items():
-            if status:
-                new_running_effect_ids.add(effect_id)
+        new_running_effect_ids = (
+            EffectStatusResolver.resolve_running_effect_ids(item))
         start_ids = new_running_effect_ids.difference(item._running_effect_ids)
         stop_ids = item._running_effect_ids.difference(new_running_effect_ids)
         msgs = []
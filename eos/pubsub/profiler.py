@@ -0,0 +1,132 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from collections import namedtuple
+from time import perf_counter
+
+
+HandlerStats = namedtuple(
+    'HandlerStats', ('count', 'time', 'own_time', 'max_time'))
+MsgTypeStats = namedtuple('MsgTypeStats', ('count', 'fanout'))
+
+
+class MsgProfiler:
+    """Records how often subscribers handle messages and how long it takes.
+
+    Profiler is enabled by assigning it to fit, and can be assigned to several
+    fits at once to collect stats of all of them. Stats are collected per
+    subscriber class and message type pair. Time of message handling includes
+    time spent by other subscribers on messages published by the handler,
+    while own time does not.
+    """
+
+    def __init__(self):
+        # Format: {(subscriber class, message type):
+        # [count, time, own time, max time]}
+        self.__handler_stats = {}
+        # Format: {message type: [count, deliveries]}
+        self.__msg_type_stats = {}
+        # Time spent on nested handling, per handling in progress
+        # Format: [time]
+        self.__nested_times = []
+
+    def get_handler_stats(self):
+        """Get collected stats of message handling.
+
+        Returns:
+            Dictionary in {(subscriber class, message type): stats} format,
+            sorted by own handling time, most expensive first.
+        """
+        return {
+            k: HandlerStats(*v) for k, v in sorted(
+                self.__handler_stats.items(),
+                key=lambda i: i[1][2], reverse=True)}
+
+    def get_msg_type_stats(self):
+        """Get collected stats of message dispatch.
+
+        Returns:
+            Dictionary in {message type: stats} format, where stats contain
+            quantity of published messages and average quantity of subscribers
+            which received them.
+        """
+        return {
+            k: MsgTypeStats(count, deliveries / count)
+            for k, (count, deliveries) in self.__msg_type_stats.items()}
+
+    def reset(self):
+        """Forget collected stats."""
+        self.__handler_stats.clear()
+        self.__msg_type_stats.clear()
+
+    def _compile_handlers(self, msg_type, subscribers):
+        """Make tuple of handlers which record stats of messages they handle.
+
+        Args:
+            msg_type: Type of messages handlers receive.
+            subscribers: Map in {subscriber: (handlers)} format.
+
+        Returns:
+            Tuple with callables which accept message.
+        """
+        profiled_handlers = [
+            self.__make_profiled((type(subscriber), msg_type), handlers)
+            for subscriber, handlers in subscribers.items() if handlers]
+        return (
+            self.__make_msg_counter(msg_type, len(profiled_handlers)),
+            *profiled_handlers)
+
+    def __make_msg_counter(self, msg_type, fanout):
+        def count(msg):
+            try:
+                stats = self.__msg_type_stats[msg_type]
+            except KeyError:
+                self.__msg_type_stats[msg_type] = [1, fanout]
+            else:
+                stats[0] += 1
+                stats[1] += fanout
+        return count
+
+    def __make_profiled(self, key, handlers):
+        def profiled(msg):
+            nested_times = self.__nested_times
+            nested_times.append(0)
+            started = perf_counter()
+            try:
+                for handler in handlers:
+                    handler(msg)
+            finally:
+                elapsed = perf_counter() - started
+                own_elapsed = elapsed - nested_times.pop()
+                if nested_times:
+                    nested_times[-1] += elapsed
+                try:
+                    stats = self.__handler_stats[key]
+                except KeyError:
+                    self.__handler_stats[key] = [
+                        1, elapsed, own_elapsed, elapsed]
+                else:
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    stats[2] += own_elapsed
+                    if elapsed > stats[3]:
+                        stats[3] = elapsed
+        return profiled
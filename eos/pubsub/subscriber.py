@@ -31,9 +31,17 @@ class BaseSubscriber(metaclass=ABCMeta):
     def _handler_map(self):
         ...
 
-    def _notify(self, msg):
+    def _get_handlers(self, msg_type):
+        """Get callables which handle messages of passed type.
+
+        Message broker requests them when subscriber subscribes to message
+        type, and calls them in order for every message of the type.
+
+        Returns:
+            Tuple with callables which accept message.
+        """
         try:
-            handler = self._handler_map[type(msg)]
+            handler = self._handler_map[msg_type]
         except KeyError:
-            return
-        handler(self, msg)
+            return ()
+        return (handler.__get__(self),)
@@ -488,11 +488,17 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
         AttrsValueChangedMasked: _handle_attr_changed_masked,
         RahIncomingDmgChanged: _handle_changed_dmg_profile}
 
-    def _notify(self, msg):
+    def _get_handlers(self, msg_type):
         # Do not react to messages while sim is running
-        if self.__running is True:
-            return
-        BaseSubscriber._notify(self, msg)
+        def make_guarded(handler):
+            def guarded(msg):
+                if self.__running is True:
+                    return
+                handler(msg)
+            return guarded
+        return tuple(
+            make_guarded(h)
+            for h in BaseSubscriber._get_handlers(self, msg_type))
 
     # Auxiliary message handling methods
     def __get_rah_effect(self, item):
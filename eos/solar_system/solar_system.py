@@ -19,12 +19,14 @@
 # ==============================================================================
 
 
+from contextlib import contextmanager
 from math import sqrt
 
 from eos.calculator.service import CalculationService
 from eos.const.eve import AttrId
 from eos.source import Source
 from eos.source import SourceManager
+from eos.source.source import get_source_data
 from eos.util.default import DEFAULT
 from eos.util.repr import make_repr_str
 from .exception import ItemSolarSystemMismatchError
@@ -38,11 +40,17 @@ class SolarSystem:
         source (optional): Source to use for fits located in this solar system.
             When not specified, source which is set as default in source manager
             will be used.
+
+    Attributes:
+        calc_sampler: Calculation sampler which records stats of attribute
+            calculations happening in solar system, None when stats are not
+            needed.
     """
 
     def __init__(self, source=DEFAULT):
         self.__source = None
         self._calculator = CalculationService(self)
+        self.calc_sampler = None
         self.fits = FitSet(self)
         # Initialize defaults
         if source is DEFAULT:
@@ -70,10 +78,57 @@ class SolarSystem:
             for fit in self.fits:
                 fit._unload_items()
         self.__source = new_source
-        if new_source is not None:
+        if new_source is None:
+            self._calculator.attr_metadata = {}
+        else:
+            self._calculator.attr_metadata = (
+                get_source_data(new_source).attr_metadata)
             for fit in self.fits:
                 fit._load_items()
 
+    @contextmanager
+    def batch(self):
+        """Context manager which defers attribute change notifications.
+
+        Works like batch context manager of fit, but for all fits which are in
+        solar system when the block is entered.
+        """
+        fits = list(self.fits)
+        for fit in fits:
+            fit._start_batch()
+        try:
+            yield self
+        finally:
+            for fit in fits:
+                fit._finish_batch()
+
+    def get_calc_stats(self):
+        """Get counters of attribute calculation activity in solar system.
+
+        Returns:
+            Dictionary with sums of counters of all fits in solar system (see
+            fit's method with the same name), plus quantities of attribute
+            values which were taken from equivalent items, and which had to be
+            calculated despite item having equivalent items.
+        """
+        stats = {}
+        for fit in self.fits:
+            for name, value in fit.get_calc_stats().items():
+                stats[name] = stats.get(name, 0) + value
+        msgs = stats.get('attr_change_msgs', 0)
+        stats['attr_change_msg_avg_size'] = (
+            stats['attr_change_msg_attrs'] / msgs if msgs else 0)
+        equivalence_stats = self._calculator.equivalence_stats
+        stats['equivalent_values_shared'] = equivalence_stats['shared']
+        stats['equivalent_values_unshared'] = equivalence_stats['unshared']
+        return stats
+
+    def reset_calc_stats(self):
+        """Reset counters of attribute calculation activity in solar system."""
+        for fit in self.fits:
+            fit.reset_calc_stats()
+        self._calculator.reset_equivalence_stats()
+
     def get_ctc_range(self, item1, item2):
         """Calculate center-to-center range between two items."""
         try:
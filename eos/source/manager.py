@@ -27,6 +27,7 @@ from eos.util.repr import make_repr_str
 from .exception import ExistingSourceError
 from .exception import UnknownSourceError
 from .source import Source
+from .source import forget_source_data
 
 
 logger = getLogger(__name__)
@@ -86,6 +87,11 @@ class SourceManager:
             eve_objects = EveObjBuilder.run(data_handler)
             cache_handler.update_cache(eve_objects, current_fp)
 
+        # Data derived from cache handler might be outdated, e.g. when cache
+        # has been updated after source with the same cache handler had been
+        # removed
+        forget_source_data(cache_handler)
+
         # Finally, add record to list of sources
         source = Source(alias=alias, cache_handler=cache_handler)
         cls._sources[alias] = source
@@ -116,9 +122,10 @@ class SourceManager:
         """
         logger.info('removing source with alias "{}"'.format(alias))
         try:
-            del cls._sources[alias]
+            source = cls._sources.pop(alias)
         except KeyError:
             raise UnknownSourceError(alias)
+        forget_source_data(source.cache_handler)
 
     @classmethod
     def list(cls):
@@ -20,6 +20,122 @@
 
 
 from collections import namedtuple
+from weakref import WeakKeyDictionary
+from weakref import proxy
+
+from eos.eve_obj.modifier import DogmaModifier
+
+
+AttrMetadata = namedtuple(
+    'AttrMetadata',
+    ('default_value', 'high_is_good', 'stackable', 'max_attr_id'))
+
+
+class AttrMetadataTable(dict):
+    """Map with metadata of attributes, used in attribute calculations.
+
+    Cache handlers do not expose all the attributes they have, thus the table
+    fills itself when attribute is requested for the first time. Entries are
+    never changed after that.
+
+    Args:
+        cache_handler: Cache handler which provides attributes.
+
+    Raises:
+        AttrFetchError: If requested attribute cannot be fetched. Errors are
+            not memoized.
+    """
+
+    def __init__(self, cache_handler):
+        dict.__init__(self)
+        self.__cache_handler = cache_handler
+
+    def __missing__(self, attr_id):
+        attr = self.__cache_handler.get_attr(attr_id)
+        attr_metadata = AttrMetadata(
+            default_value=attr.default_value,
+            high_is_good=attr.high_is_good,
+            stackable=attr.stackable,
+            max_attr_id=attr.max_attr_id)
+        self[attr_id] = attr_metadata
+        return attr_metadata
 
 
 Source = namedtuple('Source', ('alias', 'cache_handler'))
+
+
+class SourceData:
+    """Data derived from source's cache handler data.
+
+    Derived data is shared by all solar systems using sources with the same
+    cache handler.
+
+    Args:
+        cache_handler: Cache handler which provides source data.
+
+    Attributes:
+        attr_metadata: Map between attribute IDs and their metadata.
+    """
+
+    def __init__(self, cache_handler):
+        # Data is stored in map keyed by cache handler, thus it should not
+        # keep cache handler alive
+        cache_handler = proxy(cache_handler)
+        self.__cache_handler = cache_handler
+        # Metadata of attributes, format: {attribute ID: attribute metadata}
+        self.attr_metadata = AttrMetadataTable(cache_handler)
+        # Modifiers composed out of buff templates
+        # Format: {(buff ID, affector attribute ID): (modifiers)}
+        self.__buff_modifiers = {}
+
+    def get_buff_modifiers(self, buff_id, affector_attr_id):
+        """Get modifiers which apply warfare buff.
+
+        Args:
+            buff_id: ID of warfare buff.
+            affector_attr_id: ID of attribute which carries buff value.
+
+        Returns:
+            Tuple with modifiers.
+
+        Raises:
+            BuffTemplatesFetchError: If buff templates cannot be fetched.
+        """
+        key = (buff_id, affector_attr_id)
+        try:
+            return self.__buff_modifiers[key]
+        except KeyError:
+            pass
+        # Errors are not memoized, buff templates will be requested again
+        buff_templates = self.__cache_handler.get_buff_templates(buff_id)
+        modifiers = tuple(
+            DogmaModifier._make_from_buff_template(t, affector_attr_id)
+            for t in buff_templates)
+        self.__buff_modifiers[key] = modifiers
+        return modifiers
+
+
+# Data is keyed by cache handler rather than by source, since sources are
+# compared by value, and re-added source would get data of removed one. Entries
+# go away along with their cache handlers
+# Format: {cache handler: source data}
+_source_data = WeakKeyDictionary()
+
+
+def get_source_data(source):
+    """Get data derived from passed source."""
+    cache_handler = source.cache_handler
+    try:
+        return _source_data[cache_handler]
+    except KeyError:
+        source_data = SourceData(cache_handler)
+        _source_data[cache_handler] = source_data
+        return source_data
+
+
+def forget_source_data(cache_handler):
+    """Drop data derived from cache handler, e.g. when its cache changes.
+
+    Solar systems which already use the data keep it.
+    """
+    _source_data.pop(cache_handler, None)
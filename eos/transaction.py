@@ -0,0 +1,194 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.exception import TransactionClosedError
+from eos.item import Autocharge
+
+
+SINGLE_ATTR_NAMES = ('character', 'ship', 'stance', 'effect_beacon')
+SET_ATTR_NAMES = (
+    'skills', 'implants', 'boosters', 'subsystems', 'rigs', 'drones',
+    'fighters')
+RACK_ATTR_NAMES = ('high', 'mid', 'low')
+
+
+class FitTransaction:
+    """Journals changes done to fit, to be able to revert them.
+
+    Contents of fit containers are remembered when transaction is started.
+    Setup of items and their calculated attribute values are remembered by
+    the journal only before they are changed for the first time, thus cost
+    of rollback is proportional to what has been touched. Calculated values
+    are journaled only when fit is the only fit in its solar system, since
+    otherwise changes which are not tracked by transaction may influence
+    them. Fleet membership of the fit and changes done to other fits are not
+    reverted.
+
+    Only calculated values are restored directly. Calculator, projection and
+    stats registers are maintained by messages, thus rollback puts items and
+    their setup back via regular fit and item methods, which publishes the
+    inverse of changes done within transaction.
+
+    Args:
+        fit: Fit to track.
+    """
+
+    def __init__(self, fit):
+        self.__fit = fit
+        self.__active = True
+        self.__singles = {n: getattr(fit, n) for n in SINGLE_ATTR_NAMES}
+        self.__sets = {n: set(getattr(fit, n)) for n in SET_ATTR_NAMES}
+        self.__racks = {
+            n: tuple(getattr(fit.modules, n)) for n in RACK_ATTR_NAMES}
+        # Format: {module: charge}
+        self.__charges = {
+            m: m.charge for m in fit.modules.items() if m.charge is not None}
+        self.__default_incoming_dmg = fit.default_incoming_dmg
+        self.__rah_incoming_dmg = fit.rah_incoming_dmg
+        # Format: {item: setup}
+        self.__setups = {}
+        solar_system = fit.solar_system
+        self.__solar_system = solar_system
+        if solar_system is None or len(solar_system.fits) != 1:
+            self.__source = None
+            # Format: {item: (autocharge key, saved values)}
+            self.__saved_values = None
+        else:
+            self.__source = solar_system.source
+            self.__saved_values = {}
+        fit._transactions.append(self)
+
+    def rollback(self):
+        """Return fit to the state it had when transaction was started.
+
+        Transaction stays active after rollback, and can be rolled back again.
+
+        Raises:
+            TransactionClosedError: If transaction is not active anymore.
+        """
+        if not self.__active:
+            raise TransactionClosedError
+        fit = self.__fit
+        # Changes done by rollback itself are not journaled
+        fit._transactions.remove(self)
+        try:
+            with fit.batch():
+                self.__restore_items()
+                if fit.default_incoming_dmg is not self.__default_incoming_dmg:
+                    fit.default_incoming_dmg = self.__default_incoming_dmg
+                if fit.rah_incoming_dmg is not self.__rah_incoming_dmg:
+                    fit.rah_incoming_dmg = self.__rah_incoming_dmg
+            # Values are put back only after batch is over, as attribute
+            # changes deferred by batch clear calculated values when delivered
+            if self.__saved_values is not None and self.__context_kept():
+                self.__restore_values()
+        finally:
+            fit._transactions.append(self)
+
+    def _close(self):
+        """Stop journaling changes."""
+        self.__active = False
+        self.__fit._transactions.remove(self)
+
+    # Journaling methods
+    def _journal_setup(self, item):
+        setups = self.__setups
+        if item not in setups:
+            setups[item] = item._get_setup()
+
+    def _journal_values(self, item):
+        saved_values = self.__saved_values
+        if saved_values is None or item in saved_values:
+            return
+        # Autocharges are spawned anew when their containers are loaded, thus
+        # values of autocharges are put back into autocharges which replaced
+        # them
+        autocharge_key = None
+        if isinstance(item, Autocharge):
+            container = item._container
+            for effect_id, autocharge in container.autocharges.items():
+                if autocharge is item:
+                    autocharge_key = (container, effect_id)
+                    break
+        saved_values[item] = (autocharge_key, item.attrs._save_calculated())
+
+    # Auxiliary methods
+    def __restore_items(self):
+        fit = self.__fit
+        for attr_name, item in self.__singles.items():
+            if getattr(fit, attr_name) is not item:
+                setattr(fit, attr_name, item)
+        for attr_name, old_items in self.__sets.items():
+            container = getattr(fit, attr_name)
+            # Remove items first, as some containers do not allow items of
+            # the same type to coexist
+            for item in set(container).difference(old_items):
+                container.remove(item)
+            for item in old_items.difference(container):
+                container.add(item)
+        for attr_name, old_items in self.__racks.items():
+            rack = getattr(fit.modules, attr_name)
+            for index, item in enumerate(tuple(rack)):
+                if item is None:
+                    continue
+                if index >= len(old_items) or old_items[index] is not item:
+                    rack.free(item)
+            for index, item in enumerate(old_items):
+                if item is None:
+                    continue
+                if index >= len(rack) or rack[index] is not item:
+                    rack.place(index, item)
+        # Charges might have been moved between modules, thus they have to be
+        # taken out before being loaded back
+        for module in fit.modules.items():
+            charge = self.__charges.get(module)
+            if module.charge is not charge:
+                module.charge = None
+        for module, charge in self.__charges.items():
+            if module.charge is not charge:
+                module.charge = charge
+        for item, setup in self.__setups.items():
+            # Items which are not part of the fit anymore were added after
+            # transaction had been started
+            if item._fit is not fit:
+                continue
+            item._restore_setup(setup)
+
+    def __context_kept(self):
+        solar_system = self.__fit.solar_system
+        return (
+            solar_system is self.__solar_system and
+            solar_system.source is self.__source and
+            len(solar_system.fits) == 1)
+
+    def __restore_values(self):
+        fit = self.__fit
+        for item, (autocharge_key, saved) in self.__saved_values.items():
+            if autocharge_key is not None:
+                container, effect_id = autocharge_key
+                item = container.autocharges.get(effect_id)
+                if item is None:
+                    continue
+            # Items which are not part of the fit anymore were added after
+            # transaction had been started
+            if item._fit is not fit:
+                continue
+            item.attrs._restore_calculated(saved)
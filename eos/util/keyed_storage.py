@@ -93,3 +93,87 @@ class KeyedStorage(dict):
             value.discard(data)
             if not value:
                 del self[key]
+
+
+class NestedKeyedStorage(dict):
+    """Container for data sets with two-level keyed access.
+
+    Data sets are accessed via key and subkey. Subkey is not passed explicitly,
+    it is derived from data entry using getter specified at instantiation. In
+    other words, regular dictionary with values being keyed storages.
+
+    Args:
+        subkey_getter: Callable which receives data entry and returns subkey
+            under which this entry should be stored.
+    """
+
+    def __init__(self, subkey_getter):
+        dict.__init__(self)
+        self.__subkey_getter = subkey_getter
+
+    def get_data_set(self, key, subkey):
+        """Get data set stored under passed key and subkey.
+
+        If there is no data, empty iterable is returned.
+        """
+        try:
+            return self[key][subkey]
+        except KeyError:
+            return ()
+
+    def get_data_sets(self, key):
+        """Get all data sets stored under passed key.
+
+        Returns:
+            Iterable with sets of data.
+        """
+        try:
+            return self[key].values()
+        except KeyError:
+            return ()
+
+    def add_data_entry(self, key, data):
+        """Add data entry.
+
+        If set accessed by passed key and subkey of data doesn't exist, create
+        it.
+
+        Args:
+            key: Defines into which set we should add new data.
+            data: Single data entry to add.
+        """
+        try:
+            keyed_storage = self[key]
+        except KeyError:
+            keyed_storage = self[key] = KeyedStorage()
+        keyed_storage.add_data_entry(self.__subkey_getter(data), data)
+
+    def add_data_set(self, key, data_set):
+        """Add data set.
+
+        Args:
+            key: Defines into which set we should add new data.
+            data_set: Iterable with data to add.
+        """
+        for data in data_set:
+            self.add_data_entry(key, data)
+
+    def rm_data_entry(self, key, data):
+        """Remove data entry.
+
+        If requested data doesn't exit in target set, silently ignore it, remove
+        only stuff which is stored. If after removal set contains no data, run
+        cleanup jobs.
+
+        Args:
+            key: Defines from which set we should remove data.
+            data: Single data entry to remove.
+        """
+        try:
+            keyed_storage = self[key]
+        except KeyError:
+            return
+        else:
+            keyed_storage.rm_data_entry(self.__subkey_getter(data), data)
+            if not keyed_storage:
+                del self[key]
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+"""
+Run synthetic workloads against attribute calculation engine and report how
+long they take.
+
+Workloads are built on top of generated data which mimics shape of a fully
+skilled battleship fit, thus no data dump is needed to run them.
+"""
+
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(script_dir, '..')))
+
+
+from eos import Fit  # noqa: E402
+from eos import ModuleHigh  # noqa: E402
+from eos import ModuleLow  # noqa: E402
+from eos import Ship  # noqa: E402
+from eos import Skill  # noqa: E402
+from eos import SolarSystem  # noqa: E402
+from eos import State  # noqa: E402
+from eos.cache_handler import AttrFetchError  # noqa: E402
+from eos.cache_handler import BuffTemplatesFetchError  # noqa: E402
+from eos.cache_handler import EffectFetchError  # noqa: E402
+from eos.cache_handler import TypeFetchError  # noqa: E402
+from eos.const.eos import ModAffecteeFilter  # noqa: E402
+from eos.const.eos import ModAggregateMode  # noqa: E402
+from eos.const.eos import ModDomain  # noqa: E402
+from eos.const.eos import ModOperator  # noqa: E402
+from eos.const.eve import AttrId  # noqa: E402
+from eos.const.eve import EffectCategoryId  # noqa: E402
+from eos.const.eve import EffectId  # noqa: E402
+from eos.const.eve import TypeCategoryId  # noqa: E402
+from eos.eve_obj.attribute import Attribute  # noqa: E402
+from eos.eve_obj.effect import EffectFactory  # noqa: E402
+from eos.eve_obj.modifier import DogmaModifier  # noqa: E402
+from eos.eve_obj.type import TypeFactory  # noqa: E402
+from eos.source import Source  # noqa: E402
+
+
+ID_START = 1000000
+SKILL_QUANTITY = 400
+SHIP_ATTR_QUANTITY = 60
+MODULE_ATTR_QUANTITY = 30
+HIGH_QUANTITY = 8
+LOW_QUANTITY = 7
+PROJECTOR_QUANTITY = 30
+
+
+class BenchCacheHandler:
+    """Minimal in-memory cache handler with generated data."""
+
+    def __init__(self):
+        self.types = {}
+        self.attrs = {}
+        self.effects = {}
+        self.__next_id = ID_START
+
+    def allocate_id(self):
+        self.__next_id += 1
+        return self.__next_id
+
+    def get_type(self, type_id):
+        try:
+            return self.types[type_id]
+        except KeyError:
+            raise TypeFetchError(type_id)
+
+    def get_attr(self, attr_id):
+        try:
+            return self.attrs[attr_id]
+        except KeyError:
+            raise AttrFetchError(attr_id)
+
+    def get_effect(self, effect_id):
+        try:
+            return self.effects[effect_id]
+        except KeyError:
+            raise EffectFetchError(effect_id)
+
+    def get_buff_templates(self, buff_id):
+        raise BuffTemplatesFetchError(buff_id)
+
+    def mkattr(self, attr_id=None, **kwargs):
+        if attr_id is None:
+            attr_id = self.allocate_id()
+        attr = Attribute(attr_id, **kwargs)
+        self.attrs[attr_id] = attr
+        return attr
+
+    def mkeffect(self, **kwargs):
+        effect = EffectFactory.make(self.allocate_id(), **kwargs)
+        self.effects[effect.id] = effect
+        return effect
+
+    def mktype(self, **kwargs):
+        item_type = TypeFactory.make(type_id=self.allocate_id(), **kwargs)
+        self.types[item_type.id] = item_type
+        return item_type
+
+
+def mkmod(**kwargs):
+    return DogmaModifier(aggregate_mode=ModAggregateMode.stack, **kwargs)
+
+
+class BenchData:
+    """Generates types which resemble fully skilled battleship fit."""
+
+    def __init__(self):
+        ch = self.cache_handler = BenchCacheHandler()
+        ch.mkattr(AttrId.skill_level, default_value=0)
+        ch.mkattr(AttrId.required_skill_1)
+        ch.mkattr(AttrId.required_skill_1_level)
+        self.ship_attrs = [
+            ch.mkattr(stackable=False) for _ in range(SHIP_ATTR_QUANTITY)]
+        self.module_attrs = [
+            ch.mkattr(stackable=False) for _ in range(MODULE_ATTR_QUANTITY)]
+        bonus_attr = self.bonus_attr = ch.mkattr()
+        # Skills: each skill scales its own bonus by its level and applies it
+        # to ship and to modules which require the first skill
+        self.skill_type_ids = []
+        for i in range(SKILL_QUANTITY):
+            mods = [mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.self,
+                affectee_attr_id=bonus_attr.id,
+                operator=ModOperator.post_mul,
+                affector_attr_id=AttrId.skill_level)]
+            ship_attr = self.ship_attrs[i % SHIP_ATTR_QUANTITY]
+            mods.append(mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=ship_attr.id,
+                operator=ModOperator.post_percent,
+                affector_attr_id=bonus_attr.id))
+            if self.skill_type_ids:
+                module_attr = self.module_attrs[i % MODULE_ATTR_QUANTITY]
+                mods.append(mkmod(
+                    affectee_filter=ModAffecteeFilter.domain_skillrq,
+                    affectee_filter_extra_arg=self.skill_type_ids[0],
+                    affectee_domain=ModDomain.ship,
+                    affectee_attr_id=module_attr.id,
+                    operator=ModOperator.post_percent,
+                    affector_attr_id=bonus_attr.id))
+            effect = ch.mkeffect(
+                category_id=EffectCategoryId.passive, modifiers=mods)
+            skill_type = ch.mktype(
+                category_id=TypeCategoryId.skill,
+                attrs={bonus_attr.id: 1}, effects=[effect])
+            self.skill_type_ids.append(skill_type.id)
+        # Ship
+        self.ship_type_id = ch.mktype(
+            category_id=TypeCategoryId.ship,
+            attrs={a.id: 100 + i for i, a in enumerate(self.ship_attrs)}).id
+        # Modules: they boost ship attributes when online, and are affected
+        # by skills via skill requirement
+        module_attrs = {a.id: 10 + i for i, a in enumerate(self.module_attrs)}
+        module_attrs[AttrId.required_skill_1] = self.skill_type_ids[0]
+        module_attrs[AttrId.required_skill_1_level] = 1
+        module_attrs[bonus_attr.id] = 1.05
+        online_effect = EffectFactory.make(
+            EffectId.online, category_id=EffectCategoryId.online)
+        ch.effects[online_effect.id] = online_effect
+        bonus_effect = ch.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=a.id,
+                operator=ModOperator.post_mul,
+                affector_attr_id=bonus_attr.id)
+                for a in self.ship_attrs[:10]])
+        self.module_type_id = ch.mktype(
+            category_id=TypeCategoryId.module,
+            attrs=module_attrs, effects=[online_effect, bonus_effect]).id
+        # Projectors: they apply stacking penalized ewar to ship attributes
+        ewar_attr = ch.mkattr()
+        ewar_effect = ch.mkeffect(
+            category_id=EffectCategoryId.target,
+            modifiers=[mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.target,
+                affectee_attr_id=a.id,
+                operator=ModOperator.post_percent,
+                affector_attr_id=ewar_attr.id)
+                for a in self.ship_attrs[:10]])
+        self.projector_type_id = ch.mktype(
+            category_id=TypeCategoryId.module,
+            attrs={ewar_attr.id: -20},
+            effects=[ewar_effect], default_effect=ewar_effect).id
+        self.source = Source('bench', ch)
+
+    def make_fit(self, batch=False):
+        fit = Fit(solar_system=SolarSystem(source=self.source))
+        if batch:
+            with fit.batch():
+                self.fill_fit(fit)
+        else:
+            self.fill_fit(fit)
+        return fit
+
+    def fill_fit(self, fit):
+        fit.ship = Ship(self.ship_type_id)
+        for skill_type_id in self.skill_type_ids:
+            fit.skills.add(Skill(skill_type_id, level=5))
+        for _ in range(HIGH_QUANTITY):
+            fit.modules.high.append(ModuleHigh(
+                self.module_type_id, state=State.online))
+        for _ in range(LOW_QUANTITY):
+            fit.modules.low.append(ModuleLow(
+                self.module_type_id, state=State.online))
+
+    def read_attrs(self, fit):
+        for attr in self.ship_attrs:
+            fit.ship.attrs.get(attr.id)
+        for module in fit.modules.items():
+            for attr in self.module_attrs:
+                module.attrs.get(attr.id)
+
+
+def bench_assemble(data, iterations):
+    """Assemble fit from scratch without calculating its attributes.
+
+    Returns:
+        Quantity of messages published by fits while they were assembled.
+    """
+    msg_count = 0
+
+    def count_publish(msg):
+        nonlocal msg_count
+        msg_count += 1
+        publish(msg)
+
+    def count_publish_bulk(msgs):
+        nonlocal msg_count
+        msgs = list(msgs)
+        msg_count += len(msgs)
+        publish_bulk(msgs)
+
+    for i in range(iterations):
+        fit = Fit(solar_system=SolarSystem(source=data.source))
+        # Messages are counted on the first fit only, all fits publish the
+        # same messages
+        if i == 0:
+            publish = fit._publish
+            publish_bulk = fit._publish_bulk
+            fit._publish = count_publish
+            fit._publish_bulk = count_publish_bulk
+        data.fill_fit(fit)
+    return msg_count * iterations
+
+
+def bench_build(data, iterations):
+    """Assemble fit from scratch and calculate its attributes."""
+    for _ in range(iterations):
+        fit = data.make_fit()
+        data.read_attrs(fit)
+
+
+def bench_build_batch(data, iterations):
+    """Assemble fit from scratch in batch mode and calculate its attributes."""
+    for _ in range(iterations):
+        fit = data.make_fit(batch=True)
+        data.read_attrs(fit)
+
+
+def bench_fork(data, iterations):
+    """Fork calculated fit and calculate attributes of the fork."""
+    fit = data.make_fit()
+    data.read_attrs(fit)
+    for _ in range(iterations):
+        fork = fit.fork()
+        data.read_attrs(fork)
+
+
+def bench_module_toggle(data, iterations):
+    """Switch module state back and forth, reading attributes each time."""
+    fit = data.make_fit()
+    data.read_attrs(fit)
+    module = fit.modules.low[0]
+    for i in range(iterations):
+        module.state = State.offline if i % 2 == 0 else State.online
+        data.read_attrs(fit)
+
+
+def bench_skill_toggle(data, iterations):
+    """Switch skill level back and forth, reading attributes each time."""
+    fit = data.make_fit()
+    data.read_attrs(fit)
+    skill_type_id = data.skill_type_ids[1]
+    skill = next(s for s in fit.skills if s._type_id == skill_type_id)
+    for i in range(iterations):
+        skill.level = 4 if i % 2 == 0 else 5
+        data.read_attrs(fit)
+
+
+def bench_ewar_toggle(data, iterations):
+    """Retarget projector back and forth, reading attributes each time."""
+    fit = data.make_fit()
+    src_fit = Fit(solar_system=fit.solar_system)
+    projectors = []
+    for _ in range(PROJECTOR_QUANTITY):
+        projector = ModuleHigh(data.projector_type_id, state=State.active)
+        src_fit.modules.high.append(projector)
+        projector.target = fit.ship
+        projectors.append(projector)
+    data.read_attrs(fit)
+    projector = projectors[0]
+    for i in range(iterations):
+        projector.target = None if i % 2 == 0 else fit.ship
+        data.read_attrs(fit)
+
+
+WORKLOADS = {
+    'assemble': (bench_assemble, 20),
+    'build': (bench_build, 20),
+    'build_batch': (bench_build_batch, 20),
+    'fork': (bench_fork, 20),
+    'module_toggle': (bench_module_toggle, 1000),
+    'skill_toggle': (bench_skill_toggle, 1000),
+    'ewar_toggle': (bench_ewar_toggle, 1000)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run Eos benchmarks')
+    parser.add_argument(
+        'workloads', nargs='*',
+        help='names of workloads to run, defaults to all workloads; '
+        'available: {}'.format(', '.join(WORKLOADS)))
+    parser.add_argument(
+        '-n', '--iterations', type=int, default=None,
+        help='override quantity of iterations for each workload')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='how many times to run each workload, best time is reported')
+    parser.add_argument(
+        '-i', '--incremental', action='store_true',
+        help='recalculate ship attributes incrementally')
+    args = parser.parse_args()
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            parser.error('unknown workload {}'.format(name))
+    data = BenchData()
+    if args.incremental:
+        Ship.incremental_attr_ids = frozenset(a.id for a in data.ship_attrs)
+    for name in args.workloads or WORKLOADS:
+        func, iterations = WORKLOADS[name]
+        if args.iterations is not None:
+            iterations = args.iterations
+        timings = []
+        for _ in range(args.repeat):
+            started = perf_counter()
+            msg_count = func(data, iterations)
+            timings.append(perf_counter() - started)
+        report = '{}: {} iterations, best {:.3f}s'.format(
+            name, iterations, min(timings))
+        # Workloads which report quantity of published messages get message
+        # rate reported too
+        if msg_count is not None:
+            report += ', {:.0f} msgs/s'.format(msg_count / min(timings))
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -19,15 +19,19 @@
 # ==============================================================================
 
 
+import gc
+import weakref
 from unittest.mock import MagicMock
 from unittest.mock import Mock
 
 import pytest
 
+from eos import SolarSystem
 from eos import SourceManager
 from eos.source import Source
 from eos.source.exception import ExistingSourceError
 from eos.source.exception import UnknownSourceError
+from eos.source.source import get_source_data
 
 
 @pytest.fixture
@@ -133,3 +137,57 @@ def test_list_source_correctly(mock_data_handler, mock_cache_handler):
 
     assert sorted(sources) == sorted(
         ['source one', 'source two', 'source three'])
+
+
+def make_attr(default_value):
+    return Mock(
+        default_value=default_value, high_is_good=True, stackable=True,
+        max_attr_id=None)
+
+
+def test_readd_after_cache_update(mock_data_handler, mock_cache_handler):
+    mock_cache_handler.get_attr = Mock(return_value=make_attr(1))
+    mock_cache_handler.get_buff_templates = Mock(return_value=[])
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+    source_data = get_source_data(SourceManager.get('test'))
+    assert source_data.attr_metadata[5].default_value == 1
+    source_data.get_buff_modifiers(10, 20)
+    assert mock_cache_handler.get_buff_templates.call_count == 1
+
+    SourceManager.remove('test')
+    mock_cache_handler.get_attr = Mock(return_value=make_attr(99))
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+    source_data = get_source_data(SourceManager.get('test'))
+
+    assert source_data.attr_metadata[5].default_value == 99
+    source_data.get_buff_modifiers(10, 20)
+    assert mock_cache_handler.get_buff_templates.call_count == 2
+
+
+def test_readd_solar_system_attr_metadata(
+        mock_data_handler, mock_cache_handler):
+    mock_cache_handler.get_attr = Mock(return_value=make_attr(1))
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+    solar_system_old = SolarSystem(source='test')
+    assert solar_system_old._calculator.attr_metadata[5].default_value == 1
+
+    SourceManager.remove('test')
+    mock_cache_handler.get_attr = Mock(return_value=make_attr(99))
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+    solar_system_new = SolarSystem(source='test')
+    solar_system_old.source = 'test'
+
+    assert solar_system_new._calculator.attr_metadata[5].default_value == 99
+    assert solar_system_old._calculator.attr_metadata[5].default_value == 99
+
+
+def test_source_data_released():
+    # Fixture keeps its objects alive, thus cache handler is made here
+    cache_handler = MagicMock()
+    cache_handler_ref = weakref.ref(cache_handler)
+    get_source_data(Source(alias='test', cache_handler=cache_handler))
+
+    del cache_handler
+    gc.collect()
+
+    assert cache_handler_ref() is None
@@ -0,0 +1,154 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Drone
+from eos import ModuleHigh
+from eos import Rig
+from eos import Ship
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestAffectionRegister(CalculatorTestCase):
+    """Check that affector specs are indexed by affectee attribute."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr1 = self.mkattr()
+        self.tgt_attr2 = self.mkattr()
+        self.src_attr = self.mkattr()
+        self.register = (
+            self.fit.solar_system._calculator.
+            _CalculationService__affections)
+        self.fit.ship = Ship(self.mktype().id)
+
+    def make_rig(self, tgt_attr, **kwargs):
+        modifier = self.mkmod(
+            affectee_attr_id=tgt_attr.id,
+            operator=ModOperator.post_percent,
+            affector_attr_id=self.src_attr.id,
+            **kwargs)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        return Rig(self.mktype(
+            attrs={self.src_attr.id: 20}, effects=[effect]).id)
+
+    def get_affector_items(self, affectee_item, tgt_attr):
+        return {
+            s.item for s in
+            self.register.get_affector_specs(affectee_item, tgt_attr.id)}
+
+    def get_storage(self, name):
+        return getattr(self.register, '_AffectionRegister__{}'.format(name))
+
+    def check_storage(self, affectee_item, storage_name, key, **kwargs):
+        rig1 = self.make_rig(self.tgt_attr1, **kwargs)
+        rig2 = self.make_rig(self.tgt_attr2, **kwargs)
+        storage = self.get_storage(storage_name)
+        # Action
+        self.fit.rigs.add(rig1)
+        self.fit.rigs.add(rig2)
+        # Verification
+        self.assertEqual(
+            self.get_affector_items(affectee_item, self.tgt_attr1), {rig1})
+        self.assertEqual(
+            self.get_affector_items(affectee_item, self.tgt_attr2), {rig2})
+        self.assertEqual(
+            set(storage[key]), {self.tgt_attr1.id, self.tgt_attr2.id})
+        # Action
+        self.fit.rigs.remove(rig1)
+        # Verification
+        self.assertEqual(
+            self.get_affector_items(affectee_item, self.tgt_attr1), set())
+        self.assertEqual(
+            self.get_affector_items(affectee_item, self.tgt_attr2), {rig2})
+        self.assertEqual(set(storage[key]), {self.tgt_attr2.id})
+        # Action
+        self.fit.rigs.remove(rig2)
+        # Verification
+        self.assertEqual(
+            self.get_affector_items(affectee_item, self.tgt_attr2), set())
+        self.assertNotIn(key, storage)
+
+    def test_item(self):
+        self.check_storage(
+            self.fit.ship, 'affectors_item_active', self.fit.ship,
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_domain(self):
+        module = ModuleHigh(self.mktype().id)
+        self.fit.modules.high.append(module)
+        self.check_storage(
+            module, 'affectors_domain', (self.fit, ModDomain.ship),
+            affectee_filter=ModAffecteeFilter.domain,
+            affectee_domain=ModDomain.ship)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_domain_group(self):
+        module = ModuleHigh(self.mktype(group_id=35).id)
+        self.fit.modules.high.append(module)
+        self.check_storage(
+            module, 'affectors_domain_group', (self.fit, ModDomain.ship, 35),
+            affectee_filter=ModAffecteeFilter.domain_group,
+            affectee_domain=ModDomain.ship,
+            affectee_filter_extra_arg=35)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_domain_skillrq(self):
+        module = ModuleHigh(self.mktype(attrs={
+            AttrId.required_skill_1: 56,
+            AttrId.required_skill_1_level: 1}).id)
+        self.fit.modules.high.append(module)
+        self.check_storage(
+            module, 'affectors_domain_skillrq',
+            (self.fit, ModDomain.ship, 56),
+            affectee_filter=ModAffecteeFilter.domain_skillrq,
+            affectee_domain=ModDomain.ship,
+            affectee_filter_extra_arg=56)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_owner_skillrq(self):
+        drone = Drone(self.mktype(attrs={
+            AttrId.required_skill_1: 56,
+            AttrId.required_skill_1_level: 1}).id)
+        self.fit.drones.add(drone)
+        self.check_storage(
+            drone, 'affectors_owner_skillrq', (self.fit, 56),
+            affectee_filter=ModAffecteeFilter.owner_skillrq,
+            affectee_domain=ModDomain.character,
+            affectee_filter_extra_arg=56)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
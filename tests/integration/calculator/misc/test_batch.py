@@ -0,0 +1,185 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Fit
+from eos import Ship
+from eos import Skill
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from eos.pubsub.message import AttrsValueChanged
+from eos.pubsub.subscriber import BaseSubscriber
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class AttrChangeRecorder(BaseSubscriber):
+
+    def __init__(self):
+        self.attr_changes = []
+        self.revised = []
+
+    def _handle_attrs_changed(self, msg):
+        self.attr_changes.append(msg.attr_changes)
+        self.revised.append(msg.revised)
+
+    _handler_map = {AttrsValueChanged: _handle_attrs_changed}
+
+
+class TestBatch(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.mkattr(attr_id=AttrId.skill_level)
+        self.tgt_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.mod_add,
+            affector_attr_id=AttrId.skill_level)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[modifier])
+        self.skill_type = self.mktype(effects=[effect])
+        self.ship_type = self.mktype(attrs={self.tgt_attr.id: 100})
+
+    def make_fit(self, fit):
+        ship = fit.ship = Ship(self.ship_type.id)
+        skill = Skill(self.skill_type.id, level=1)
+        fit.skills.add(skill)
+        self.assertAlmostEqual(ship.attrs[self.tgt_attr.id], 101)
+        recorder = AttrChangeRecorder()
+        fit._subscribe(recorder, recorder._handler_map.keys())
+        return ship, skill, recorder
+
+    def test_fit(self):
+        ship, skill, recorder = self.make_fit(self.fit)
+        # Action
+        with self.fit.batch():
+            skill.level = 2
+            skill.level = 3
+            # Verification
+            self.assertEqual(recorder.attr_changes, [])
+        # Verification
+        self.assertCountEqual(recorder.attr_changes, [
+            {skill: {AttrId.skill_level}},
+            {ship: {self.tgt_attr.id}}])
+        self.assertAlmostEqual(ship.attrs[self.tgt_attr.id], 103)
+        # Cleanup
+        self.fit._unsubscribe(recorder, recorder._handler_map.keys())
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fit_nested(self):
+        ship, skill, recorder = self.make_fit(self.fit)
+        # Action
+        with self.fit.batch():
+            with self.fit.batch():
+                skill.level = 2
+            # Verification
+            self.assertEqual(recorder.attr_changes, [])
+            # Action
+            skill.level = 3
+        # Verification
+        self.assertCountEqual(recorder.attr_changes, [
+            {skill: {AttrId.skill_level}},
+            {ship: {self.tgt_attr.id}}])
+        self.assertAlmostEqual(ship.attrs[self.tgt_attr.id], 103)
+        # Cleanup
+        self.fit._unsubscribe(recorder, recorder._handler_map.keys())
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fit_exception(self):
+        ship, skill, recorder = self.make_fit(self.fit)
+        # Action
+        with self.assertRaises(ZeroDivisionError):
+            with self.fit.batch():
+                skill.level = 2
+                1 / 0
+        # Verification
+        self.assertCountEqual(recorder.attr_changes, [
+            {skill: {AttrId.skill_level}},
+            {ship: {self.tgt_attr.id}}])
+        self.assertAlmostEqual(ship.attrs[self.tgt_attr.id], 102)
+        # Cleanup
+        self.fit._unsubscribe(recorder, recorder._handler_map.keys())
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fit_item_removed(self):
+        ship, skill, recorder = self.make_fit(self.fit)
+        # Action
+        with self.fit.batch():
+            skill.level = 2
+            self.fit.skills.remove(skill)
+        # Verification
+        self.assertEqual(recorder.attr_changes, [{ship: {self.tgt_attr.id}}])
+        self.assertAlmostEqual(ship.attrs[self.tgt_attr.id], 100)
+        # Cleanup
+        self.fit._unsubscribe(recorder, recorder._handler_map.keys())
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_solar_system(self):
+        fit2 = Fit(solar_system=self.fit.solar_system)
+        ship1, skill1, recorder1 = self.make_fit(self.fit)
+        ship2, skill2, recorder2 = self.make_fit(fit2)
+        # Action
+        with self.fit.solar_system.batch():
+            skill1.level = 2
+            skill2.level = 3
+            # Verification
+            self.assertEqual(recorder1.attr_changes, [])
+            self.assertEqual(recorder2.attr_changes, [])
+        # Verification
+        self.assertCountEqual(recorder1.attr_changes, [
+            {skill1: {AttrId.skill_level}},
+            {ship1: {self.tgt_attr.id}}])
+        self.assertCountEqual(recorder2.attr_changes, [
+            {skill2: {AttrId.skill_level}},
+            {ship2: {self.tgt_attr.id}}])
+        self.assertAlmostEqual(ship1.attrs[self.tgt_attr.id], 102)
+        self.assertAlmostEqual(ship2.attrs[self.tgt_attr.id], 103)
+        # Cleanup
+        self.fit._unsubscribe(recorder1, recorder1._handler_map.keys())
+        fit2._unsubscribe(recorder2, recorder2._handler_map.keys())
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fit_revised(self):
+        # Batched messages published by calculator keep their revised status,
+        # thus dependents of changed attributes are not invalidated again
+        ship, skill, recorder = self.make_fit(self.fit)
+        # Action
+        with self.fit.batch():
+            self.fit.skills.add(Skill(self.mktype(
+                effects=self.skill_type.effects.values()).id, level=2))
+        # Verification
+        self.assertEqual(recorder.attr_changes, [{ship: {self.tgt_attr.id}}])
+        self.assertEqual(recorder.revised, [True])
+        self.assertAlmostEqual(ship.attrs[self.tgt_attr.id], 103)
+        # Cleanup
+        self.fit._unsubscribe(recorder, recorder._handler_map.keys())
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
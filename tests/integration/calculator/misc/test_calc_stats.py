@@ -0,0 +1,145 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Fit
+from eos import Ship
+from eos import Skill
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestCalcStats(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.mkattr(attr_id=AttrId.skill_level)
+        self.tgt_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.mod_add,
+            affector_attr_id=AttrId.skill_level)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        self.skill_type = self.mktype(effects=[effect])
+        self.ship_type = self.mktype(attrs={self.tgt_attr.id: 100})
+        self.fit.ship = Ship(self.ship_type.id)
+        self.skill = Skill(self.skill_type.id, level=2)
+        self.fit.skills.add(self.skill)
+
+    def test_reads(self):
+        self.fit.reset_calc_stats()
+        # Action
+        for _ in range(3):
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 102)
+        # Verification
+        stats = self.fit.get_calc_stats()
+        self.assertEqual(stats['calculations'], 1)
+        self.assertEqual(stats['cache_hits'], 2)
+        # Skill level is provided by override callback
+        self.assertEqual(stats['override_calls'], 1)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_invalidations(self):
+        self.fit.ship.attrs[self.tgt_attr.id]
+        self.fit.reset_calc_stats()
+        # Action
+        self.skill.level = 5
+        # Verification
+        stats = self.fit.get_calc_stats()
+        self.assertEqual(stats['invalidations'], 1)
+        # Messages about skill level and about ship attribute
+        self.assertEqual(stats['attr_change_msgs'], 2)
+        self.assertEqual(stats['attr_change_msg_attrs'], 2)
+        self.assertAlmostEqual(stats['attr_change_msg_avg_size'], 1)
+        # Action
+        self.skill.level = 3
+        # Verification
+        stats = self.fit.get_calc_stats()
+        self.assertEqual(stats['invalidations'], 1)
+        self.assertEqual(stats['invalidation_misses'], 1)
+        self.assertEqual(stats['attr_change_msgs'], 3)
+        self.assertEqual(stats['calculations'], 0)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_specs(self):
+        self.fit.reset_calc_stats()
+        # Action
+        self.fit.skills.add(Skill(self.mktype(
+            effects=self.skill_type.effects.values()).id))
+        # Verification
+        self.assertEqual(
+            self.fit.get_calc_stats()['affector_specs_registered'], 1)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_reset(self):
+        self.fit.ship.attrs[self.tgt_attr.id]
+        self.skill.level = 5
+        # Action
+        self.fit.reset_calc_stats()
+        # Verification
+        stats = self.fit.get_calc_stats()
+        self.assertEqual(set(stats.values()), {0})
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_solar_system(self):
+        fit = Fit(solar_system=self.fit.solar_system)
+        fit.ship = Ship(self.ship_type.id)
+        self.fit.solar_system.reset_calc_stats()
+        # Action
+        self.fit.ship.attrs[self.tgt_attr.id]
+        fit.ship.attrs[self.tgt_attr.id]
+        # Verification
+        stats = self.fit.solar_system.get_calc_stats()
+        self.assertEqual(stats['calculations'], 2)
+        self.assertEqual(
+            stats['calculations'],
+            self.fit.get_calc_stats()['calculations'] +
+            fit.get_calc_stats()['calculations'])
+        self.assertIn('equivalent_values_shared', stats)
+        self.assertIn('equivalent_values_unshared', stats)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_no_solar_system(self):
+        fit = Fit(solar_system=None)
+        fit.ship = Ship(self.ship_type.id)
+        # Action
+        stats = fit.get_calc_stats()
+        # Verification
+        self.assertEqual(set(stats.values()), {0})
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
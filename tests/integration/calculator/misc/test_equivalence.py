@@ -0,0 +1,205 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Charge
+from eos import Drone
+from eos import Fit
+from eos import Implant
+from eos import ModuleHigh
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestEquivalence(CalculatorTestCase):
+    """Check that items which share attribute values stay correct."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr()
+        self.own_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        own_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.self,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.own_attr.id)
+        self.own_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[own_modifier])
+        self.online_effect = self.mkeffect(
+            effect_id=16, category_id=EffectCategoryId.online)
+        self.item_type = self.mktype(
+            attrs={self.tgt_attr.id: 10, self.own_attr.id: 2},
+            effects=[self.online_effect, self.own_effect])
+        implant_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.domain,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.own_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        implant_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[implant_modifier])
+        self.implant = Implant(self.mktype(
+            attrs={self.src_attr.id: 1.5}, effects=[implant_effect]).id)
+        self.fit.implants.add(self.implant)
+
+    def make_module(self, state=State.online):
+        module = ModuleHigh(self.item_type.id, state=state)
+        self.fit.modules.high.append(module)
+        return module
+
+    def test_shared(self):
+        module1 = self.make_module()
+        module2 = self.make_module()
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 30)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 30)
+        stats = self.fit.solar_system._calculator.equivalence_stats
+        self.assertGreater(stats['shared'], 0)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_shared_input_change(self):
+        # Inputs of shared value have to be tracked for item which took it
+        module1 = self.make_module()
+        module2 = self.make_module()
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 30)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 30)
+        # Action
+        self.fit.implants.remove(self.implant)
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 20)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 20)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_state_differs(self):
+        module1 = self.make_module()
+        module2 = self.make_module(state=State.offline)
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 30)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 10)
+        # Action
+        module2.state = State.online
+        # Verification
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 30)
+        # Action
+        module1.state = State.offline
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 10)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 30)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_charge_differs(self):
+        charge_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.other,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_percent,
+            affector_attr_id=self.src_attr.id)
+        charge_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[charge_modifier])
+        charge_type = self.mktype(
+            attrs={self.src_attr.id: 50}, effects=[charge_effect])
+        module1 = self.make_module()
+        module2 = self.make_module()
+        module1.charge = Charge(charge_type.id)
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 45)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 30)
+        # Action
+        module2.charge = Charge(charge_type.id)
+        # Verification
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 45)
+        # Action
+        module1.charge = None
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 30)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 45)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_override(self):
+        module1 = self.make_module()
+        module2 = self.make_module()
+        module1.attrs._set_override_callback(
+            self.own_attr.id, (lambda: 4, (), {}))
+        # Verification
+        self.assertAlmostEqual(module1.attrs[self.tgt_attr.id], 40)
+        self.assertAlmostEqual(module2.attrs[self.tgt_attr.id], 30)
+        # Cleanup
+        module1.attrs._del_override_callback(self.own_attr.id)
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_projected(self):
+        proj_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.target,
+            affectee_attr_id=self.own_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        proj_effect = self.mkeffect(
+            category_id=EffectCategoryId.target,
+            modifiers=[proj_modifier])
+        projector = ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: 3},
+                effects=[proj_effect],
+                default_effect=proj_effect).id,
+            state=State.active)
+        src_fit = Fit(solar_system=self.fit.solar_system)
+        src_fit.modules.high.append(projector)
+        drone1 = Drone(self.item_type.id, state=State.online)
+        drone2 = Drone(self.item_type.id, state=State.online)
+        self.fit.drones.add(drone1)
+        self.fit.drones.add(drone2)
+        self.assertAlmostEqual(drone1.attrs[self.tgt_attr.id], 20)
+        self.assertAlmostEqual(drone2.attrs[self.tgt_attr.id], 20)
+        # Action
+        projector.target = drone1
+        # Verification
+        self.assertAlmostEqual(drone1.attrs[self.tgt_attr.id], 60)
+        self.assertAlmostEqual(drone2.attrs[self.tgt_attr.id], 20)
+        # Action
+        drone3 = Drone(self.item_type.id, state=State.online)
+        self.fit.drones.add(drone3)
+        # Verification
+        self.assertAlmostEqual(drone3.attrs[self.tgt_attr.id], 20)
+        # Action
+        projector.target = None
+        # Verification
+        self.assertAlmostEqual(drone1.attrs[self.tgt_attr.id], 20)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
@@ -0,0 +1,172 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Implant
+from eos import ModuleHigh
+from eos import Ship
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModAggregateMode
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from eos.const.eve import TypeCategoryId
+from eos.eve_obj.modifier import DogmaModifier
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestExplain(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.cap_attr = self.mkattr()
+        self.tgt_attr = self.mkattr(
+            stackable=False, max_attr_id=self.cap_attr.id)
+        self.src_attr = self.mkattr()
+        implant_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[self.mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=ModOperator.mod_add,
+                affector_attr_id=self.src_attr.id)])
+        self.implant = Implant(self.mktype(
+            category_id=TypeCategoryId.implant,
+            attrs={self.src_attr.id: 5},
+            effects=[implant_effect]).id)
+        self.module_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[self.mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=ModOperator.post_percent,
+                affector_attr_id=self.src_attr.id)])
+        self.online_effect = self.mkeffect(
+            effect_id=16, category_id=EffectCategoryId.online)
+        self.module1 = self.make_module(10, self.module_effect)
+        self.module2 = self.make_module(20, self.module_effect)
+        self.fit.ship = Ship(self.mktype(
+            attrs={self.tgt_attr.id: 100, self.cap_attr.id: 1000}).id)
+        self.fit.implants.add(self.implant)
+        self.fit.modules.high.append(self.module1)
+        self.fit.modules.high.append(self.module2)
+
+    def make_module(self, src_value, effect):
+        return ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: src_value},
+                effects=[self.online_effect, effect]).id,
+            state=State.online)
+
+    def test_modifications(self):
+        # Action
+        explanation = self.fit.ship.attrs.explain(self.tgt_attr.id)
+        # Verification
+        self.assertEqual(explanation.attr_id, self.tgt_attr.id)
+        self.assertAlmostEqual(explanation.base_value, 100)
+        self.assertEqual(len(explanation.modifications), 3)
+        # Modifications are listed in order of operator application
+        mod_implant = explanation.modifications[0]
+        mods = {m.affector_item: m for m in explanation.modifications}
+        mod_module_strong = mods[self.module2]
+        mod_module_weak = mods[self.module1]
+        self.assertIs(mod_implant.affector_item, self.implant)
+        self.assertIs(mod_implant.operator, ModOperator.mod_add)
+        self.assertAlmostEqual(mod_implant.raw_value, 5)
+        self.assertAlmostEqual(mod_implant.normalized_value, 5)
+        self.assertAlmostEqual(mod_implant.resist_value, 1)
+        self.assertIs(mod_implant.aggregate_mode, ModAggregateMode.stack)
+        self.assertIsNone(mod_implant.penalty_position)
+        self.assertIs(mod_implant.applied, True)
+        self.assertIs(mod_module_strong.operator, ModOperator.post_percent)
+        self.assertAlmostEqual(mod_module_strong.raw_value, 20)
+        self.assertAlmostEqual(mod_module_strong.normalized_value, 0.2)
+        self.assertEqual(mod_module_strong.penalty_position, 0)
+        self.assertIs(mod_module_strong.applied, True)
+        self.assertAlmostEqual(mod_module_weak.normalized_value, 0.1)
+        self.assertEqual(mod_module_weak.penalty_position, 1)
+        self.assertIs(mod_module_weak.applied, True)
+        self.assertAlmostEqual(explanation.uncapped_value, 136.9509118)
+        self.assertEqual(explanation.cap_attr_id, self.cap_attr.id)
+        self.assertAlmostEqual(explanation.cap_value, 1000)
+        self.assertIs(explanation.rounded, False)
+        self.assertAlmostEqual(explanation.value, 136.9509118)
+        self.assertAlmostEqual(
+            explanation.value, self.fit.ship.attrs[self.tgt_attr.id])
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_aggregated(self):
+        aggregate_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[DogmaModifier(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=ModOperator.post_percent,
+                aggregate_mode=ModAggregateMode.maximum,
+                aggregate_key=1,
+                affector_attr_id=self.src_attr.id)])
+        module_picked = self.make_module(40, aggregate_effect)
+        module_dropped = self.make_module(30, aggregate_effect)
+        self.fit.modules.high.append(module_picked)
+        self.fit.modules.high.append(module_dropped)
+        # Action
+        explanation = self.fit.ship.attrs.explain(self.tgt_attr.id)
+        # Verification
+        mods = {m.affector_item: m for m in explanation.modifications}
+        self.assertEqual(len(mods), 5)
+        self.assertEqual(mods[module_picked].penalty_position, 0)
+        self.assertIs(mods[module_picked].applied, True)
+        self.assertIsNone(mods[module_dropped].penalty_position)
+        self.assertIs(mods[module_dropped].applied, False)
+        self.assertEqual(mods[self.module2].penalty_position, 1)
+        self.assertEqual(mods[self.module1].penalty_position, 2)
+        self.assertAlmostEqual(explanation.uncapped_value, 182.397661)
+        self.assertAlmostEqual(explanation.value, 182.397661)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_capped(self):
+        self.fit.ship = Ship(self.mktype(
+            attrs={self.tgt_attr.id: 100, self.cap_attr.id: 120}).id)
+        # Action
+        explanation = self.fit.ship.attrs.explain(self.tgt_attr.id)
+        # Verification
+        self.assertAlmostEqual(explanation.uncapped_value, 136.9509118)
+        self.assertAlmostEqual(explanation.cap_value, 120)
+        self.assertAlmostEqual(explanation.value, 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_not_calculated(self):
+        # Action
+        with self.assertRaises(KeyError):
+            self.fit.ship.attrs.explain(self.mkattr().id)
+        # Verification
+        self.assert_log_entries(1)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
@@ -0,0 +1,294 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Charge
+from eos import Fit
+from eos import Implant
+from eos import ModuleHigh
+from eos import Ship
+from eos import Skill
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestFork(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.mkattr(attr_id=AttrId.skill_level)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        skill_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.mod_add,
+            affector_attr_id=AttrId.skill_level)
+        skill_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[skill_modifier])
+        self.skill_type = self.mktype(effects=[skill_effect])
+        module_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        module_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[module_modifier])
+        online_effect = self.mkeffect(
+            effect_id=16, category_id=EffectCategoryId.online)
+        self.module_type = self.mktype(
+            attrs={self.src_attr.id: 2},
+            effects=[online_effect, module_effect])
+        charge_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.other,
+            affectee_attr_id=self.src_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        charge_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[charge_modifier])
+        self.charge_type = self.mktype(
+            attrs={self.src_attr.id: 3}, effects=[charge_effect])
+        self.ship_type = self.mktype(attrs={self.tgt_attr.id: 100})
+
+    def make_fit(self):
+        self.fit.ship = Ship(self.ship_type.id)
+        self.fit.skills.add(Skill(self.skill_type.id, level=2))
+        self.fit.modules.high.place(1, ModuleHigh(
+            self.module_type.id, state=State.online,
+            charge=Charge(self.charge_type.id)))
+        # (100 + 2) * 2 * 3
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+
+    def test_setup(self):
+        self.make_fit()
+        # Action
+        fork = self.fit.fork()
+        # Verification
+        self.assertIsNot(fork.solar_system, self.fit.solar_system)
+        self.assertIs(fork.solar_system.source, self.fit.solar_system.source)
+        self.assertIsNot(fork.ship, self.fit.ship)
+        self.assertEqual(len(fork.skills), 1)
+        fork_skill = next(iter(fork.skills))
+        self.assertEqual(fork_skill.level, 2)
+        self.assertIsNone(fork.modules.high[0])
+        fork_module = fork.modules.high[1]
+        self.assertIsNot(fork_module, self.fit.modules.high[1])
+        self.assertIs(fork_module.state, State.online)
+        self.assertEqual(fork_module.charge._type_id, self.charge_type.id)
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 612)
+        self.assertAlmostEqual(fork_module.attrs[self.src_attr.id], 6)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fork_change(self):
+        self.make_fit()
+        fork = self.fit.fork()
+        # Action
+        next(iter(fork.skills)).level = 5
+        fork.modules.high[1].charge = None
+        # Verification
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 210)
+        self.assertAlmostEqual(fork.modules.high[1].attrs[self.src_attr.id], 2)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        self.assertAlmostEqual(
+            self.fit.modules.high[1].attrs[self.src_attr.id], 6)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_parent_change(self):
+        self.make_fit()
+        fork = self.fit.fork()
+        # Action
+        self.fit.modules.high[1].state = State.offline
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 102)
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 612)
+        # Action
+        fork.modules.high[1].state = State.offline
+        # Verification
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 102)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_not_alone(self):
+        # Values calculated in crowded solar system are not shared, since
+        # fork does not carry other fits over
+        proj_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.target,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        proj_effect = self.mkeffect(
+            category_id=EffectCategoryId.target,
+            modifiers=[proj_modifier])
+        projector = ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: 0.5},
+                effects=[proj_effect],
+                default_effect=proj_effect).id,
+            state=State.active)
+        src_fit = Fit(solar_system=self.fit.solar_system)
+        src_fit.modules.high.append(projector)
+        self.make_fit()
+        projector.target = self.fit.ship
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 306)
+        # Action
+        fork = self.fit.fork()
+        # Verification
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        projector.target = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_own_target(self):
+        # Fork does not carry targets over, thus values calculated with
+        # projections within the fit are not shared
+        proj_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.target,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        proj_effect = self.mkeffect(
+            category_id=EffectCategoryId.target,
+            modifiers=[proj_modifier])
+        projector = ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: 0.5},
+                effects=[proj_effect],
+                default_effect=proj_effect).id,
+            state=State.active)
+        self.fit.ship = Ship(self.ship_type.id)
+        self.fit.modules.high.append(projector)
+        projector.target = self.fit.ship
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 50)
+        # Action
+        fork = self.fit.fork()
+        # Verification
+        self.assertIsNone(fork.modules.high[0].target)
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 100)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 50)
+        # Cleanup
+        projector.target = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fork_items_isolated(self):
+        self.make_fit()
+        fork = self.fit.fork()
+        # Action
+        fork.implants.add(Implant(self.mktype().id))
+        fork.modules.high.free(1)
+        fork.ship = Ship(self.ship_type.id)
+        # Verification
+        self.assertEqual(len(fork.implants), 1)
+        self.assertEqual(len(self.fit.implants), 0)
+        self.assertEqual(len(fork.modules.high), 0)
+        self.assertEqual(len(self.fit.modules.high), 2)
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 102)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_parent_items_isolated(self):
+        self.make_fit()
+        fork = self.fit.fork()
+        # Action
+        self.fit.implants.add(Implant(self.mktype().id))
+        self.fit.modules.high.free(1)
+        self.fit.skills.clear()
+        # Verification
+        self.assertEqual(len(self.fit.implants), 1)
+        self.assertEqual(len(fork.implants), 0)
+        self.assertEqual(len(self.fit.modules.high), 0)
+        self.assertEqual(len(fork.modules.high), 2)
+        self.assertEqual(len(fork.skills), 1)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 100)
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_values_shared(self):
+        self.make_fit()
+        # Action
+        fork = self.fit.fork()
+        fork.reset_calc_stats()
+        # Verification
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 612)
+        self.assertEqual(fork.get_calc_stats()['calculations'], 0)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_shared_values_parent_write(self):
+        self.make_fit()
+        fork = self.fit.fork()
+        fork.reset_calc_stats()
+        # Action
+        next(iter(self.fit.skills)).level = 5
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 630)
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 612)
+        self.assertEqual(fork.get_calc_stats()['calculations'], 0)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
+
+    def test_shared_values_fork_write(self):
+        self.make_fit()
+        fork = self.fit.fork()
+        self.fit.reset_calc_stats()
+        # Action
+        next(iter(fork.skills)).level = 5
+        # Verification
+        self.assertAlmostEqual(fork.ship.attrs[self.tgt_attr.id], 630)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        self.assertEqual(self.fit.get_calc_stats()['calculations'], 0)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_solsys_buffers_empty(fork.solar_system)
+        self.assert_log_entries(0)
@@ -0,0 +1,158 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import ModuleHigh
+from eos import Ship
+from eos import Skill
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModAggregateMode
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from eos.eve_obj.modifier import DogmaModifier
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class IncrementalShip(Ship):
+
+    incremental_attr_ids = frozenset()
+
+
+class TestIncremental(CalculatorTestCase):
+    """Check that incrementally recalculated values follow changes."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.mkattr(attr_id=AttrId.skill_level)
+        self.tgt_attr = self.mkattr(stackable=False)
+        self.src_attr = self.mkattr()
+        skill_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.domain,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.src_attr.id,
+            operator=ModOperator.mod_add,
+            affector_attr_id=AttrId.skill_level)
+        skill_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[skill_modifier])
+        self.skill = Skill(self.mktype(effects=[skill_effect]).id, level=0)
+        self.module_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[self.mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=ModOperator.post_percent,
+                affector_attr_id=self.src_attr.id)])
+        self.online_effect = self.mkeffect(
+            effect_id=16, category_id=EffectCategoryId.online)
+        self.module1 = self.make_module(10, self.module_effect)
+        self.module2 = self.make_module(20, self.module_effect)
+        IncrementalShip.incremental_attr_ids = frozenset((self.tgt_attr.id,))
+        self.fit.ship = IncrementalShip(
+            self.mktype(attrs={self.tgt_attr.id: 100}).id)
+        self.fit.skills.add(self.skill)
+        self.fit.modules.high.append(self.module1)
+        self.fit.modules.high.append(self.module2)
+        # Value is calculated twice for plan to be made
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 130.4294398)
+        self.fit.ship.attrs._force_recalc(self.tgt_attr.id)
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 130.4294398)
+
+    def make_module(self, src_value, effect, state=State.online):
+        return ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: src_value},
+                effects=[self.online_effect, effect]).id,
+            state=state)
+
+    def test_modification_changed(self):
+        # Action
+        self.skill.level = 5
+        # Verification
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 141.2959996)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_modification_changed_uncalculated(self):
+        # Changes are tracked even when value is not calculated
+        # Action
+        self.skill.level = 5
+        self.skill.level = 3
+        # Verification
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 136.8972285)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_spec_added(self):
+        # Action
+        self.fit.modules.high.append(self.make_module(-30, self.module_effect))
+        # Verification
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 91.3006078)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_spec_removed(self):
+        # Action
+        self.module1.state = State.offline
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 120)
+        # Action
+        self.module1.state = State.online
+        # Verification
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 130.4294398)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_aggregated(self):
+        # Aggregated penalized modifications are penalized together with
+        # stacked ones
+        aggregate_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[DogmaModifier(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=ModOperator.post_percent,
+                aggregate_mode=ModAggregateMode.maximum,
+                aggregate_key=1,
+                affector_attr_id=self.src_attr.id)])
+        # Action
+        self.fit.modules.high.append(self.make_module(50, aggregate_effect))
+        self.fit.modules.high.append(self.make_module(40, aggregate_effect))
+        # Verification
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[self.tgt_attr.id], 186.1200622)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
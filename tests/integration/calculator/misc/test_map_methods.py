@@ -89,6 +89,20 @@ class TestMapMethods(CalculatorTestCase):
         # value generate errors, which is not related to this test
         self.assert_log_entries(2)
 
+    def test_getattr_repeated(self):
+        # Values are served from storage on subsequent requests. Unmodified
+        # values are read from item type, thus their type is kept intact
+        self.calculate_attrs()
+        self.assertAlmostEqual(self.item.attrs[self.attr1.id], 20)
+        self.assertAlmostEqual(self.item.attrs[self.attr2.id], 40)
+        self.assertAlmostEqual(self.item.attrs[self.attr3.id], 44)
+        self.assertEqual(self.item.attrs[self.attr5.id], 4)
+        self.assertIsInstance(self.item.attrs[self.attr5.id], int)
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        # Attempt to fetch attribute without base value generates error, which
+        # is not related to this test
+        self.assert_log_entries(1)
+
     def test_getattr_not_loaded(self):
         self.fit.solar_system.source = None
         with self.assertRaises(KeyError):
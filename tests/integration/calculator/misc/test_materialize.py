@@ -0,0 +1,125 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Implant
+from eos import Rig
+from eos import Ship
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestMaterialize(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.capping_attr = self.mkattr(default_value=5)
+        self.capped_attr = self.mkattr(max_attr_id=self.capping_attr.id)
+        self.src_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.capped_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        self.implant = Implant(self.mktype(
+            attrs={self.src_attr.id: 1.5}, effects=[effect]).id)
+        self.ship = Ship(self.mktype(
+            attrs={self.capped_attr.id: 3, self.capping_attr.id: 8}).id)
+        self.fit.ship = self.ship
+        self.fit.implants.add(self.implant)
+
+    def test_item(self):
+        # Action
+        values = self.ship.attrs.materialize()
+        # Verification
+        self.assertEqual(len(values), 2)
+        self.assertAlmostEqual(values[self.capped_attr.id], 4.5)
+        self.assertAlmostEqual(values[self.capping_attr.id], 8)
+        self.assertEqual(values, dict(self.ship.attrs.items()))
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_item_attr_ids(self):
+        # Action
+        values = self.ship.attrs.materialize(
+            (self.capped_attr.id, self.src_attr.id))
+        # Verification
+        self.assertEqual(len(values), 2)
+        self.assertAlmostEqual(values[0], 4.5)
+        self.assertIsNone(values[1])
+        self.assert_log_entries(1)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+
+    def test_item_capped(self):
+        self.ship.attrs._set_override_callback(
+            self.capping_attr.id, (lambda: 4, (), {}))
+        # Action
+        values = self.ship.attrs.materialize((self.capped_attr.id,))
+        # Verification
+        self.assertEqual(len(values), 1)
+        self.assertAlmostEqual(values[0], 4)
+        # Action
+        self.ship.attrs._del_override_callback(self.capping_attr.id)
+        # Verification
+        self.assertAlmostEqual(self.ship.attrs[self.capped_attr.id], 4.5)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fit(self):
+        # Action
+        values = self.fit.materialize_attrs()
+        # Verification
+        self.assertEqual(
+            list(values), [self.fit.character, self.ship, self.implant])
+        self.assertEqual(len(values[self.ship]), 2)
+        self.assertAlmostEqual(values[self.ship][self.capped_attr.id], 4.5)
+        self.assertEqual(len(values[self.implant]), 1)
+        self.assertAlmostEqual(values[self.implant][self.src_attr.id], 1.5)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fit_attr_ids(self):
+        rig = Rig(self.mktype(attrs={self.capped_attr.id: 1}).id)
+        self.fit.rigs.add(rig)
+        # Action
+        values = self.fit.materialize_attrs(
+            items=(rig, self.ship),
+            attr_ids=(self.capped_attr.id, self.capping_attr.id))
+        # Verification
+        self.assertEqual(list(values), [rig, self.ship])
+        rows = list(values.values())
+        self.assertEqual(len(rows), 2)
+        self.assertAlmostEqual(rows[0][0], 1)
+        self.assertAlmostEqual(rows[0][1], 5)
+        self.assertAlmostEqual(rows[1][0], 4.5)
+        self.assertAlmostEqual(rows[1][1], 8)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
@@ -19,6 +19,7 @@
 # ==============================================================================
 
 
+from eos import Implant
 from eos import ModuleHigh
 from eos import Ship
 from eos import State
@@ -78,9 +79,25 @@ class TestModifierPython(CalculatorTestCase):
                     return True
                 return False
 
+        revisions = self.revisions = []
+
+        class TestDeclaredPythonModifier(TestPythonModifier):
+
+            @property
+            def revise_attr_deps(self):
+                return (ModDomain.self, attr2.id), (ModDomain.ship, attr3.id)
+
+            def revise_modification(self, msg, affector_item):
+                revisions.append(msg)
+                return TestPythonModifier.revise_modification(
+                    self, msg, affector_item)
+
         self.python_effect = self.mkeffect(
             category_id=EffectCategoryId.online,
             modifiers=(TestPythonModifier(),))
+        self.declared_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=(TestDeclaredPythonModifier(),))
         self.online_effect = self.mkeffect(
             effect_id=EffectId.online,
             category_id=EffectCategoryId.online)
@@ -189,3 +206,91 @@ class TestModifierPython(CalculatorTestCase):
         self.fit.ship = None
         self.assert_solsys_buffers_empty(self.fit.solar_system)
         self.assert_log_entries(0)
+
+    def test_declared_item_attr_change(self):
+        attr4 = self.mkattr()
+        dogma_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.self,
+            affectee_attr_id=self.attr2.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=attr4.id)
+        dogma_effect = self.mkeffect(
+            category_id=EffectCategoryId.active, modifiers=[dogma_modifier])
+        item = ModuleHigh(self.mktype(
+            attrs={self.attr1.id: 100, self.attr2.id: 2, attr4.id: 5},
+            effects=(self.declared_effect, self.online_effect, dogma_effect),
+            default_effect=dogma_effect).id)
+        self.fit.modules.high.append(item)
+        item.state = State.online
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        # Action
+        item.state = State.active
+        # Verification
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 3000)
+        # Cleanup
+        self.fit.ship = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_declared_ship_attr_change(self):
+        attr4 = self.mkattr()
+        dogma_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.attr3.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=attr4.id)
+        dogma_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[dogma_modifier])
+        implant = Implant(self.mktype(
+            attrs={attr4.id: 5}, effects=[dogma_effect]).id)
+        item = ModuleHigh(self.mktype(
+            attrs={self.attr1.id: 100, self.attr2.id: 2},
+            effects=(self.declared_effect, self.online_effect)).id)
+        self.fit.modules.high.append(item)
+        item.state = State.online
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 3000)
+        # Cleanup
+        self.fit.ship = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_declared_unrelated_change(self):
+        # Modifier which declared its dependencies should not receive
+        # messages about attributes it does not depend on
+        attr4 = self.mkattr()
+        dogma_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.attr2.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=attr4.id)
+        dogma_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[dogma_modifier])
+        implant = Implant(self.mktype(
+            attrs={attr4.id: 5}, effects=[dogma_effect]).id)
+        self.fit.ship = Ship(self.mktype(
+            attrs={self.attr2.id: 2, self.attr3.id: 3}).id)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.attr2.id], 2)
+        item = ModuleHigh(self.mktype(
+            attrs={self.attr1.id: 100, self.attr2.id: 2},
+            effects=(self.declared_effect, self.online_effect)).id)
+        self.fit.modules.high.append(item)
+        item.state = State.online
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        del self.revisions[:]
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.attr2.id], 10)
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        self.assertEqual(len(self.revisions), 0)
+        # Cleanup
+        self.fit.ship = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
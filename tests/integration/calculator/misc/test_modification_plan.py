@@ -0,0 +1,169 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import ModuleHigh
+from eos import Ship
+from eos import Skill
+from eos import State
+from eos.calculator.map import EMPTY_PLAN
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestModificationPlan(CalculatorTestCase):
+    """Check that modification plans follow changes of affector specs."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.mkattr(attr_id=AttrId.skill_level)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        skill_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[self.mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=ModOperator.mod_add,
+                affector_attr_id=AttrId.skill_level)])
+        self.skill = Skill(self.mktype(effects=[skill_effect]).id, level=1)
+        self.online_effect = self.mkeffect(
+            effect_id=16, category_id=EffectCategoryId.online)
+        self.ship = Ship(self.mktype(attrs={self.tgt_attr.id: 100}).id)
+        self.fit.ship = self.ship
+        self.fit.skills.add(self.skill)
+        # Value is calculated twice for plan to be made
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 101)
+        self.ship.attrs._force_recalc(self.tgt_attr.id)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 101)
+
+    def make_module(self, operator, src_value):
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[self.mkmod(
+                affectee_filter=ModAffecteeFilter.item,
+                affectee_domain=ModDomain.ship,
+                affectee_attr_id=self.tgt_attr.id,
+                operator=operator,
+                affector_attr_id=self.src_attr.id)])
+        return ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: src_value},
+                effects=[self.online_effect, effect]).id,
+            state=State.online)
+
+    def get_plan(self):
+        return self.ship.attrs._MutableAttrMap__plans[self.tgt_attr.id]
+
+    def get_plan_items(self):
+        items = set()
+        for bucket in self.get_plan().buckets:
+            for affector_spec in bucket.stack | bucket.stack_penalized:
+                items.add(affector_spec.item)
+        return items
+
+    def test_spec_added(self):
+        plan = self.get_plan()
+        module = self.make_module(ModOperator.post_mul, 2)
+        # Action
+        self.fit.modules.high.append(module)
+        # Verification
+        self.assertIs(self.get_plan(), plan)
+        self.assertEqual(self.get_plan_items(), {self.skill, module})
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 202)
+        # Buckets are ordered by operator, regardless of addition order
+        self.assertEqual(
+            [b.operator for b in plan.buckets],
+            [ModOperator.mod_add, ModOperator.post_mul])
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_spec_removed(self):
+        module = self.make_module(ModOperator.post_mul, 2)
+        self.fit.modules.high.append(module)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 202)
+        # Action
+        module.state = State.offline
+        # Verification
+        self.assertEqual(self.get_plan_items(), {self.skill})
+        self.assertEqual(
+            [b.operator for b in self.get_plan().buckets],
+            [ModOperator.mod_add])
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 101)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_affector_value_changed(self):
+        plan = self.get_plan()
+        # Action
+        self.skill.level = 5
+        # Verification
+        self.assertIs(self.get_plan(), plan)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 105)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_plan_emptied(self):
+        # Plan of attribute which nothing modifies anymore is kept, and picks
+        # up specs which start modifying attribute again
+        plan = self.get_plan()
+        self.fit.skills.remove(self.skill)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 100)
+        self.assertFalse(plan)
+        module = self.make_module(ModOperator.post_mul, 2)
+        # Action
+        self.fit.modules.high.append(module)
+        # Verification
+        self.assertIs(self.get_plan(), plan)
+        self.assertEqual(self.get_plan_items(), {module})
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_empty_plan_replaced(self):
+        # Plan composed when nothing modifies attribute is shared, and it is
+        # replaced with regular plan as soon as something modifies attribute
+        self.ship = Ship(self.mktype(attrs={self.tgt_attr.id: 100}).id)
+        self.fit.ship = self.ship
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 101)
+        self.fit.skills.remove(self.skill)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 100)
+        self.assertIs(self.get_plan(), EMPTY_PLAN)
+        module = self.make_module(ModOperator.post_mul, 2)
+        # Action
+        self.fit.modules.high.append(module)
+        # Verification
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        self.ship.attrs._force_recalc(self.tgt_attr.id)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        self.assertEqual(self.get_plan_items(), {module})
+        self.assertFalse(EMPTY_PLAN)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
@@ -0,0 +1,116 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import MsgProfiler
+from eos import Rig
+from eos import Ship
+from eos.calculator.service import CalculationService
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from eos.pubsub.message import AttrsValueChanged
+from eos.pubsub.message import EffectsStarted
+from eos.pubsub.message import ItemLoaded
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestMsgProfiler(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        self.rig_type = self.mktype(
+            attrs={self.src_attr.id: 1.5}, effects=[effect])
+        self.fit.ship = Ship(self.mktype(attrs={self.tgt_attr.id: 100}).id)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 100)
+        self.profiler = MsgProfiler()
+        self.fit.msg_profiler = self.profiler
+
+    def test_handler_stats(self):
+        # Action
+        self.fit.rigs.add(Rig(self.rig_type.id))
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 150)
+        stats = self.profiler.get_handler_stats()
+        started_stats = stats[(CalculationService, EffectsStarted)]
+        changed_stats = stats[(CalculationService, AttrsValueChanged)]
+        self.assertEqual(started_stats.count, 1)
+        self.assertEqual(changed_stats.count, 1)
+        # Attribute change is published while calculator handles started
+        # effects, thus its handling is not included into own time
+        self.assertGreaterEqual(
+            started_stats.time - started_stats.own_time, changed_stats.time)
+        self.assertLessEqual(started_stats.max_time, started_stats.time)
+        # Cleanup
+        self.fit.msg_profiler = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_msg_type_stats(self):
+        # Action
+        self.fit.rigs.add(Rig(self.rig_type.id))
+        self.fit.rigs.add(Rig(self.mktype().id))
+        # Verification
+        stats = self.profiler.get_msg_type_stats()
+        self.assertEqual(stats[ItemLoaded].count, 2)
+        subscriber_classes = [
+            k[0] for k in self.profiler.get_handler_stats()
+            if k[1] is ItemLoaded]
+        self.assertIn(CalculationService, subscriber_classes)
+        self.assertEqual(stats[ItemLoaded].fanout, len(subscriber_classes))
+        # Cleanup
+        self.fit.msg_profiler = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_disabled(self):
+        self.fit.msg_profiler = None
+        # Action
+        self.fit.rigs.add(Rig(self.rig_type.id))
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 150)
+        self.assertEqual(self.profiler.get_handler_stats(), {})
+        self.assertEqual(self.profiler.get_msg_type_stats(), {})
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_reset(self):
+        self.fit.rigs.add(Rig(self.rig_type.id))
+        # Action
+        self.profiler.reset()
+        # Verification
+        self.assertEqual(self.profiler.get_handler_stats(), {})
+        self.assertEqual(self.profiler.get_msg_type_stats(), {})
+        # Cleanup
+        self.fit.msg_profiler = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
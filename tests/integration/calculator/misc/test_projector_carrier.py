@@ -0,0 +1,98 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Fit
+from eos import ModuleHigh
+from eos import Ship
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestProjectorCarrier(CalculatorTestCase):
+    """Check that projectors survive changes of their carrier."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr()
+        src_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.target,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_percent,
+            affector_attr_id=src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.target,
+            modifiers=[modifier])
+        self.projector = ModuleHigh(
+            self.mktype(
+                attrs={src_attr.id: 20},
+                effects=[effect],
+                default_effect=effect).id,
+            state=State.active)
+        self.ship_type = self.mktype()
+        self.tgt_ship = Ship(self.mktype(attrs={self.tgt_attr.id: 100}).id)
+        tgt_fit = Fit(solar_system=self.fit.solar_system)
+        tgt_fit.ship = self.tgt_ship
+
+    def test_carrier_added_later(self):
+        self.fit.modules.high.append(self.projector)
+        self.projector.target = self.tgt_ship
+        # Action
+        self.fit.ship = Ship(self.ship_type.id)
+        # Verification
+        self.assertAlmostEqual(self.tgt_ship.attrs[self.tgt_attr.id], 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_carrier_replaced(self):
+        self.fit.ship = Ship(self.ship_type.id)
+        self.fit.modules.high.append(self.projector)
+        self.projector.target = self.tgt_ship
+        # Action
+        self.fit.ship = Ship(self.ship_type.id)
+        # Verification
+        self.assertAlmostEqual(self.tgt_ship.attrs[self.tgt_attr.id], 120)
+        # Action
+        self.fit.ship = None
+        # Verification
+        self.assertAlmostEqual(self.tgt_ship.attrs[self.tgt_attr.id], 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_projector_removed_without_carrier(self):
+        self.fit.ship = Ship(self.ship_type.id)
+        self.fit.modules.high.append(self.projector)
+        self.projector.target = self.tgt_ship
+        self.fit.ship = None
+        # Action
+        self.fit.modules.high.remove(self.projector)
+        # Verification
+        self.assertAlmostEqual(self.tgt_ship.attrs[self.tgt_attr.id], 100)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
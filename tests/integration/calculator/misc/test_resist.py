@@ -0,0 +1,135 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Fit
+from eos import Implant
+from eos import ModuleHigh
+from eos import Rig
+from eos import Ship
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestResist(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        self.resist_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.target,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_percent,
+            affector_attr_id=self.src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.target,
+            resist_attr_id=self.resist_attr.id,
+            modifiers=[modifier])
+        self.influence_src = ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: 50},
+                effects=[effect],
+                default_effect=effect).id,
+            state=State.active)
+        self.fit.modules.high.append(self.influence_src)
+        self.influence_tgt = Ship(self.mktype(attrs={
+            self.tgt_attr.id: 100, self.resist_attr.id: 0.4}).id)
+        self.tgt_fit = Fit(solar_system=self.fit.solar_system)
+        self.tgt_fit.ship = self.influence_tgt
+
+    def test_resisted(self):
+        # Action
+        self.influence_src.target = self.influence_tgt
+        # Verification
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_resist_change(self):
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.resist_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[modifier])
+        implant = Implant(self.mktype(
+            attrs={self.src_attr.id: 2}, effects=[effect]).id)
+        self.influence_src.target = self.influence_tgt
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 120)
+        # Action
+        self.tgt_fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 140)
+        # Action
+        self.tgt_fit.implants.remove(implant)
+        # Verification
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_affector_attr_change(self):
+        rig_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.domain,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.src_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=rig_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[modifier])
+        rig = Rig(self.mktype(
+            attrs={rig_attr.id: 2}, effects=[effect]).id)
+        self.influence_src.target = self.influence_tgt
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 120)
+        # Action
+        self.fit.rigs.add(rig)
+        # Verification
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 140)
+        # Action
+        self.fit.rigs.remove(rig)
+        # Verification
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_untargeted(self):
+        self.influence_src.target = self.influence_tgt
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 120)
+        # Action
+        self.influence_src.target = None
+        # Verification
+        self.assertAlmostEqual(self.influence_tgt.attrs[self.tgt_attr.id], 100)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
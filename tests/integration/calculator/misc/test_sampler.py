@@ -0,0 +1,96 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import CalculationSampler
+from eos import Rig
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestSampler(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.self,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        self.item = Rig(self.mktype(
+            attrs={self.tgt_attr.id: 100, self.src_attr.id: 1.5},
+            effects=[effect]).id)
+        self.sampler = CalculationSampler()
+        self.fit.solar_system.calc_sampler = self.sampler
+        self.fit.rigs.add(self.item)
+
+    def test_stats(self):
+        # Action
+        self.assertAlmostEqual(self.item.attrs[self.tgt_attr.id], 150)
+        # Verification
+        stats = self.sampler.get_stats()
+        self.assertEqual(len(stats), 2)
+        tgt_stats = stats[(self.item._type_id, self.tgt_attr.id)]
+        src_stats = stats[(self.item._type_id, self.src_attr.id)]
+        self.assertEqual(tgt_stats.count, 1)
+        self.assertEqual(src_stats.count, 1)
+        # Time spent on dependency is included into time of dependent
+        # attribute, but not into its own time
+        self.assertGreaterEqual(tgt_stats.time, src_stats.time)
+        self.assertAlmostEqual(
+            tgt_stats.own_time, tgt_stats.time - src_stats.time)
+        self.assertAlmostEqual(src_stats.own_time, src_stats.time)
+        # Cleanup
+        self.fit.solar_system.calc_sampler = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_recalculation(self):
+        self.item.attrs[self.tgt_attr.id]
+        # Action
+        self.item.attrs._force_recalc(self.tgt_attr.id)
+        self.item.attrs[self.tgt_attr.id]
+        # Verification
+        stats = self.sampler.get_stats()
+        self.assertEqual(stats[(self.item._type_id, self.tgt_attr.id)].count, 2)
+        self.assertEqual(stats[(self.item._type_id, self.src_attr.id)].count, 1)
+        # Cleanup
+        self.fit.solar_system.calc_sampler = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_reset(self):
+        self.item.attrs[self.tgt_attr.id]
+        # Action
+        self.sampler.reset()
+        # Verification
+        self.assertEqual(self.sampler.get_stats(), {})
+        # Cleanup
+        self.fit.solar_system.calc_sampler = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
@@ -0,0 +1,269 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Charge
+from eos import Fit
+from eos import ModuleHigh
+from eos import Ship
+from eos import Skill
+from eos import State
+from eos import TransactionClosedError
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestTransaction(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.mkattr(attr_id=AttrId.skill_level)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        skill_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.mod_add,
+            affector_attr_id=AttrId.skill_level)
+        skill_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[skill_modifier])
+        self.skill_type = self.mktype(effects=[skill_effect])
+        module_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        module_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=[module_modifier])
+        online_effect = self.mkeffect(
+            effect_id=16, category_id=EffectCategoryId.online)
+        self.module_type = self.mktype(
+            attrs={self.src_attr.id: 2},
+            effects=[online_effect, module_effect])
+        charge_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.other,
+            affectee_attr_id=self.src_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        charge_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[charge_modifier])
+        self.charge_type = self.mktype(
+            attrs={self.src_attr.id: 3}, effects=[charge_effect])
+        self.ship_type = self.mktype(attrs={self.tgt_attr.id: 100})
+        self.fit.ship = Ship(self.ship_type.id)
+        self.skill = Skill(self.skill_type.id, level=2)
+        self.fit.skills.add(self.skill)
+        self.charge = Charge(self.charge_type.id)
+        self.module = ModuleHigh(
+            self.module_type.id, state=State.online, charge=self.charge)
+        self.fit.modules.high.place(1, self.module)
+        # (100 + 2) * 2 * 3
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+
+    def test_item_setup(self):
+        # Action
+        with self.fit.transaction() as transaction:
+            self.skill.level = 5
+            self.module.state = State.offline
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 105)
+            transaction.rollback()
+        # Verification
+        self.assertEqual(self.skill.level, 2)
+        self.assertIs(self.module.state, State.online)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_values_not_recalculated(self):
+        self.assertAlmostEqual(self.module.attrs[self.src_attr.id], 6)
+        # Action
+        with self.fit.transaction() as transaction:
+            self.skill.level = 5
+            self.fit.modules.high.remove(self.module)
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 105)
+            transaction.rollback()
+        self.fit.reset_calc_stats()
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        self.assertAlmostEqual(self.module.attrs[self.src_attr.id], 6)
+        self.assertEqual(self.fit.get_calc_stats()['calculations'], 0)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_items(self):
+        module = ModuleHigh(self.module_type.id, state=State.online)
+        # Action
+        with self.fit.transaction() as transaction:
+            self.fit.modules.high.remove(self.module)
+            self.fit.modules.high.append(module)
+            self.fit.skills.remove(self.skill)
+            self.fit.skills.add(Skill(self.skill_type.id, level=5))
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 210)
+            transaction.rollback()
+        # Verification
+        self.assertEqual(list(self.fit.modules.high), [None, self.module])
+        self.assertIs(self.module.charge, self.charge)
+        self.assertEqual(list(self.fit.skills), [self.skill])
+        self.assertIsNone(module._fit)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        self.assertAlmostEqual(self.module.attrs[self.src_attr.id], 6)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_charge(self):
+        # Action
+        with self.fit.transaction() as transaction:
+            self.module.charge = None
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 204)
+            transaction.rollback()
+        # Verification
+        self.assertIs(self.module.charge, self.charge)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        self.assertAlmostEqual(self.module.attrs[self.src_attr.id], 6)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_removed_item_changed(self):
+        # Items can be changed while they are out of fit
+        # Action
+        with self.fit.transaction() as transaction:
+            self.fit.modules.high.remove(self.module)
+            self.module.state = State.offline
+            transaction.rollback()
+        # Verification
+        self.assertIs(self.module.state, State.online)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_changes_after_rollback(self):
+        # Values put back by rollback have to be updated like any others
+        # Action
+        with self.fit.transaction() as transaction:
+            self.skill.level = 5
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 630)
+            transaction.rollback()
+            self.module.state = State.offline
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 102)
+        # Action
+        self.skill.level = 3
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 103)
+        # Action
+        self.module.state = State.online
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 618)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_repeated_rollback(self):
+        # Action
+        with self.fit.transaction() as transaction:
+            for level in (3, 4, 5):
+                self.skill.level = level
+                self.assertAlmostEqual(
+                    self.fit.ship.attrs[self.tgt_attr.id], (100 + level) * 6)
+                transaction.rollback()
+                # Verification
+                self.assertEqual(self.skill.level, 2)
+                self.assertAlmostEqual(
+                    self.fit.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_exception(self):
+        # Action
+        with self.assertRaises(ZeroDivisionError):
+            with self.fit.transaction():
+                self.skill.level = 5
+                1 / 0
+        # Verification
+        self.assertEqual(self.skill.level, 2)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 612)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_closed(self):
+        with self.fit.transaction() as transaction:
+            self.skill.level = 5
+        # Action
+        with self.assertRaises(TransactionClosedError):
+            transaction.rollback()
+        # Verification
+        self.assertEqual(self.skill.level, 5)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 630)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_not_alone(self):
+        # When there are other fits in solar system, changes of the fit are
+        # reverted, and values are recalculated
+        proj_modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_domain=ModDomain.target,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=self.src_attr.id)
+        proj_effect = self.mkeffect(
+            category_id=EffectCategoryId.target,
+            modifiers=[proj_modifier])
+        projector = ModuleHigh(
+            self.mktype(
+                attrs={self.src_attr.id: 0.5},
+                effects=[proj_effect],
+                default_effect=proj_effect).id,
+            state=State.active)
+        src_fit = Fit(solar_system=self.fit.solar_system)
+        src_fit.modules.high.append(projector)
+        # Action
+        with self.fit.transaction() as transaction:
+            self.skill.level = 5
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 630)
+            projector.target = self.fit.ship
+            self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 315)
+            transaction.rollback()
+        # Verification
+        self.assertEqual(self.skill.level, 2)
+        self.assertIs(projector.target, self.fit.ship)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr.id], 306)
+        # Cleanup
+        projector.target = None
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
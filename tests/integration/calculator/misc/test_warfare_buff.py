@@ -0,0 +1,297 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import Fit
+from eos import Fleet
+from eos import Implant
+from eos import ModuleHigh
+from eos import MsgProfiler
+from eos import Ship
+from eos import State
+from eos.const.eos import ModAffecteeFilter
+from eos.const.eos import ModAggregateMode
+from eos.const.eos import ModDomain
+from eos.const.eos import ModOperator
+from eos.const.eve import AttrId
+from eos.const.eve import EffectCategoryId
+from eos.const.eve import EffectId
+from eos.pubsub.message import EffectApplied
+from eos.pubsub.message import EffectUnapplied
+from eos.source.source import get_source_data
+from tests.integration.calculator.testcase import CalculatorTestCase
+
+
+class TestWarfareBuff(CalculatorTestCase):
+    """Check how warfare buffs are applied to own ship and to fleet."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        for attr_id in (
+            AttrId.warfare_buff_1_id, AttrId.warfare_buff_1_value,
+            AttrId.warfare_buff_2_id, AttrId.warfare_buff_2_value,
+            AttrId.warfare_buff_3_id, AttrId.warfare_buff_3_value,
+            AttrId.warfare_buff_4_id, AttrId.warfare_buff_4_value
+        ):
+            self.mkattr(attr_id=attr_id)
+        self.tgt_attr1 = self.mkattr()
+        self.tgt_attr2 = self.mkattr()
+        self.mkbuff(
+            10,
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_attr_id=self.tgt_attr1.id,
+            operator=ModOperator.post_percent,
+            aggregate_mode=ModAggregateMode.maximum)
+        self.mkbuff(
+            11,
+            affectee_filter=ModAffecteeFilter.item,
+            affectee_attr_id=self.tgt_attr2.id,
+            operator=ModOperator.post_percent,
+            aggregate_mode=ModAggregateMode.maximum)
+        buff_effect = self.mkeffect(
+            effect_id=EffectId.module_bonus_warfare_link_armor,
+            category_id=EffectCategoryId.active)
+        self.buff_type = self.mktype(
+            # Buffs without templates are silently ignored
+            attrs={
+                AttrId.warfare_buff_1_id: 10,
+                AttrId.warfare_buff_1_value: 20,
+                AttrId.warfare_buff_2_id: 99,
+                AttrId.warfare_buff_3_id: 99,
+                AttrId.warfare_buff_4_id: 99},
+            effects=[buff_effect],
+            default_effect=buff_effect)
+        self.ship_type = self.mktype(
+            attrs={self.tgt_attr1.id: 100, self.tgt_attr2.id: 100})
+        self.fit.ship = Ship(self.ship_type.id)
+
+    def make_fit(self):
+        fit = Fit(solar_system=self.fit.solar_system)
+        fit.ship = Ship(self.ship_type.id)
+        return fit
+
+    def make_buffer(self, fit):
+        module = ModuleHigh(self.buff_type.id, state=State.active)
+        fit.modules.high.append(module)
+        return module
+
+    def make_implant(self, affectee_attr_id, operator, value):
+        src_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.domain,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=affectee_attr_id,
+            operator=operator,
+            affector_attr_id=src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        return Implant(self.mktype(
+            attrs={src_attr.id: value}, effects=[effect]).id)
+
+    def test_own_ship(self):
+        module = self.make_buffer(self.fit)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        # Action
+        module.state = State.online
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 100)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_value_change(self):
+        self.make_buffer(self.fit)
+        implant = self.make_implant(
+            AttrId.warfare_buff_1_value, ModOperator.post_mul, 2)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 140)
+        # Action
+        self.fit.implants.remove(implant)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_id_change(self):
+        self.make_buffer(self.fit)
+        implant = self.make_implant(
+            AttrId.warfare_buff_1_id, ModOperator.post_assign, 11)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr2.id], 100)
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 100)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr2.id], 120)
+        # Action
+        self.fit.implants.remove(implant)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr2.id], 100)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fleet_join_leave(self):
+        fit2 = self.make_fit()
+        self.make_buffer(self.fit)
+        fleet = Fleet()
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 100)
+        # Action
+        fleet.fits.add(self.fit)
+        fleet.fits.add(fit2)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 120)
+        # Action
+        fleet.fits.remove(fit2)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 100)
+        # Cleanup
+        fleet.fits.clear()
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fleet_leave_keeps_own_buff(self):
+        fit2 = self.make_fit()
+        self.make_buffer(self.fit)
+        fleet = Fleet()
+        fleet.fits.add(self.fit)
+        fleet.fits.add(fit2)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 120)
+        # Action
+        fleet.fits.remove(self.fit)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 100)
+        # Cleanup
+        fleet.fits.clear()
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_fleet_fit_without_ship(self):
+        fit2 = Fit(solar_system=self.fit.solar_system)
+        self.make_buffer(self.fit)
+        fleet = Fleet()
+        fleet.fits.add(self.fit)
+        # Action
+        fleet.fits.add(fit2)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        # Action
+        fleet.fits.remove(fit2)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        # Cleanup
+        fleet.fits.clear()
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_buff_modifiers_cached(self):
+        source = self.fit.solar_system.source
+        cache_handler = source.cache_handler
+        get_buff_templates = cache_handler.get_buff_templates
+        fetched_buff_ids = []
+
+        def get_buff_templates_recorded(buff_id):
+            fetched_buff_ids.append(buff_id)
+            return get_buff_templates(buff_id)
+
+        cache_handler.get_buff_templates = get_buff_templates_recorded
+        fit2 = self.make_fit()
+        # Action
+        module1 = self.make_buffer(self.fit)
+        module2 = self.make_buffer(fit2)
+        module1.state = State.online
+        module1.state = State.active
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 120)
+        self.assertEqual(fetched_buff_ids.count(10), 1)
+        source_data = get_source_data(source)
+        self.assertIs(
+            source_data.get_buff_modifiers(
+                10, AttrId.warfare_buff_1_value),
+            source_data.get_buff_modifiers(
+                10, AttrId.warfare_buff_1_value))
+        self.assertEqual(fetched_buff_ids.count(10), 1)
+        # Cleanup
+        del cache_handler.get_buff_templates
+        module2.state = State.online
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_value_change_reuses_specs(self):
+        fit2 = self.make_fit()
+        fleet = Fleet()
+        fleet.fits.add(self.fit)
+        fleet.fits.add(fit2)
+        self.make_buffer(self.fit)
+        implant = self.make_implant(
+            AttrId.warfare_buff_1_value, ModOperator.post_mul, 2)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 120)
+        profiler = MsgProfiler()
+        self.fit.msg_profiler = profiler
+        fit2.msg_profiler = profiler
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(self.fit.ship.attrs[self.tgt_attr1.id], 140)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 140)
+        msg_type_stats = profiler.get_msg_type_stats()
+        self.assertNotIn(EffectApplied, msg_type_stats)
+        self.assertNotIn(EffectUnapplied, msg_type_stats)
+        # Cleanup
+        self.fit.msg_profiler = None
+        fit2.msg_profiler = None
+        fleet.fits.clear()
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_id_change_replaces_specs(self):
+        fit2 = self.make_fit()
+        fleet = Fleet()
+        fleet.fits.add(self.fit)
+        fleet.fits.add(fit2)
+        self.make_buffer(self.fit)
+        implant = self.make_implant(
+            AttrId.warfare_buff_1_id, ModOperator.post_assign, 11)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 120)
+        profiler = MsgProfiler()
+        self.fit.msg_profiler = profiler
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr1.id], 100)
+        self.assertAlmostEqual(fit2.ship.attrs[self.tgt_attr2.id], 120)
+        msg_type_stats = profiler.get_msg_type_stats()
+        self.assertEqual(msg_type_stats[EffectApplied].count, 1)
+        self.assertEqual(msg_type_stats[EffectUnapplied].count, 1)
+        # Cleanup
+        self.fit.msg_profiler = None
+        fleet.fits.clear()
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
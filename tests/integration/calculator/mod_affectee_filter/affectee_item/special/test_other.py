@@ -118,3 +118,115 @@ class TestAffecteeItemSpecialOther(CalculatorTestCase):
         # Cleanup
         self.assert_solsys_buffers_empty(self.fit.solar_system)
         self.assert_log_entries(0)
+
+    def make_mutual(self):
+        """Make container and charge which modify each other."""
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+        self.effect = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[
+                self.make_modifier(self.src_attr.id, self.tgt_attr.id)])
+        container = ModuleHigh(self.mktype(
+            attrs={self.src_attr.id: 20, self.tgt_attr.id: 100},
+            effects=[self.effect]).id)
+        charge = Charge(self.mktype(
+            attrs={self.src_attr.id: 40, self.tgt_attr.id: 50},
+            effects=[self.effect]).id)
+        return container, charge
+
+    def test_load_container_first_unload_charge_first(self):
+        container, charge = self.make_mutual()
+        # Action
+        self.fit.modules.high.append(container)
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 100)
+        # Action
+        container.charge = charge
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 140)
+        self.assertAlmostEqual(charge.attrs[self.tgt_attr.id], 60)
+        # Action
+        container.charge = None
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 100)
+        # Action
+        self.fit.modules.high.remove(container)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_load_container_first_unload_together(self):
+        container, charge = self.make_mutual()
+        self.fit.modules.high.append(container)
+        # Action
+        container.charge = charge
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 140)
+        self.assertAlmostEqual(charge.attrs[self.tgt_attr.id], 60)
+        # Action
+        self.fit.modules.high.remove(container)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_load_together_unload_charge_first(self):
+        container, charge = self.make_mutual()
+        container.charge = charge
+        # Action
+        self.fit.modules.high.append(container)
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 140)
+        self.assertAlmostEqual(charge.attrs[self.tgt_attr.id], 60)
+        # Action
+        container.charge = None
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 100)
+        # Action
+        self.fit.modules.high.remove(container)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_load_together_unload_together(self):
+        container, charge = self.make_mutual()
+        container.charge = charge
+        # Action
+        self.fit.modules.high.append(container)
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 140)
+        self.assertAlmostEqual(charge.attrs[self.tgt_attr.id], 60)
+        # Action
+        self.fit.modules.high.remove(container)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_charge_swap(self):
+        container, charge1 = self.make_mutual()
+        self.fit.modules.high.append(container)
+        container.charge = charge1
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 140)
+        self.assertAlmostEqual(charge1.attrs[self.tgt_attr.id], 60)
+        charge2 = Charge(self.mktype(
+            attrs={self.src_attr.id: 60, self.tgt_attr.id: 10},
+            effects=[self.effect]).id)
+        # Action
+        container.charge = charge2
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 160)
+        self.assertAlmostEqual(charge2.attrs[self.tgt_attr.id], 12)
+        # Action
+        container.charge = None
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 100)
+        # Action
+        container.charge = charge1
+        # Verification
+        self.assertAlmostEqual(container.attrs[self.tgt_attr.id], 140)
+        self.assertAlmostEqual(charge1.attrs[self.tgt_attr.id], 60)
+        # Action
+        self.fit.modules.high.remove(container)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
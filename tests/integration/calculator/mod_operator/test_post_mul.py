@@ -19,6 +19,7 @@
 # ==============================================================================
 
 
+from eos import Fit
 from eos import Implant
 from eos import Rig
 from eos.const.eos import ModAffecteeFilter
@@ -76,3 +77,28 @@ class TestOperatorPostMul(CalculatorTestCase):
         # Cleanup
         self.assert_log_entries(0)
         self.assert_solsys_buffers_empty(self.fit.solar_system)
+
+    def test_penalized_insignificant(self):
+        # Modifications after 11th strongest one are not applied
+        self.tgt_attr.stackable = False
+        src_attr = self.mkattr()
+        modifier = self.mkmod(
+            affectee_filter=ModAffecteeFilter.domain,
+            affectee_domain=ModDomain.ship,
+            affectee_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            affector_attr_id=src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        influence_tgt = Rig(self.mktype(attrs={self.tgt_attr.id: 100}).id)
+        fit = Fit()
+        fit.rigs.add(influence_tgt)
+        for _ in range(13):
+            fit.implants.add(Implant(self.mktype(
+                attrs={src_attr.id: 1.1}, effects=[effect]).id))
+        # Verification
+        self.assertAlmostEqual(
+            influence_tgt.attrs[self.tgt_attr.id], 131.8295445)
+        # Cleanup
+        self.assert_log_entries(0)
+        self.assert_solsys_buffers_empty(fit.solar_system)
@@ -404,6 +404,7 @@ class TestCharge(ContainerTestCase):
         self.assertEqual(len(fit.modules.high), 1)
         self.assertIs(fit.modules.high[0], module)
         self.assertIs(module.charge, charge)
+        self.assertIs(charge._fit, fit)
         # Cleanup
         self.assert_item_buffers_empty(module)
         self.assert_item_buffers_empty(charge)
@@ -421,6 +422,7 @@ class TestCharge(ContainerTestCase):
         # Verification
         self.assertEqual(len(fit.modules.high), 0)
         self.assertIs(module.charge, charge)
+        self.assertIsNone(charge._fit)
         # Cleanup
         self.assert_item_buffers_empty(module)
         self.assert_item_buffers_empty(charge)
@@ -82,6 +82,29 @@ class TestPropulsionModules(CustomizationTestCase):
         self.assert_solsys_buffers_empty(self.fit.solar_system)
         self.assert_log_entries(0)
 
+    def test_ship_swap(self):
+        # Velocity boost relies on mass of ship, which changes when ship is
+        # replaced
+        ab = self.make_prop_mod(EffectId.module_bonus_afterburner)
+        ab.state = State.active
+        self.fit.ship = self.make_ship()
+        self.fit.modules.mid.append(ab)
+        self.assertAlmostEqual(
+            self.fit.ship.attrs[AttrId.max_velocity], 2735.871, places=3)
+        ship = Ship(self.mktype(attrs={
+            AttrId.max_velocity: 455,
+            AttrId.signature_radius: 32,
+            AttrId.mass: 5000000}).id)
+        # Action
+        self.fit.ship = ship
+        # Verification
+        self.assertAlmostEqual(
+            ship.attrs[AttrId.max_velocity], 1097.791, places=3)
+        self.assertAlmostEqual(ship.attrs[AttrId.mass], 5500000)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
     def test_ab_state(self):
         ship = self.make_ship()
         ab = self.make_prop_mod(EffectId.module_bonus_afterburner)
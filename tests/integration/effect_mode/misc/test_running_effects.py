@@ -0,0 +1,128 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2018 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import EffectMode
+from eos import ModuleHigh
+from eos import State
+from eos.const.eve import EffectCategoryId
+from eos.const.eve import EffectId
+from eos.effect_status import EffectStatusResolver
+from tests.integration.effect_mode.testcase import EffectModeTestCase
+
+
+class TestRunningEffects(EffectModeTestCase):
+    """Check that effects running by default follow item state."""
+
+    def setUp(self):
+        EffectModeTestCase.setUp(self)
+        self.passive = self.mkeffect(category_id=EffectCategoryId.passive)
+        self.chance = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            fitting_usage_chance_attr_id=self.mkattr().id)
+        self.online = self.mkeffect(
+            effect_id=EffectId.online, category_id=EffectCategoryId.online)
+        self.online_regular = self.mkeffect(
+            category_id=EffectCategoryId.online)
+        self.active_default = self.mkeffect(
+            category_id=EffectCategoryId.active)
+        self.active_regular = self.mkeffect(
+            category_id=EffectCategoryId.target)
+        self.overload = self.mkeffect(category_id=EffectCategoryId.overload)
+        self.item = ModuleHigh(
+            self.mktype(
+                effects=(
+                    self.passive, self.chance, self.online,
+                    self.online_regular, self.active_default,
+                    self.active_regular, self.overload),
+                default_effect=self.active_default).id,
+            state=State.offline)
+        self.fit.modules.high.append(self.item)
+
+    def get_running_effect_ids(self):
+        return {
+            effect_id for effect_id, data in self.item.effects.items()
+            if data.status}
+
+    def get_resolved_effect_ids(self):
+        return {
+            effect_id for effect_id, status in
+            EffectStatusResolver.resolve_effects_status(self.item).items()
+            if status}
+
+    def test_state_switch(self):
+        expected_by_state = {
+            State.offline: {self.passive.id},
+            State.online: {
+                self.passive.id, self.online.id, self.online_regular.id},
+            State.active: {
+                self.passive.id, self.online.id, self.online_regular.id,
+                self.active_default.id},
+            State.overload: {
+                self.passive.id, self.online.id, self.online_regular.id,
+                self.active_default.id, self.overload.id}}
+        for state in (
+            State.overload, State.online, State.active, State.offline,
+            State.overload
+        ):
+            # Action
+            self.item.state = state
+            # Verification
+            self.assertEqual(
+                self.get_running_effect_ids(), expected_by_state[state])
+            self.assertEqual(
+                self.get_running_effect_ids(), self.get_resolved_effect_ids())
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_online_missing(self):
+        # Regular online effects do not run without 'online' effect
+        item = ModuleHigh(
+            self.mktype(effects=(self.online_regular,)).id,
+            state=State.overload)
+        # Action
+        self.fit.modules.high.append(item)
+        # Verification
+        self.assertIs(item.effects[self.online_regular.id].status, False)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
+
+    def test_mode_override_removed(self):
+        self.item.state = State.active
+        self.item.set_effect_mode(self.online.id, EffectMode.force_stop)
+        self.item.set_effect_mode(
+            self.active_regular.id, EffectMode.state_compliance)
+        self.assertEqual(
+            self.get_running_effect_ids(),
+            {self.passive.id, self.active_default.id, self.active_regular.id})
+        # Action
+        self.item.set_effect_mode(self.online.id, EffectMode.full_compliance)
+        self.item.set_effect_mode(
+            self.active_regular.id, EffectMode.full_compliance)
+        # Verification
+        self.assertEqual(
+            self.get_running_effect_ids(),
+            {self.passive.id, self.online.id, self.online_regular.id,
+             self.active_default.id})
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
+        self.assert_log_entries(0)
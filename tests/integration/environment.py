@@ -20,10 +20,12 @@
 
 
 from eos.cache_handler import AttrFetchError
+from eos.cache_handler import BuffTemplatesFetchError
 from eos.cache_handler import EffectFetchError
 from eos.cache_handler import TypeFetchError
 from eos.eve_obj.attribute import AttrFactory
 from eos.eve_obj.attribute import Attribute
+from eos.eve_obj.buff_template import WarfareBuffTemplate
 from eos.eve_obj.effect import Effect
 from eos.eve_obj.effect import EffectFactory
 from eos.eve_obj.type import Type
@@ -39,6 +41,7 @@ class CacheHandler:
         self.__type_data = {}
         self.__attr_data = {}
         self.__effect_data = {}
+        self.__buff_data = {}
         self.__allocated_type_id = 0
         self.__allocated_attr_id = 0
         self.__allocated_effect_id = 0
@@ -85,6 +88,11 @@ class CacheHandler:
         self.__effect_data[effect.id] = effect
         return effect
 
+    def mkbuff(self, buff_id, **kwargs):
+        buff_template = WarfareBuffTemplate(buff_id=buff_id, **kwargs)
+        self.__buff_data.setdefault(buff_id, []).append(buff_template)
+        return buff_template
+
     def get_type(self, type_id):
         try:
             return self.__type_data[type_id]
@@ -103,6 +111,12 @@ class CacheHandler:
         except KeyError:
             raise EffectFetchError(effect_id)
 
+    def get_buff_templates(self, buff_id):
+        try:
+            return self.__buff_data[buff_id]
+        except KeyError:
+            raise BuffTemplatesFetchError(buff_id)
+
     def allocate_type_id(self):
         allocated_id = max((
             TEST_ID_START - 1, self.__allocated_type_id,
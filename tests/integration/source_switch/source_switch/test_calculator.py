@@ -151,3 +151,28 @@ class TestSourceSwitchCalculator(SourceSwitchTestCase):
         # Cleanup
         self.assert_solsys_buffers_empty(fit.solar_system)
         self.assert_log_entries(0)
+
+    def test_switch_attr_metadata(self):
+        # Metadata of attributes is taken from source solar system is switched
+        # to
+        attr_id = self.allocate_attr_id('src1', 'src2')
+        self.mkattr(src='src1', attr_id=attr_id, default_value=5)
+        self.mkattr(src='src2', attr_id=attr_id, default_value=8)
+        ship_type_id = self.allocate_type_id('src1', 'src2')
+        self.mktype(src='src1', type_id=ship_type_id)
+        self.mktype(src='src2', type_id=ship_type_id)
+        ship = Ship(ship_type_id)
+        self.fit.ship = ship
+        self.assertAlmostEqual(ship.attrs[attr_id], 5)
+        # Action
+        self.fit.solar_system.source = 'src2'
+        # Verification
+        self.assertAlmostEqual(ship.attrs[attr_id], 8)
+        # Action
+        self.fit.solar_system.source = None
+        # Verification
+        with self.assertRaises(KeyError):
+            ship.attrs[attr_id]
+        self.assert_log_entries(1)
+        # Cleanup
+        self.assert_solsys_buffers_empty(self.fit.solar_system)
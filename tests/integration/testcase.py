@@ -120,6 +120,25 @@ class IntegrationTestCase(EosTestCase):
             src = SourceManager.get(src)
         return src.cache_handler.mkeffect(*args, **kwargs)
 
+    def mkbuff(self, *args, src=None, **kwargs):
+        """Make warfare buff template and add it to default source.
+
+        Args:
+            src (optional): Source alias to which buff template should be
+                added. Default source is used by default.
+            *args: Arguments which will be used to instantiate buff template.
+            **kwargs: Keyword arguments which will be used to instantiate buff
+                template.
+
+        Returns:
+            Warfare buff template.
+        """
+        if src is None:
+            src = SourceManager.default
+        else:
+            src = SourceManager.get(src)
+        return src.cache_handler.mkbuff(*args, **kwargs)
+
     def mkmod(self, **kwargs):
         """Shortcut to instantiating dogma modifier.
 
@@ -193,7 +212,9 @@ class IntegrationTestCase(EosTestCase):
         # Verify
         entry_num = self._get_obj_buffer_entry_count(
             solsys,
-            ignore_attrs=(('SolarSystem', '_SolarSystem__source'),))
+            ignore_attrs=(
+                ('SolarSystem', '_SolarSystem__source'),
+                ('CalculationService', 'attr_metadata')))
         # Report
         if entry_num:
             msg = (
@@ -269,6 +290,7 @@ class IntegrationTestCase(EosTestCase):
                 ('Fit', '_Fit__incoming_dmg_rah'),
                 # Restriction registers are always in subscribers
                 ('Fit', '_FitMsgBroker__subscribers'),
+                ('Fit', '_FitMsgBroker__handlers'),
                 # Service is allowed to keep list of restrictions permanently
                 ('RestrictionService', '_RestrictionService__restrictions')))
         # Report
@@ -297,8 +319,11 @@ class IntegrationTestCase(EosTestCase):
             ignore_attrs=(
                 # Disallow to investigate parent
                 ('BaseItemMixin', '_container'),
+                ('BaseItemMixin', '_fit'),
                 # Allowed to carry effect settings permanently
-                ('BaseItemMixin', '_BaseItemMixin__effect_mode_overrides')))
+                ('BaseItemMixin', '_BaseItemMixin__effect_mode_overrides'),
+                # Item types are allowed to keep precomputed data
+                ('Type', 'running_effect_ids')))
         # Report
         if entry_num:
             msg = '{} entries in item buffers: buffers must be empty'.format(